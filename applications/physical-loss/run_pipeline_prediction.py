@@ -24,8 +24,9 @@ net_manager = NetworkManager(network_architecture=UNet,
                              data_forward_fields='forces',
                              data_backward_fields='displacement')
 
-# Launch the prediction pipeline
+# Launch the prediction pipeline (the beam keeps being rendered while the network computes the predictions)
 PredictionPipeline(simulation_manager=simu_manager,
                    database_manager=data_manager,
                    network_manager=net_manager,
-                   session_name='training').execute()
+                   session_name='training',
+                   async_prediction=True).execute()
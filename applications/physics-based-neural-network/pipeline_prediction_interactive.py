@@ -17,8 +17,9 @@ net_manager = NetworkManager(network_architecture=MLP,
                              data_forward_fields='forces',
                              data_backward_fields='displacement')
 
-# Launch the prediction pipeline
+# Launch the prediction pipeline (the mesh follows the mouse while the network computes the predictions)
 PredictionPipeline(simulation_manager=simu_manager,
                    database_manager=data_manager,
                    network_manager=net_manager,
-                   step_nb=1).execute()
+                   step_nb=1,
+                   async_prediction=True).execute()
@@ -86,6 +86,10 @@ class BeamInteractive(Simulation):
         self.plotter.add_callback('RightButtonPress', self.right_button_press)
         self.plotter.add_callback('MouseMove', self.mouse_move)
 
+        # Apply the predictions completed between two mouse movements
+        self.plotter.add_callback('timer', self.timer)
+        self.plotter.timer_callback('create', dt=20)
+
     def step(self):
 
         # Launch Vedo window
@@ -145,10 +149,22 @@ class BeamInteractive(Simulation):
             F[self.areas[self.selected]] = d_pos
             F = 50 * F / np.linalg.norm(F)
 
-            # Get the predicted displacement and update meshes
-            new_pos = self.grid_init.vertices + self.get_prediction(forces=F)['displacement']
+            # Request the predicted displacement without waiting for it, apply the latest one if any
+            self.submit_prediction(forces=F)
+            self.update_prediction()
+
+    def timer(self, evt):
+
+        if self.object_mode and self.selected is not None:
+            self.update_prediction()
+
+    def update_prediction(self):
+
+        # Get the latest predicted displacement and update meshes
+        if (prediction := self.get_latest_prediction()) is not None:
+            new_pos = self.grid_init.vertices + prediction['displacement']
             self.update_mesh(positions=new_pos)
-            self.update_arrows(positions=new_pos, vectors=F)
+            self.update_arrows(positions=new_pos, vectors=prediction['forces'])
             self.update_spheres(selected=self.selected)
             self.plotter.render()
 
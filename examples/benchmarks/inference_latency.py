@@ -0,0 +1,71 @@
+# Python related imports
+from time import perf_counter
+from numpy import array, percentile
+from numpy.random import uniform
+from torch import float32
+
+# DeepPhysX related imports
+from DeepPhysX.networks.network_controller import NetworkController
+from DeepPhysX.networks.network_manager import NetworkManager
+from DeepPhysX.networks.architectures import MLP, UNet
+
+NB_CALLS = 500
+NORMALIZATION = [0.5, 2.]
+
+# Architectures to compare: (name, architecture, kwargs, input sample shape)
+CASES = [('MLP', MLP, {'dim_layers': [5, 64, 64, 1], 'out_shape': (1,)}, (5,)),
+         ('UNet', UNet, {'input_size': [16, 8, 8], 'nb_dims': 3, 'nb_input_channels': 3, 'nb_first_layer_channels': 16,
+                         'nb_output_channels': 3, 'nb_steps': 2, 'two_sublayers': True, 'border_mode': 'same'},
+          (8 * 8 * 16, 3))]
+
+
+def eager_prediction(network: NetworkController, sample: array) -> array:
+    """
+    Prediction with the conversions of the default NetworkManager path.
+    """
+
+    data = NetworkManager.normalize_data(data=array([sample]), normalization=NORMALIZATION)
+    net_predict = network.predict(network.to_torch(tensor=data, grad=False))
+    return NetworkManager.normalize_data(data=network.to_numpy(tensor=net_predict), normalization=NORMALIZATION,
+                                         reverse=True)
+
+
+def inference_prediction(network: NetworkController, sample: array) -> array:
+    """
+    Prediction with the inference path of the NetworkController.
+    """
+
+    return network.infer(inputs=[sample[None]],
+                         input_normalization=[NORMALIZATION],
+                         output_normalization=[NORMALIZATION])[0]
+
+
+def measure(prediction, network: NetworkController, samples: array) -> array:
+    """
+    Measure the latency of each prediction call.
+    """
+
+    latencies = []
+    for sample in samples:
+        start = perf_counter()
+        prediction(network, sample)
+        latencies.append(perf_counter() - start)
+    return array(latencies) * 1e6
+
+
+if __name__ == '__main__':
+
+    for name, architecture, kwargs, shape in CASES:
+
+        # Create the network in prediction mode
+        network = NetworkController(network_architecture=architecture, network_kwargs=kwargs, data_type=float32)
+        network.set_device()
+        network.eval()
+        samples = uniform(-1., 1., (NB_CALLS, *shape)).astype('float32')
+
+        # Compare both paths (first run to warm up)
+        for path, prediction in (('eager', eager_prediction), ('inference', inference_prediction)):
+            measure(prediction=prediction, network=network, samples=samples[:10])
+            latencies = measure(prediction=prediction, network=network, samples=samples)
+            print(f"[{name:>4} | {path:>9}] mean {latencies.mean():9.1f}us | p50 {percentile(latencies, 50):9.1f}us | "
+                  f"p99 {percentile(latencies, 99):9.1f}us")
@@ -0,0 +1,94 @@
+# Python related imports
+from time import perf_counter
+from numpy import array
+from numpy.random import uniform
+from torch import float32, bfloat16, manual_seed
+from torch.nn import MSELoss
+from torch.optim import Adam
+
+# DeepPhysX related imports
+from DeepPhysX.networks.network_controller import NetworkController
+from DeepPhysX.networks.architectures import UNet
+
+NB_TRAINING_BATCHES = 10
+NB_PREDICTIONS = 50
+BATCH_SIZE = 16
+
+# UNet configuration of the beam application (see applications/physical-loss)
+GRID_RESOLUTION = [60, 5, 5]
+UNET_KWARGS = {'input_size': GRID_RESOLUTION,
+               'nb_dims': 3,
+               'nb_input_channels': 3,
+               'nb_first_layer_channels': 128,
+               'nb_output_channels': 3,
+               'nb_steps': 3,
+               'two_sublayers': True,
+               'border_mode': 'same',
+               'skip_merge': False}
+
+
+def create_network(autocast_type) -> NetworkController:
+    """
+    Create the beam UNet with the default initialization seed.
+    """
+
+    manual_seed(0)
+    network = NetworkController(network_architecture=UNet, network_kwargs=UNET_KWARGS, data_type=float32,
+                                autocast_type=autocast_type)
+    network.set_device()
+    return network
+
+
+def training_time(network: NetworkController, inputs: array, targets: array) -> float:
+    """
+    Measure the mean time of an optimization step.
+    """
+
+    network.train()
+    loss_fnc, optimizer = MSELoss(), Adam(params=network.parameters(), lr=1e-5)
+    x, y = network.to_torch(tensor=inputs, grad=False), network.to_torch(tensor=targets, grad=False)
+    start = perf_counter()
+    for _ in range(NB_TRAINING_BATCHES):
+        optimizer.zero_grad()
+        with network.autocast():
+            loss = loss_fnc(network.predict(x), y)
+        loss.backward()
+        optimizer.step()
+    return (perf_counter() - start) / NB_TRAINING_BATCHES
+
+
+def prediction(network: NetworkController, samples: array) -> (float, array):
+    """
+    Measure the mean latency of a single sample prediction and return the predictions.
+    """
+
+    network.eval()
+    predictions = []
+    network.infer(inputs=[samples[:1]], input_normalization=[None], output_normalization=[None])
+    start = perf_counter()
+    for sample in samples:
+        predictions.append(network.infer(inputs=[sample[None]], input_normalization=[None],
+                                         output_normalization=[None])[0].copy())
+    return (perf_counter() - start) / len(samples), array(predictions)
+
+
+if __name__ == '__main__':
+
+    nb_nodes = GRID_RESOLUTION[0] * GRID_RESOLUTION[1] * GRID_RESOLUTION[2]
+    inputs = uniform(-1., 1., (BATCH_SIZE, nb_nodes, 3)).astype('float32')
+    targets = uniform(-1., 1., (BATCH_SIZE, *GRID_RESOLUTION, 3)).astype('float32')
+    samples = uniform(-1., 1., (NB_PREDICTIONS, nb_nodes, 3)).astype('float32')
+
+    # Compare float32 and bfloat16 autocast with the same initial weights
+    results = {}
+    for name, autocast_type in (('float32', None), ('bfloat16', bfloat16)):
+        network = create_network(autocast_type=autocast_type)
+        _, results[name] = prediction(network=network, samples=samples)
+        train = training_time(network=create_network(autocast_type=autocast_type), inputs=inputs, targets=targets)
+        latency, _ = prediction(network=network, samples=samples)
+        print(f"[{name:>8}] training step {train * 1e3:8.1f}ms | prediction {latency * 1e3:8.2f}ms")
+
+    # Accuracy of the bfloat16 predictions
+    error = abs(results['bfloat16'] - results['float32'])
+    relative = error.mean() / abs(results['float32']).mean()
+    print(f"[bfloat16] prediction error vs float32: max {error.max():.3e} | mean relative {relative:.3e}")
@@ -0,0 +1,67 @@
+# Python related imports
+from os.path import exists, join
+from sys import path
+from time import perf_counter
+from numpy import array, percentile
+
+# DeepPhysX related imports
+from DeepPhysX.pipelines.prediction_pipeline import PredictionPipeline
+from DeepPhysX.simulation.simulation_manager import SimulationManager
+from DeepPhysX.database.database_manager import DatabaseManager
+from DeepPhysX.networks.architectures.mlp import MLP
+from DeepPhysX.networks.network_manager import NetworkManager
+
+# Session imports
+path.append(join('..', 'tutorial'))
+from simulation import SpringEnvironmentPrediction
+
+NB_REQUESTS = 2000
+
+
+def measure(simulation_manager: SimulationManager, in_process: bool) -> array:
+    """
+    Measure the latency of the prediction requests of the simulation.
+    """
+
+    simulation_manager.in_process_prediction = in_process
+    controller = simulation_manager.simulation_controller
+    latencies = []
+    for _ in range(NB_REQUESTS):
+        controller.simulation.step()
+        state = controller.get_data()['state']
+        start = perf_counter()
+        controller.get_prediction(state=state)
+        latencies.append(perf_counter() - start)
+    return array(latencies) * 1e6
+
+
+if __name__ == '__main__':
+
+    session = join('..', 'tutorial', 'sessions')
+    if not exists(join(session, 'training')):
+        raise FileNotFoundError('You must run the "training.py" pipeline of the tutorial first.')
+
+    # Create the managers of the prediction pipeline
+    simulation_manager = SimulationManager(simulation_class=SpringEnvironmentPrediction)
+    network_manager = NetworkManager(network_architecture=MLP,
+                                     network_kwargs={'dim_layers': [5, 5, 5, 1],
+                                                     'out_shape': (1,)},
+                                     data_forward_fields='state',
+                                     data_backward_fields='displacement')
+    pipeline = PredictionPipeline(simulation_manager=simulation_manager,
+                                  database_manager=DatabaseManager(normalize=True),
+                                  network_manager=network_manager,
+                                  session_dir=session,
+                                  session_name='training')
+
+    # Compare the exchange database path and the in-memory path
+    for name, in_process in (('exchange database', False), ('in-process', True)):
+        measure(simulation_manager=simulation_manager, in_process=in_process)
+        latencies = measure(simulation_manager=simulation_manager, in_process=in_process)
+        print(f"[{name:>17}] mean {latencies.mean():8.1f}us | p50 {percentile(latencies, 50):8.1f}us | "
+              f"p99 {percentile(latencies, 99):8.1f}us")
+
+    # Close managers
+    simulation_manager.close()
+    pipeline.database_manager.close()
+    network_manager.close()
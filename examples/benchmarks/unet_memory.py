@@ -0,0 +1,97 @@
+# Python related imports
+from time import perf_counter
+from numpy.random import uniform
+from torch import float32, manual_seed, Tensor
+from torch.autograd.graph import saved_tensors_hooks
+from torch.nn import MSELoss
+from torch.optim import Adam
+
+# DeepPhysX related imports
+from DeepPhysX.networks.network_controller import NetworkController
+from DeepPhysX.networks.architectures import UNet
+
+NB_TRAINING_BATCHES = 5
+BATCH_SIZE = 4
+
+# Regular grid of a liver with margins (see applications/non-rigid-registration)
+GRID_RESOLUTION = [32, 24, 24]
+NB_STEPS = [2, 3]
+NB_FIRST_LAYER_CHANNELS = [16, 32]
+
+# Memory options to compare: (name, UNet kwargs)
+OPTIONS = [('default', {}),
+           ('checkpoint', {'checkpoint_levels': [0, 1]}),
+           ('channels last', {'channels_last': True}),
+           ('both', {'checkpoint_levels': [0, 1], 'channels_last': True})]
+
+
+def create_network(nb_steps: int, nb_channels: int, options: dict) -> NetworkController:
+    """
+    Create the UNet with the default initialization seed.
+    """
+
+    manual_seed(0)
+    network = NetworkController(network_architecture=UNet,
+                                network_kwargs={'input_size': GRID_RESOLUTION,
+                                                'nb_dims': 3,
+                                                'nb_input_channels': 1,
+                                                'nb_first_layer_channels': nb_channels,
+                                                'nb_output_channels': 3,
+                                                'nb_steps': nb_steps,
+                                                'two_sublayers': True,
+                                                'border_mode': 'same',
+                                                **options},
+                                data_type=float32)
+    network.set_device()
+    network.train()
+    return network
+
+
+def activations_memory(network: NetworkController, x: Tensor, y: Tensor) -> float:
+    """
+    Measure the memory (in MB) of the tensors stored for the backward pass of a batch.
+    """
+
+    parameters = {p.data_ptr() for p in network.parameters()}
+    saved = {}
+
+    def pack(tensor: Tensor) -> Tensor:
+        if tensor.data_ptr() not in parameters:
+            saved[tensor.data_ptr()] = tensor.numel() * tensor.element_size()
+        return tensor
+
+    with saved_tensors_hooks(pack, lambda tensor: tensor):
+        MSELoss()(network.predict(x), y)
+    return sum(saved.values()) / 2 ** 20
+
+
+def training_throughput(network: NetworkController, x: Tensor, y: Tensor) -> float:
+    """
+    Measure the number of samples per second of the optimization steps.
+    """
+
+    loss_fnc, optimizer = MSELoss(), Adam(params=network.parameters(), lr=1e-5)
+    start = perf_counter()
+    for _ in range(NB_TRAINING_BATCHES):
+        optimizer.zero_grad()
+        loss_fnc(network.predict(x), y).backward()
+        optimizer.step()
+    return NB_TRAINING_BATCHES * BATCH_SIZE / (perf_counter() - start)
+
+
+if __name__ == '__main__':
+
+    nb_nodes = GRID_RESOLUTION[0] * GRID_RESOLUTION[1] * GRID_RESOLUTION[2]
+    inputs = uniform(-1., 1., (BATCH_SIZE, nb_nodes, 1)).astype('float32')
+    targets = uniform(-1., 1., (BATCH_SIZE, *GRID_RESOLUTION, 3)).astype('float32')
+
+    for nb_steps in NB_STEPS:
+        for nb_channels in NB_FIRST_LAYER_CHANNELS:
+            for name, options in OPTIONS:
+                network = create_network(nb_steps=nb_steps, nb_channels=nb_channels, options=options)
+                x = network.to_torch(tensor=inputs, grad=False)
+                y = network.to_torch(tensor=targets, grad=False)
+                memory = activations_memory(network=network, x=x, y=y)
+                throughput = training_throughput(network=network, x=x, y=y)
+                print(f"[steps {nb_steps} | channels {nb_channels:3d} | {name:>13}] "
+                      f"activations {memory:8.1f}MB | {throughput:6.2f} samples/s")
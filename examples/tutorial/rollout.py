@@ -0,0 +1,82 @@
+# Python related imports
+from os.path import exists, join
+from typing import Dict
+from numpy import ndarray, array, zeros, stack
+from numpy.random import uniform
+from torch import Tensor, cat
+
+# DeepPhysX related imports
+from DeepPhysX.database.database_manager import DatabaseManager
+from DeepPhysX.networks.architectures.mlp import MLP
+from DeepPhysX.networks.network_manager import NetworkManager
+from DeepPhysX.networks.rollout import RolloutEngine
+
+NB_TRAJECTORIES = 64
+NB_STEPS = 200
+
+# Parameters of the spring (see simulation.py)
+SPRING_LENGTH = 1.
+DT = 0.1
+
+
+def spring_update(state: Dict[str, Tensor], prediction: Dict[str, Tensor]) -> Dict[str, Tensor]:
+    """
+    Next state of the spring from the predicted displacement: the position is given by the displacement, the velocity
+    by the finite difference of the positions and the physical parameters are unchanged.
+    """
+
+    x = SPRING_LENGTH + prediction['displacement']
+    v = (x - state['state'][:, 0:1]) / DT
+    return {'state': cat([x, v, state['state'][:, 2:]], dim=1)}
+
+
+def spring_trajectories(initial_states: ndarray) -> ndarray:
+    """
+    Ground truth trajectories of the states computed with the numerical simulation scheme (see simulation.py).
+    """
+
+    x, v = initial_states[:, 0].copy(), initial_states[:, 1].copy()
+    stiffness, mass, friction = initial_states[:, 2] * 10., initial_states[:, 3] * 10., initial_states[:, 4]
+    trajectories = []
+    for _ in range(NB_STEPS):
+        a = (-stiffness * (x - SPRING_LENGTH) - friction * v) / mass
+        v = v + a * DT
+        x = x + v * DT
+        trajectories.append(stack([x, v, *initial_states[:, 2:].T], axis=1))
+    return array(trajectories)
+
+
+if __name__ == '__main__':
+
+    if not exists(join('sessions', 'training')):
+        raise FileNotFoundError('You must run the "training.py" pipeline first.')
+
+    # Load the trained network and the normalization coefficients of its Database
+    database_manager = DatabaseManager(normalize=True)
+    database_manager.init_prediction_pipeline(session=join('sessions', 'training'))
+    network_manager = NetworkManager(network_architecture=MLP,
+                                     network_kwargs={'dim_layers': [5, 5, 5, 1],
+                                                     'out_shape': (1,)},
+                                     data_forward_fields='state',
+                                     data_backward_fields='displacement')
+    network_manager.init_prediction_pipeline(session=join('sessions', 'training'))
+    network_manager.connect_to_database(database_path=(database_manager.database_dir, 'dataset'),
+                                        normalize_data=database_manager.normalize)
+
+    # Random initial states: position, velocity, stiffness, mass and friction (see simulation.py)
+    initial_states = zeros((NB_TRAJECTORIES, 5))
+    initial_states[:, 0] = uniform(0.25 * SPRING_LENGTH, 1.75 * SPRING_LENGTH, NB_TRAJECTORIES)
+    initial_states[:, 2] = uniform(10., 50., NB_TRAJECTORIES) * 0.1
+    initial_states[:, 3] = uniform(10., 20., NB_TRAJECTORIES) * 0.1
+    initial_states[:, 4] = uniform(0., 1., NB_TRAJECTORIES)
+
+    # Launch the rollout of the network and compare with the numerical simulation
+    engine = RolloutEngine(network_manager=network_manager, state_update=spring_update)
+    engine.rollout(initial_state={'state': initial_states},
+                   nb_steps=NB_STEPS,
+                   ground_truth={'state': spring_trajectories(initial_states)})
+    print(engine)
+
+    # Close managers
+    network_manager.close()
+    database_manager.close()
@@ -108,6 +108,15 @@ class DatabaseController:
             return self.__db.get_fields(table_name=self.__current_table)
         return self.__exchange_db.get_fields(table_name='data')
 
+    def nb_lines(self, table_name: Optional[str] = None) -> int:
+        """
+        Get the number of lines of a Table.
+
+        :param table_name: Name of the Table (default is the current Table).
+        """
+
+        return self.__db.nb_lines(table_name=self.__current_table if table_name is None else table_name)
+
     @property
     def normalization(self):
 
@@ -181,14 +190,17 @@ class DatabaseController:
 
     def get_batch(self,
                   lines_id: List[int],
-                  fields: Optional[Union[str, List[str]]] = None) -> Dict[str, Any]:
+                  fields: Optional[Union[str, List[str]]] = None,
+                  table_name: Optional[str] = None) -> Dict[str, Any]:
         """
         Get lines of data from a Database.
 
         :param lines_id: Indices of the lines to get.
         :param fields: Data fields to extract.
+        :param table_name: Name of the Table to read (default is the current Table).
         """
 
-        data = self.__db.get_lines(table_name=self.__current_table, lines_id=lines_id, fields=fields, batched=True)
+        table_name = self.__current_table if table_name is None else table_name
+        data = self.__db.get_lines(table_name=table_name, lines_id=lines_id, fields=fields, batched=True)
         del data['id']
         return data
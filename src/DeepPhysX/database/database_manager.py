@@ -1,14 +1,17 @@
 from typing import Any, Dict, List, Optional
+from threading import Thread
+from queue import Queue
 from os.path import isdir, join, dirname, exists, sep, isabs, abspath
 from os import symlink, makedirs
-from numpy import arange, ndarray, array
-from numpy.random import shuffle
+from numpy import arange, ndarray, array, sqrt
+from numpy.random import shuffle, default_rng
 import json
 
 from SSD.core import Database
 
 from DeepPhysX.utils.path import copy_dir
 from DeepPhysX.utils.json_encoder import CustomJSONEncoder
+from DeepPhysX.utils.tracer import tracer
 
 
 class DatabaseManager:
@@ -58,6 +61,22 @@ class DatabaseManager:
         self.normalize: bool = normalize
         self.recompute_normalization: bool = recompute_normalization
 
+        # Batch prediction variables
+        self.__predictions: Optional[Database] = None
+
+        # Streaming variables: running statistics of the streamed fields, background writer
+        self.stream_data: bool = False
+        self.persist_data: bool = True
+        self.__running_stats: Dict[str, List[float]] = {}
+        self.__writes: Optional[Queue] = None
+        self.__writer: Optional[Thread] = None
+
+        # Data parallel variables
+        self.rank: int = 0
+        self.world_size: int = 1
+        self.__seed: Optional[int] = None
+        self.__nb_index: int = 0
+
     ################
     # Init methods #
     ################
@@ -105,15 +124,35 @@ class DatabaseManager:
     def init_training_pipeline(self,
                                session: str,
                                new_session: bool,
-                               produce_data: bool) -> None:
+                               produce_data: bool,
+                               rank: int = 0,
+                               world_size: int = 1,
+                               seed: Optional[int] = None,
+                               stream_data: bool = False,
+                               persist_data: bool = True) -> None:
         """
         Init the DatabaseManager for the training pipeline.
 
         :param session: Path to the session repository.
         :param new_session: If True, a new repository is created for the session.
         :param produce_data: If True, this session will store data in the Database.
+        :param rank: Rank of the process in a data parallel training (each rank reads its own shard of samples).
+        :param world_size: Number of processes in a data parallel training.
+        :param seed: Seed of the samples shuffle, shared by the processes of a data parallel training.
+        :param stream_data: If True, the produced samples are received in memory (see 'add_samples').
+        :param persist_data: If True, the streamed samples are written in the Database by a background thread.
         """
 
+        # Configure the sharding of the samples
+        self.rank, self.world_size, self.__seed = rank, world_size, seed
+
+        # Configure the streaming of the samples
+        self.stream_data, self.persist_data = stream_data, persist_data
+        if stream_data and persist_data:
+            self.__writes = Queue()
+            self.__writer = Thread(target=self.__write_loop, daemon=True)
+            self.__writer.start()
+
         # Create the Database
         self.database_dir = join(session, 'dataset')
         self.__db = Database(database_dir=self.database_dir, database_name='dataset')
@@ -144,7 +183,7 @@ class DatabaseManager:
         else:
 
             # Init Database repository for a new session --> link and load the existing Database directory
-            if new_session:
+            if new_session and self.rank == 0:
                 symlink(src=join(self.existing_dir, 'dataset'), dst=self.database_dir)
                 self.__load()
 
@@ -152,10 +191,11 @@ class DatabaseManager:
             else:
                 self.__load()
 
-        # Create the exchange Database
-        self.__exchange = Database(database_dir=self.database_dir, database_name='temp')
-        self.__exchange.new(remove_existing=True)
-        self.__exchange.create_table(table_name='data')
+        # Create the exchange Database (shared by the processes of a data parallel training)
+        if self.rank == 0:
+            self.__exchange = Database(database_dir=self.database_dir, database_name='temp')
+            self.__exchange.new(remove_existing=True)
+            self.__exchange.create_table(table_name='data')
 
     def init_prediction_pipeline(self, session: str) -> None:
         """
@@ -232,16 +272,18 @@ class DatabaseManager:
         self.__index_samples()
 
         # Check normalization
-        if self.normalize and self.recompute_normalization:
+        if self.normalize and self.recompute_normalization and self.rank == 0:
             self.compute_normalization()
 
     #########################
     # Json information file #
     #########################
 
-    def __init_json(self) -> None:
+    def __init_json(self, sample: Optional[Dict[str, Any]] = None) -> None:
         """
         Initialize the JSON information file.
+
+        :param sample: Streamed sample giving the shapes of the fields (read from the Database by default).
         """
 
         # Get the number of samples for each mode
@@ -254,7 +296,9 @@ class DatabaseManager:
             field_name = field.split(' ')[0]
             if field_name not in ['id', 'env_id']:
                 info = {'type': field.split(' ')[1][1:-1]}
-                if info['type'] == 'NUMPY':
+                if info['type'] == 'NUMPY' and sample is not None:
+                    info['shape'] = array(sample[field_name]).shape
+                elif info['type'] == 'NUMPY':
                     data = self.__db.get_line(table_name='Train', fields=field_name)
                     info['shape'] = data[field_name].shape
                 info['normalize'] = [0., 1.]
@@ -286,8 +330,16 @@ class DatabaseManager:
         self.sample_id = 0
 
         # Shuffle the indices if required
-        if self.shuffle:
+        if self.shuffle and self.world_size > 1:
+            # Every process shuffles the same way to get disjoint shards
+            default_rng(None if self.__seed is None else self.__seed + self.__nb_index).shuffle(self.sample_indices)
+        elif self.shuffle:
             shuffle(self.sample_indices)
+        self.__nb_index += 1
+
+        # Keep the shard of the current process
+        if self.world_size > 1:
+            self.sample_indices = self.sample_indices[self.rank::self.world_size]
 
     @__check_init
     def add_data(self, data_lines: Optional[List[int]] = None) -> None:
@@ -312,6 +364,63 @@ class DatabaseManager:
         # 1. Update the json file
         self.__update_json()
 
+    @__check_init
+    def add_samples(self, samples: List[Dict[str, Any]]) -> None:
+        """
+        Manage new samples streamed in memory: update the normalization coefficients and request their writing in the
+        Database if they are persisted.
+
+        :param samples: Streamed samples.
+        """
+
+        # 1. Init partitions information on the first sample
+        if self.first_add:
+            self.first_add = False
+            self.__db.load()
+            self.__exchange.load()
+            self.__init_json(sample=samples[0])
+        if self.persist_data:
+            self.json_content['nb_samples'][self.mode] += len(samples)
+            self.__writes.put([dict(sample) for sample in samples])
+
+        # 2. Update the normalization coefficients if required
+        if self.normalize and self.mode == 'train':
+            for field_name in self.json_content['fields'].keys():
+                data = array([sample[field_name] for sample in samples], dtype=float)
+                stats = self.__running_stats.setdefault(field_name, [0, 0., 0.])
+                stats[0], stats[1], stats[2] = stats[0] + data.size, stats[1] + data.sum(), stats[2] + (data ** 2).sum()
+                self.json_content['fields'][field_name]['normalize'] = [data.mean(), data.std()]
+
+        # 3. Update the json file
+        self.__update_json()
+
+    def __write_loop(self) -> None:
+        """
+        Write the streamed samples in the Database until the manager is closed.
+        """
+
+        db = None
+        while (samples := self.__writes.get()) is not None:
+            try:
+                db = Database(database_dir=self.database_dir, database_name='dataset').load() if db is None else db
+                db.add_batch(table_name='train', batch={field: [sample[field] for sample in samples]
+                                                        for field in samples[0].keys()})
+            except Exception as exception:
+                print(f"[{self.__class__.__name__}] Cannot write {len(samples)} streamed samples: {exception}")
+            finally:
+                self.__writes.task_done()
+        if db is not None:
+            db.close()
+        self.__writes.task_done()
+
+    def wait_writes(self) -> None:
+        """
+        Wait for the streamed samples to be written in the Database.
+        """
+
+        if self.__writes is not None:
+            self.__writes.join()
+
     @__check_init
     def get_data(self, batch_size: int) -> List[int]:
         """
@@ -320,14 +429,19 @@ class DatabaseManager:
         :param batch_size: Number of sample in a single batch.
         """
 
-        # 1. Check if dataset is loaded and if the current sample is not the last
-        if self.sample_id >= len(self.sample_indices):
-            self.__index_samples()
+        # 0. The streamed samples must be written before to be read
+        self.wait_writes()
 
-        # 2. Update dataset index and get a batch of data
-        idx = self.sample_id
-        self.sample_id += batch_size
-        lines = self.sample_indices[idx:self.sample_id].tolist()
+        with tracer.span('sampler'):
+
+            # 1. Check if dataset is loaded and if the current sample is not the last
+            if self.sample_id >= len(self.sample_indices):
+                self.__index_samples()
+
+            # 2. Update dataset index and get a batch of data
+            idx = self.sample_id
+            self.sample_id += batch_size
+            lines = self.sample_indices[idx:self.sample_id].tolist()
 
         # 3. Ensure the batch has the good size
         if len(lines) < batch_size:
@@ -335,6 +449,67 @@ class DatabaseManager:
 
         return lines
 
+    @__check_init
+    def nb_lines(self) -> int:
+        """
+        Get the number of samples in the Table of the current mode.
+        """
+
+        return self.__db.nb_lines(table_name=self.mode)
+
+    @__check_init
+    def get_lines(self,
+                  lines_id: List[int],
+                  fields: List[str]) -> Dict[str, ndarray]:
+        """
+        Read a batch of samples in the Table of the current mode.
+
+        :param lines_id: Indices of the samples.
+        :param fields: Data fields to read.
+        """
+
+        data = self.__db.get_lines(table_name=self.mode, lines_id=lines_id, fields=fields, batched=True)
+        return {field: array(data[field]) for field in fields}
+
+    @__check_init
+    def add_predictions(self,
+                        lines_id: List[int],
+                        data: Dict[str, ndarray],
+                        database_name: Optional[str] = 'predictions') -> None:
+        """
+        Write a batch of predictions of the samples of the Table of the current mode.
+
+        :param lines_id: Indices of the predicted samples.
+        :param data: Batched fields to write (the first dimension is the batch dimension).
+        :param database_name: If set, the predictions are added in bulk to a separate Database of the repository,
+                              along with the indices of the samples. Otherwise, the fields are created in the Table
+                              of the samples and the lines are updated.
+        """
+
+        # Case 1: Separate Database --> create it on the first batch, then add the batches in bulk
+        if database_name is not None:
+            if self.__predictions is None:
+                self.__predictions = Database(database_dir=self.database_dir, database_name=database_name)
+                self.__predictions.new(remove_existing=True)
+                self.__predictions.create_table(table_name=self.mode, fields=[('line_id', int)] + [
+                    (field, ndarray if value.ndim > 1 else float) for field, value in data.items()])
+            with tracer.span('db_write'):
+                self.__predictions.add_batch(table_name=self.mode,
+                                             batch={'line_id': list(lines_id),
+                                                    **{field: list(value) for field, value in data.items()}})
+
+        # Case 2: New fields of the Table --> create them on the first batch, then update each line
+        else:
+            existing_fields = self.__db.get_fields(table_name=self.mode)
+            if new_fields := [field for field in data if field not in existing_fields]:
+                self.__db.create_fields(table_name=self.mode,
+                                        fields=[(field, ndarray if data[field].ndim > 1 else float)
+                                                for field in new_fields])
+            with tracer.span('db_write'):
+                for i, line_id in enumerate(lines_id):
+                    self.__db.update(table_name=self.mode, data={field: value[i] for field, value in data.items()},
+                                     line_id=line_id)
+
     def change_mode(self, mode: str) -> None:
         """
         Change the current Database mode.
@@ -353,6 +528,14 @@ class DatabaseManager:
         Compute the mean and the standard deviation of all the training samples for each data field.
         """
 
+        # Streaming mode: use the running statistics of the streamed samples
+        if self.stream_data:
+            for field_name, (count, total, squares) in self.__running_stats.items():
+                mean = total / count
+                self.json_content['fields'][field_name]['normalize'] = [mean, sqrt(max(squares / count - mean ** 2, 0.))]
+            self.__update_json()
+            return
+
         # Get the normalization coefficient for each data field
         for field_name in self.json_content['fields'].keys():
 
@@ -397,13 +580,26 @@ class DatabaseManager:
         if self.normalize and self.pipeline == 'data':
             self.compute_normalization()
 
+        # Write the remaining streamed samples
+        if self.__writer is not None:
+            self.__writes.put(None)
+            self.__writer.join()
+            self.__writer = None
+
         # Close Database partitions
         self.__db.close()
-        self.__exchange.close(erase_file=True)
+        if self.__predictions is not None:
+            self.__predictions.close()
+        if self.__exchange is not None:
+            self.__exchange.close(erase_file=True)
 
     def __str__(self):
 
         desc = "\n"
         desc += f"# DATABASE MANAGER\n"
         desc += f"    Dataset Repository: {self.database_dir}\n"
+        if self.stream_data:
+            desc += f"    Streamed samples: {'persisted in background' if self.persist_data else 'not persisted'}\n"
+        if self.world_size > 1:
+            desc += f"    Data parallel shards: {self.world_size}\n"
         return desc
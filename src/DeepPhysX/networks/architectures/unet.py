@@ -1,8 +1,11 @@
-from typing import List, Tuple, Union, Any, Optional
-from torch import Tensor, zeros_like, cat
+from typing import List, Tuple, Union, Any, Optional, Iterator
+from contextlib import contextmanager, nullcontext
+from torch import Tensor, zeros_like, cat, is_grad_enabled, no_grad, channels_last_3d, channels_last as channels_last_2d
 from torch.nn import Module, Conv2d, Conv3d, BatchNorm2d, BatchNorm3d, ReLU, Sequential, MaxPool2d, MaxPool3d, \
     ConvTranspose2d, ConvTranspose3d
 from torch.nn.functional import pad
+from torch.utils.checkpoint import checkpoint
+from torch.ao.quantization import QuantStub, DeQuantStub, fuse_modules, fuse_modules_qat
 from numpy import asarray
 
 
@@ -18,7 +21,9 @@ class UNet(Module):
                  nb_steps: int = 3,
                  two_sublayers: bool = True,
                  border_mode: str = 'valid',
-                 skip_merge: bool = False):
+                 skip_merge: bool = False,
+                 checkpoint_levels: Optional[List[int]] = None,
+                 channels_last: bool = False):
         """
         Create a UNet network architecture.
 
@@ -31,6 +36,10 @@ class UNet(Module):
         :param two_sublayers: If True, duplicate each layer.
         :param border_mode: Padding mode.
         :param skip_merge: If True, skip the crop step at each up layer.
+        :param checkpoint_levels: Levels (0 for the full resolution to nb_steps for the bottleneck) whose down and up
+                                  layers do not store their intermediate activations during training: they are
+                                  recomputed in the backward pass.
+        :param channels_last: If True, the convolutions run in the channels last memory format.
         """
 
         Module.__init__(self)
@@ -83,14 +92,33 @@ class UNet(Module):
                                                                         out_channels=nb_output_channels,
                                                                         kernel_size=final_kernel_size)
 
+        # Activation checkpointing of the selected levels
+        self.checkpoint_levels: List[int] = [] if checkpoint_levels is None else sorted(set(checkpoint_levels))
+        for level in self.checkpoint_levels:
+            if not 0 <= level <= nb_steps:
+                raise ValueError(f"[UNet] Checkpoint level {level} is not in [0, {nb_steps}].")
+            self.down[level].checkpoint = True
+            if level < nb_steps:
+                self.up[nb_steps - 1 - level][1].checkpoint = True
+
+        # Quantization entry and exit points (identity operations until the network is prepared for quantization)
+        self.quant: QuantStub = QuantStub()
+        self.dequant: DeQuantStub = DeQuantStub()
+
         # Data transform config
         self.input_size: List[int] = [int(s) for s in input_size]
         self.flatten_output: bool = flatten_output
         self.nb_steps: int = nb_steps
         self.nb_output_channels: int = nb_output_channels
         self.nb_input_channels: int = nb_input_channels
-        self.pad_widths: Optional[List[int]] = None
-        self.inverse_pad_widths: Optional[List[int]] = None
+        self.pad_widths: Optional[Tuple[int, ...]] = None
+        self.output_shape: Tuple[int, ...] = tuple(self.input_size[::-1])
+
+        # Memory format of the convolutions
+        self.memory_format = None
+        if channels_last:
+            self.memory_format = channels_last_2d if nb_dims == 2 else channels_last_3d
+            self.to(memory_format=self.memory_format)
 
         # Define shape transformations
         border = 4 if two_sublayers else 2
@@ -99,6 +127,8 @@ class UNet(Module):
         self.reverse_down_step = lambda x: (x + border) * 2
         self.reverse_up_step = lambda x: (x + border - 1) // 2 + 1
 
+        # Define the padding of the grid (the input tensor is viewed as [batch, z, y, x, channels])
+        self.compute_pad_widths(desired_shape=self.input_size[::-1])
 
     def forward(self, input_data: Tensor) -> Tensor:
         """
@@ -108,7 +138,7 @@ class UNet(Module):
         """
 
         # TRANSFORM BEFORE PREDICTION
-        input_data = self.transform_before_prediction(data=input_data)
+        input_data = self.quant(self.transform_before_prediction(data=input_data))
 
         # Process down layers. Keep the outputs at each 'down' step to merge at same 'up' level.
         down_outputs = [self.down[0](input_data)]
@@ -121,47 +151,67 @@ class UNet(Module):
             same_level_down_output = zeros_like(down_output) if self.skip_merge else down_output
             x = unet_layer(crop_and_merge(same_level_down_output, up_conv_layer(x)))
 
-        pred = self.finalLayer(x)
+        pred = self.dequant(self.finalLayer(x))
 
         # TRANSFORMS AFTER PREDICTION
         pred = self.transform_after_prediction(data=pred)
 
         return pred
 
+    def fuse_model(self, qat: bool = False) -> None:
+        """
+        Fuse the convolution, normalization and activation sequences of each UNet layer before a static quantization
+        (in eval mode) or a quantization aware training (in train mode).
+
+        :param qat: If True, fuse the modules for a quantization aware training.
+        """
+
+        for layer in [*self.down, *[unet_layer for _, unet_layer in self.up]]:
+            layer.fuse_modules(qat=qat)
+
     def transform_before_prediction(self, data: Tensor) -> Tensor:
         """
         Transform operations to apply before the forward pass.
+        The grid is viewed in the channels first layout without copy, the padding is the only copy of the data.
         """
 
         # Transform tensor shape
         data = data.view((-1, self.input_size[2], self.input_size[1], self.input_size[0], self.nb_input_channels))
         data = data.permute((0, 4, 1, 2, 3))
 
-        # Compute padding
-        if self.pad_widths is None:
-            transformed_shape = data[0].shape[1:]
-            self.compute_pad_widths(transformed_shape)
-
         # Apply padding
-        data = pad(data, self.pad_widths, mode='constant')
+        if self.pad_widths is not None:
+            data = pad(data, self.pad_widths, mode='constant')
+        if self.memory_format is not None:
+            data = data.contiguous(memory_format=self.memory_format)
         return data
 
     def transform_after_prediction(self, data: Tensor) -> Tensor:
         """
         Transform operations to apply before the backward pass.
+        The output is cropped to the data shape and the layout is permuted without copy, the final reshape only copies
+        the data if the channels are not already the last dimension in memory.
         """
 
-        data = pad(data, self.inverse_pad_widths)
+        # Crop the output from its real shape ('valid' mode shrinks the padded grid)
+        shape = tuple(data.shape[2:])
+        if shape != self.output_shape:
+            if any(s < d for s, d in zip(shape, self.output_shape)):
+                raise ValueError(f"[{self.__class__.__name__}] The output grid {shape} is smaller than the data grid "
+                                 f"{self.output_shape}.")
+            data = data[(slice(None), slice(None), *crop_slices(shape, self.output_shape))]
         data = data.permute(0, 2, 3, 4, 1)
         if self.flatten_output:
-            data = data.view((-1, self.input_size[0] *self.input_size[1] * self.input_size[2], self.nb_output_channels))
-        else:
-            data = data.view((-1, self.input_size[0], self.input_size[1], self.input_size[2], self.nb_output_channels))
-        return data
+            return data.reshape((data.shape[0], self.input_size[0] * self.input_size[1] * self.input_size[2],
+                                 self.nb_output_channels))
+        return data.reshape((data.shape[0], self.input_size[0], self.input_size[1], self.input_size[2],
+                             self.nb_output_channels))
 
     def compute_pad_widths(self, desired_shape: List[int]) -> None:
         """
         Define padding to apply on data given the data shape and the networks architectures.
+        No padding is applied if the data shape is already compatible with the architecture (e.g. in 'same' border
+        mode with dimensions divisible by 2 ** nb_steps).
 
         :param desired_shape: Data shape without padding.
         """
@@ -176,11 +226,12 @@ class UNet(Module):
 
         # Compute padding width between shapes
         pad_widths = [((m - d) // 2, (m - d - 1) // 2 + 1) for m, d in zip(minimal_shape, desired_shape)]
-        pad_widths.reverse()    # PyTorch applies padding from last dimension
-        self.pad_widths, self.inverse_pad_widths = (), ()
-        for p in pad_widths:
-            self.pad_widths += p
-            self.inverse_pad_widths += (-p[0], -p[1])   # PyTorch accepts negative padding
+        if not any(p for widths in pad_widths for p in widths):
+            self.pad_widths = None
+            return
+
+        # Padding from the last dimension for PyTorch
+        self.pad_widths = tuple(int(p) for widths in pad_widths[::-1] for p in widths)
 
 
 class UNetLayer(Module):
@@ -229,6 +280,17 @@ class UNetLayer(Module):
 
         # Set the unet layer
         self.unet_layer = Sequential(*layers)
+        self.checkpoint: bool = False
+
+    def fuse_modules(self, qat: bool = False) -> None:
+        """
+        Fuse each sequence of convolution, normalization and activation of the layer.
+
+        :param qat: If True, fuse the modules for a quantization aware training.
+        """
+
+        groups = [[str(i), str(i + 1), str(i + 2)] for i in range(0, len(self.unet_layer), 3)]
+        (fuse_modules_qat if qat else fuse_modules)(self.unet_layer, groups, inplace=True)
 
     def forward(self, input_data: Tensor) -> Tensor:
         """
@@ -237,8 +299,27 @@ class UNetLayer(Module):
         :param input_data: Input tensor.
         """
 
+        # Recompute the intermediate activations in the backward pass
+        if self.checkpoint and self.training and is_grad_enabled():
+            return checkpoint(self.unet_layer, input_data, use_reentrant=False,
+                              context_fn=lambda: (nullcontext(), self.__frozen_statistics()))
         return self.unet_layer(input_data)
 
+    @contextmanager
+    def __frozen_statistics(self) -> Iterator[None]:
+        """
+        Restore the running statistics of the normalization layers after the recomputation of the activations, so
+        that they are updated once per training step.
+        """
+
+        buffers = [(buffer, buffer.clone()) for buffer in self.unet_layer.buffers()]
+        try:
+            yield
+        finally:
+            with no_grad():
+                for buffer, value in buffers:
+                    buffer.copy_(value)
+
 
 class EncoderDecoder:
 
@@ -0,0 +1,138 @@
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+from threading import Condition, Thread
+from collections import deque
+from time import time
+from numpy import percentile
+
+
+class AsyncPredictor:
+
+    def __init__(self,
+                 predict_fnc: Callable[[Any], Any],
+                 history_size: int = 10000):
+        """
+        AsyncPredictor computes the predictions in a worker thread so that the simulation never waits for the network.
+        The simulation submits its inputs at each frame and applies the latest completed prediction: a request that is
+        replaced by a newer one before the worker started it is dropped.
+
+        :param predict_fnc: Function computing the output of a request.
+        :param history_size: Number of latencies kept to compute the percentiles.
+        """
+
+        self.__predict_fnc: Callable[[Any], Any] = predict_fnc
+
+        # Single slot for the pending request and the latest completed output
+        self.__condition: Condition = Condition()
+        self.__pending: Optional[Tuple[float, Any]] = None
+        self.__output: Optional[Any] = None
+        self.__error: Optional[Exception] = None
+        self.__running: bool = True
+
+        # Statistics
+        self.nb_submitted: int = 0
+        self.nb_computed: int = 0
+        self.nb_dropped: int = 0
+        self.nb_applied: int = 0
+        self.nb_stale_frames: int = 0
+        self.__latencies: Deque[float] = deque(maxlen=history_size)
+
+        self.__worker: Thread = Thread(target=self.__work, daemon=True)
+        self.__worker.start()
+
+    def submit(self, request: Any) -> None:
+        """
+        Submit a prediction request without waiting for its output. A pending request not started yet is dropped.
+
+        :param request: The request to compute.
+        """
+
+        with self.__condition:
+            if self.__pending is not None:
+                self.nb_dropped += 1
+            self.__pending = (time(), request)
+            self.nb_submitted += 1
+            self.__condition.notify_all()
+
+    def latest(self) -> Optional[Any]:
+        """
+        Get the latest completed prediction if it was not returned yet, None otherwise (stale frame).
+        """
+
+        with self.__condition:
+            if self.__error is not None:
+                error, self.__error = self.__error, None
+                raise error
+            output, self.__output = self.__output, None
+            if output is None:
+                self.nb_stale_frames += 1
+            else:
+                self.nb_applied += 1
+            return output
+
+    def __work(self) -> None:
+        """
+        Compute the pending requests until the predictor is closed.
+        """
+
+        while True:
+            with self.__condition:
+                while self.__pending is None and self.__running:
+                    self.__condition.wait()
+                if not self.__running:
+                    return
+                (submit_time, request), self.__pending = self.__pending, None
+
+            # Compute the request outside the lock
+            try:
+                output, error = self.__predict_fnc(request), None
+            except Exception as exception:
+                output, error = None, exception
+
+            with self.__condition:
+                if error is None:
+                    self.__output = output
+                    self.nb_computed += 1
+                    self.__latencies.append(time() - submit_time)
+                else:
+                    self.__error = error
+
+    def close(self) -> None:
+        """
+        Stop the worker thread. The pending request is discarded.
+        """
+
+        with self.__condition:
+            self.__running = False
+            self.__condition.notify_all()
+        self.__worker.join()
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Get the statistics of the predictor: number of submitted, computed, dropped and applied predictions, rate of
+        dropped requests, number of frames without a new prediction and latencies percentiles (s).
+        """
+
+        with self.__condition:
+            latencies = list(self.__latencies)
+            summary = {'nb_submitted': self.nb_submitted,
+                       'nb_computed': self.nb_computed,
+                       'nb_dropped': self.nb_dropped,
+                       'nb_applied': self.nb_applied,
+                       'drop_rate': self.nb_dropped / max(self.nb_submitted, 1),
+                       'nb_stale_frames': self.nb_stale_frames}
+        for p in (50, 90, 99):
+            summary[f'latency_p{p}'] = float(percentile(latencies, p)) if len(latencies) > 0 else 0.
+        return summary
+
+    def __str__(self) -> str:
+
+        summary = self.summary()
+        description = "\n"
+        description += f"# {self.__class__.__name__}\n"
+        description += f"    Requests: {summary['nb_submitted']} submitted, {summary['nb_computed']} computed, " \
+                       f"{summary['nb_applied']} applied\n"
+        description += f"    Dropped requests: {summary['nb_dropped']} ({summary['drop_rate'] * 100:.1f}%)\n"
+        description += f"    Frames without new prediction: {summary['nb_stale_frames']}\n"
+        description += f"    Latency: {summary['latency_p50'] * 1e3:.2f}ms (p50), " \
+                       f"{summary['latency_p90'] * 1e3:.2f}ms (p90), {summary['latency_p99'] * 1e3:.2f}ms (p99)\n"
+        return description
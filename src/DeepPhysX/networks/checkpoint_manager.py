@@ -0,0 +1,182 @@
+from typing import Any, Dict, List, Optional
+from os import listdir, remove, replace
+from os.path import join, isfile
+from threading import Thread
+from queue import Queue
+from time import time
+from re import split
+import json
+
+from torch import save, Tensor
+
+
+class CheckpointManager:
+
+    def __init__(self,
+                 network_dir: str,
+                 keep_last: int = 1,
+                 keep_best: int = 0,
+                 asynchronous: bool = True):
+        """
+        CheckpointManager stores the states of parameters of a Network and lists them in a JSON manifest.
+        The states are copied when a save is requested and written to files by a background thread, so that the
+        training loop is never stalled by the storage.
+        The final state and the intermediate states are always kept, the backup states are removed except the
+        'keep_last' most recent ones and the 'keep_best' ones with the lowest loss values.
+
+        :param network_dir: Path to the network repository.
+        :param keep_last: Number of the most recent backup states to keep.
+        :param keep_best: Number of the backup states with the lowest loss values to keep.
+        :param asynchronous: If True, the files are written by a background thread.
+        """
+
+        self.network_dir: str = network_dir
+        self.manifest_file: str = join(network_dir, 'manifest.json')
+        self.keep_last: int = keep_last
+        self.keep_best: int = keep_best
+        self.asynchronous: bool = asynchronous
+
+        # Load the existing manifest (removed files are ignored)
+        self.__checkpoints: List[Dict[str, Any]] = []
+        if isfile(self.manifest_file):
+            with open(self.manifest_file) as file:
+                self.__checkpoints = [checkpoint for checkpoint in json.load(file)['checkpoints']
+                                      if isfile(join(network_dir, checkpoint['file']))]
+
+        # Background writer
+        self.__queue: Queue = Queue()
+        self.__writer: Optional[Thread] = None
+        if asynchronous:
+            self.__writer = Thread(target=self.__write_loop, daemon=True)
+            self.__writer.start()
+
+    def save(self,
+             state_dict: Dict[str, Any],
+             file: str,
+             kind: str = 'backup',
+             epoch: Optional[int] = None,
+             loss: Optional[float] = None) -> None:
+        """
+        Request the save of a state of parameters.
+
+        :param state_dict: State of parameters of the network (copied before returning).
+        :param file: Name of the file in the network repository.
+        :param kind: Either 'final', 'intermediate' or 'backup' (only the backup states are subject to retention).
+        :param epoch: Training epoch of the state.
+        :param loss: Loss value of the state.
+        """
+
+        # Copy the state on CPU so that the training can modify the parameters
+        snapshot = {key: value.detach().to('cpu', copy=True) if isinstance(value, Tensor) else value
+                    for key, value in state_dict.items()}
+        checkpoint = {'file': file, 'kind': kind, 'epoch': epoch, 'loss': None if loss is None else float(loss),
+                      'time': time()}
+        if self.asynchronous:
+            self.__queue.put((snapshot, checkpoint))
+        else:
+            self.__write(snapshot=snapshot, checkpoint=checkpoint)
+
+    def files(self) -> List[str]:
+        """
+        Get the saved files from the oldest to the most recent. Without manifest, the '.pth' files of the repository
+        are listed in natural order (network_2 before network_10).
+        """
+
+        self.wait()
+        if len(self.__checkpoints) > 0:
+            return [join(self.network_dir, checkpoint['file']) for checkpoint in self.__checkpoints]
+        return sorted([join(self.network_dir, f) for f in listdir(self.network_dir)
+                       if isfile(join(self.network_dir, f)) and f.endswith('.pth')], key=natural_key)
+
+    def best_file(self) -> Optional[str]:
+        """
+        Get the saved file with the lowest loss value.
+        """
+
+        self.wait()
+        checkpoints = [checkpoint for checkpoint in self.__checkpoints if checkpoint['loss'] is not None]
+        if len(checkpoints) == 0:
+            return None
+        return join(self.network_dir, min(checkpoints, key=lambda checkpoint: checkpoint['loss'])['file'])
+
+    def wait(self) -> None:
+        """
+        Wait for the pending saves to be written.
+        """
+
+        if self.asynchronous:
+            self.__queue.join()
+
+    def close(self) -> None:
+        """
+        Write the pending saves and stop the background writer.
+        """
+
+        if self.__writer is not None:
+            self.__queue.put(None)
+            self.__writer.join()
+            self.__writer = None
+            self.asynchronous = False
+
+    def __write_loop(self) -> None:
+        """
+        Write the requested saves until the manager is closed.
+        """
+
+        while (request := self.__queue.get()) is not None:
+            try:
+                self.__write(*request)
+            except Exception as exception:
+                print(f"[{self.__class__.__name__}] Cannot save {request[1]['file']}: {exception}")
+            finally:
+                self.__queue.task_done()
+        self.__queue.task_done()
+
+    def __write(self,
+                snapshot: Dict[str, Any],
+                checkpoint: Dict[str, Any]) -> None:
+        """
+        Write a state of parameters, update the manifest and apply the retention policy.
+
+        :param snapshot: Copy of the state of parameters.
+        :param checkpoint: Description of the state in the manifest.
+        """
+
+        # Write the file then move it so that a file is never partially written
+        path = join(self.network_dir, checkpoint['file'])
+        save(obj=snapshot, f=f'{path}.tmp')
+        replace(f'{path}.tmp', path)
+        self.__checkpoints = [c for c in self.__checkpoints if c['file'] != checkpoint['file']] + [checkpoint]
+
+        # Remove the backup states that are neither recent nor best
+        backups = [c for c in self.__checkpoints if c['kind'] == 'backup']
+        kept = backups[len(backups) - self.keep_last:] if self.keep_last > 0 else []
+        kept += sorted([c for c in backups if c['loss'] is not None],
+                       key=lambda c: c['loss'])[:self.keep_best]
+        for c in [c for c in backups if c not in kept]:
+            if isfile(removed := join(self.network_dir, c['file'])):
+                remove(removed)
+            self.__checkpoints.remove(c)
+
+        # Update the manifest
+        with open(f'{self.manifest_file}.tmp', 'w') as file:
+            json.dump({'checkpoints': self.__checkpoints}, file, indent=3)
+        replace(f'{self.manifest_file}.tmp', self.manifest_file)
+
+    def __str__(self) -> str:
+
+        description = "\n"
+        description += f"# {self.__class__.__name__}\n"
+        description += f"    Asynchronous saves: {self.asynchronous}\n"
+        description += f"    Backups retention: last {self.keep_last}, best {self.keep_best}\n"
+        return description
+
+
+def natural_key(text: str) -> List[Any]:
+    """
+    Sorting key comparing the numbers of a text by value.
+
+    :param text: Text to compare.
+    """
+
+    return [int(token) if token.isdigit() else token for token in split(r'(\d+)', text)]
@@ -0,0 +1,2 @@
+from DeepPhysX.networks.metrics.sinks import MetricsSink, TensorboardSink, CSVSink, BinarySink, MetricsBuffer, \
+    read_binary_metrics
@@ -0,0 +1,204 @@
+from typing import Dict, List, Optional, Tuple
+from os.path import isfile
+from collections import deque
+from threading import Thread, Event
+from time import time
+import json
+
+from numpy import array, dtype, fromfile, ndarray
+
+# A metric record: (tag, value, step, timestamp)
+Record = Tuple[str, float, int, float]
+
+
+class MetricsSink:
+
+    def write(self, records: List[Record]) -> None:
+        """
+        Store a list of metric records.
+
+        :param records: List of (tag, value, step, timestamp) records.
+        """
+
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """
+        Launch the closing procedure of the sink.
+        """
+
+        pass
+
+
+class TensorboardSink(MetricsSink):
+
+    def __init__(self, log_dir: str):
+        """
+        Write the metric records as scalars of a Tensorboard event file.
+
+        :param log_dir: Path to the Tensorboard logs repository.
+        """
+
+        from torch.utils.tensorboard import SummaryWriter
+        self.writer = SummaryWriter(log_dir)
+
+    def write(self, records: List[Record]) -> None:
+
+        for tag, value, step, timestamp in records:
+            self.writer.add_scalar(tag, value, step, walltime=timestamp)
+        self.writer.flush()
+
+    def close(self) -> None:
+
+        self.writer.close()
+
+
+class CSVSink(MetricsSink):
+
+    def __init__(self, file: str):
+        """
+        Append the metric records to a CSV file with the columns tag, step, value and timestamp.
+
+        :param file: Path to the CSV file.
+        """
+
+        self.file: str = file
+        if not isfile(file):
+            with open(file, 'w') as f:
+                f.write('tag,step,value,time\n')
+
+    def write(self, records: List[Record]) -> None:
+
+        with open(self.file, 'a') as f:
+            f.writelines(f'{tag},{step},{value},{timestamp}\n' for tag, value, step, timestamp in records)
+
+
+class BinarySink(MetricsSink):
+
+    # Fixed size binary record: index of the tag, step, value, timestamp
+    record_type = dtype([('tag', '<u2'), ('step', '<i8'), ('value', '<f8'), ('time', '<f8')])
+
+    def __init__(self, file: str):
+        """
+        Append the metric records to a binary file of fixed size records. The tags are listed in a JSON file next to
+        the binary file (see 'read_binary_metrics').
+
+        :param file: Path to the binary file.
+        """
+
+        self.file: str = file
+        self.tags: Dict[str, int] = {}
+        if isfile(f'{file}.json'):
+            with open(f'{file}.json') as f:
+                self.tags = {tag: i for i, tag in enumerate(json.load(f))}
+
+    def write(self, records: List[Record]) -> None:
+
+        # Register the new tags
+        nb_tags = len(self.tags)
+        for tag, _, _, _ in records:
+            if tag not in self.tags:
+                self.tags[tag] = len(self.tags)
+        if len(self.tags) > nb_tags:
+            with open(f'{self.file}.json', 'w') as f:
+                json.dump(list(self.tags), f)
+
+        # Append the records
+        data = array([(self.tags[tag], step, value, timestamp) for tag, value, step, timestamp in records],
+                     dtype=self.record_type)
+        with open(self.file, 'ab') as f:
+            data.tofile(f)
+
+
+def read_binary_metrics(file: str) -> Dict[str, ndarray]:
+    """
+    Read the metric records of a BinarySink.
+
+    :param file: Path to the binary file.
+    :return: Dict of tags containing the records of each tag (with the 'step', 'value' and 'time' fields).
+    """
+
+    with open(f'{file}.json') as f:
+        tags = json.load(f)
+    data = fromfile(file, dtype=BinarySink.record_type)
+    return {tag: data[data['tag'] == i][['step', 'value', 'time']] for i, tag in enumerate(tags)}
+
+
+class MetricsBuffer:
+
+    def __init__(self,
+                 sinks: List[MetricsSink],
+                 capacity: int = 65536,
+                 flush_interval: float = 1.):
+        """
+        MetricsBuffer stores the metric records in an in-memory ring buffer, a background thread periodically flushes
+        them to the sinks so that recording a metric only costs an append.
+
+        :param sinks: Sinks receiving the records.
+        :param capacity: Maximum number of records in the buffer (the oldest records are dropped when full).
+        :param flush_interval: Time (in seconds) between two flushes.
+        """
+
+        self.sinks: List[MetricsSink] = sinks
+        self.capacity: int = capacity
+        self.flush_interval: float = flush_interval
+        self.nb_dropped: int = 0
+
+        # Ring buffer and flushing thread
+        self.__records: deque = deque(maxlen=capacity)
+        self.__stop: Event = Event()
+        self.__flusher: Optional[Thread] = Thread(target=self.__flush_loop, daemon=True)
+        self.__flusher.start()
+
+    def add(self, tag: str, value: float, step: int) -> None:
+        """
+        Record a metric.
+
+        :param tag: Name of the metric.
+        :param value: Value of the metric.
+        :param step: ID of the value.
+        """
+
+        if len(self.__records) == self.capacity:
+            self.nb_dropped += 1
+        self.__records.append((tag, float(value), step, time()))
+
+    def flush(self) -> None:
+        """
+        Write the buffered records to the sinks.
+        """
+
+        records = []
+        while self.__records:
+            records.append(self.__records.popleft())
+        if len(records) > 0:
+            for sink in self.sinks:
+                # A failing sink must not stop the other sinks nor the flusher
+                try:
+                    sink.write(records)
+                except Exception as exception:
+                    print(f"[{self.__class__.__name__}] Cannot write {len(records)} records to "
+                          f"{sink.__class__.__name__}: {exception}")
+
+    def __flush_loop(self) -> None:
+        """
+        Flush the records periodically until the buffer is closed.
+        """
+
+        while not self.__stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self) -> None:
+        """
+        Flush the remaining records and close the sinks.
+        """
+
+        if self.__flusher is not None:
+            self.__stop.set()
+            self.__flusher.join()
+            self.__flusher = None
+            self.flush()
+            for sink in self.sinks:
+                sink.close()
+            if self.nb_dropped > 0:
+                print(f"[{self.__class__.__name__}] {self.nb_dropped} records were dropped (buffer full).")
@@ -1,10 +1,17 @@
-from typing import Dict, Any, Type
+from typing import Dict, Any, Type, List, Tuple, Optional, Callable
 from os import cpu_count
+from os.path import isfile, getmtime, splitext
 from numpy import ndarray
-from torch import device, set_num_threads, load, save, as_tensor, dtype, Tensor
-from torch.nn import Module
+from torch import device, set_num_threads, load, save, as_tensor, dtype, Tensor, tensor, empty, from_numpy, \
+    addcmul, inference_mode, no_grad, allclose, jit, autocast, qint8
+from torch.nn import Module, Linear
+from torch.nn.parallel import DistributedDataParallel
+from torch.ao.quantization import quantize_dynamic
 from torch.cuda import is_available, empty_cache
 from gc import collect as gc_collect
+from io import BytesIO
+from contextlib import nullcontext
+import torch
 
 
 class NetworkController:
@@ -12,20 +19,37 @@ class NetworkController:
     def __init__(self,
                  network_architecture: Type[Module],
                  network_kwargs: Dict[str, Any],
-                 data_type: dtype):
+                 data_type: dtype,
+                 autocast_type: Optional[dtype] = None):
         """
         NetworkController allows components to interact with the neural network architecture.
 
         :param network_architecture: The neural network architecture.
         :param network_kwargs: Dict of kwargs to create an instance of the neural network architecture.
         :param data_type: Set the Torch default data type.
+        :param autocast_type: If set, the forward passes run in mixed precision with this data type (the parameters
+                              remain in the default data type).
         """
 
         self.__network: Module = network_architecture(**network_kwargs)
+        self.__parallel_network: Optional[DistributedDataParallel] = None
         self.__device = None
         self.data_type: dtype = data_type
+        self.autocast_type: Optional[dtype] = autocast_type
         self.__is_ready: bool = False
         self.__is_training: bool = False
+        self.is_quantized: bool = False
+
+        # Inference variables
+        self.__normalization: Dict[Tuple[str, int], Tuple[Tuple[float, float], Tuple[Tensor, Tensor]]] = {}
+        self.__input_buffers: Dict[Tuple[int, Tuple[int, ...]], Tensor] = {}
+        self.__output_buffers: Dict[Tuple[int, Tuple[int, ...]], Tensor] = {}
+
+        # Compiled backend variables
+        self.backend: str = 'eager'
+        self.__compiled: Dict[Tuple[Tuple[int, ...], ...], Optional[Callable]] = {}
+        self.__cache_file: Optional[str] = None
+        self.__weights_time: float = 0.
 
     def predict(self, *args):
         """
@@ -34,8 +58,237 @@ class NetworkController:
         :param args: Data fields to fill the forward function.
         """
 
+        network = self.__network if self.__parallel_network is None else self.__parallel_network
+        with self.autocast():
+            return network.forward(*args)
+
+    def autocast(self) -> autocast:
+        """
+        Get the mixed precision context of the forward passes (disabled if no autocast data type is set).
+        """
+
+        device_type = 'cpu' if self.__device is None else self.__device.type
+        return autocast(device_type=device_type, dtype=self.autocast_type, enabled=self.autocast_type is not None)
+
+    def infer(self,
+              inputs: List[ndarray],
+              input_normalization: List[Optional[List[float]]],
+              output_normalization: List[Optional[List[float]]]) -> List[ndarray]:
+        """
+        Compute a prediction from numpy arrays without recording gradients. The normalization coefficients are kept as
+        device tensors and the input / output tensors are reused between calls with the same shapes.
+        The returned arrays are views on the output tensors: they are only valid until the next call.
+
+        :param inputs: Batched data fields to fill the forward function.
+        :param input_normalization: Normalization coefficients of each input field (None for no normalization).
+        :param output_normalization: Normalization coefficients of each output field (None for no normalization).
+        """
+
+        with inference_mode(), self.autocast():
+
+            # Fill the input buffers and normalize them in-place
+            args = []
+            for i, (data, normalization) in enumerate(zip(inputs, input_normalization)):
+                buffer = self.__get_buffer(buffers=self.__input_buffers, idx=i, shape=data.shape)
+                buffer.copy_(from_numpy(data))
+                if normalization is not None:
+                    mean, std = self.__get_normalization(normalization=normalization, key=('input', i))
+                    buffer.sub_(mean).div_(std)
+                args.append(buffer)
+
+            # Compute the prediction
+            net_predict = self.__forward(*args)
+            net_predict = net_predict if isinstance(net_predict, tuple) else (net_predict,)
+
+            # Denormalize the outputs in their buffers
+            outputs = []
+            for i, (data, normalization) in enumerate(zip(net_predict, output_normalization)):
+                buffer = self.__get_buffer(buffers=self.__output_buffers, idx=i, shape=tuple(data.shape))
+                if normalization is None:
+                    buffer.copy_(data)
+                else:
+                    mean, std = self.__get_normalization(normalization=normalization, key=('output', i))
+                    addcmul(mean, data, std, out=buffer)
+                outputs.append(buffer.numpy() if buffer.device.type == 'cpu' else buffer.cpu().numpy())
+
+        return outputs
+
+    def infer_tensors(self, *args) -> Any:
+        """
+        Compute a prediction from torch tensors without recording gradients, with the compiled network if available.
+
+        :param args: Data fields to fill the forward function.
+        """
+
+        with inference_mode(), self.autocast():
+            return self.__forward(*args)
+
+    def __get_buffer(self,
+                     buffers: Dict[Tuple[int, Tuple[int, ...]], Tensor],
+                     idx: int,
+                     shape: Tuple[int, ...]) -> Tensor:
+        """
+        Get the reusable tensor of a data field with a given shape.
+
+        :param buffers: Container of the buffers.
+        :param idx: Index of the data field.
+        :param shape: Shape of the data field.
+        """
+
+        if (buffer := buffers.get((idx, shape))) is None:
+            buffer = buffers[(idx, shape)] = empty(shape, dtype=self.data_type, device=self.__device)
+        return buffer
+
+    def __get_normalization(self,
+                            normalization: List[float],
+                            key: Tuple[str, int]) -> Tuple[Tensor, Tensor]:
+        """
+        Get the normalization coefficients of a data field as device tensors. A single pair of tensors is kept per
+        data field and replaced when the coefficients change.
+
+        :param normalization: Mean and standard deviation of the data field.
+        :param key: Direction ('input' or 'output') and index of the data field.
+        """
+
+        values = (float(normalization[0]), float(normalization[1]))
+        cached = self.__normalization.get(key)
+        if cached is None or cached[0] != values:
+            cached = self.__normalization[key] = (values,
+                                                  (tensor(values[0], dtype=self.data_type, device=self.__device),
+                                                   tensor(values[1], dtype=self.data_type, device=self.__device)))
+        return cached[1]
+
+    ####################
+    # Compiled backend #
+    ####################
+
+    def set_backend(self,
+                    backend: str = 'eager',
+                    cache_file: Optional[str] = None) -> None:
+        """
+        Select the backend used by the inference path. The network is compiled on the first prediction, once the
+        weights are loaded and the shapes of the inputs are known, then validated on each new shape of inputs.
+
+        :param backend: Either 'eager', 'trace' (TorchScript trace), 'script' (TorchScript script) or 'compile'
+                        (torch.compile).
+        :param cache_file: File to store the compiled TorchScript network (reused while newer than the weights), the
+                           shapes of the inputs are appended to the name of the file.
+        """
+
+        if backend not in ('eager', 'trace', 'script', 'compile'):
+            raise ValueError(f"[NetworkController] Unknown backend '{backend}', available backends are 'eager', "
+                             f"'trace', 'script' and 'compile'.")
+        self.backend = backend
+        self.__compiled = {}
+        self.__cache_file = cache_file
+
+    def __forward(self, *args) -> Any:
+        """
+        Call the compiled network if available, the forward function of the network otherwise.
+
+        :param args: Data fields to fill the forward function.
+        """
+
+        if self.backend == 'eager':
+            return self.__network.forward(*args)
+
+        # A traced network can depend on the shapes of the inputs: compile or validate it for each new shape
+        shapes = tuple(tuple(arg.shape) for arg in args)
+        if shapes not in self.__compiled:
+            self.__compiled[shapes] = self.__compile(*args)
+
+        if (compiled := self.__compiled[shapes]) is not None:
+            try:
+                return compiled(*args)
+            except Exception as exception:
+                print(f"[NetworkController] The '{self.backend}' network failed ({exception}), using eager mode.")
+                self.__compiled[shapes] = None
         return self.__network.forward(*args)
 
+    def __compile(self, *args) -> Optional[Callable]:
+        """
+        Compile the network with the selected backend for a shape of inputs and validate its outputs against the
+        eager mode. The scripted and compiled networks do not depend on the shapes and are only compiled once.
+
+        :param args: Sample data fields to fill the forward function.
+        """
+
+        if self.backend == 'compile' and not hasattr(torch, 'compile'):
+            print(f"[NetworkController] Cannot use the 'compile' backend (torch.compile is not available in this "
+                  f"version of PyTorch), using eager mode.")
+            return None
+
+        # The cached network of this shape of inputs
+        cache_file = None
+        if self.backend in ('trace', 'script') and self.__cache_file is not None:
+            root, extension = splitext(self.__cache_file)
+            cache_file = f"{root}_{'_'.join('x'.join(str(size) for size in arg.shape) for arg in args)}{extension}"
+        from_cache = cache_file is not None and isfile(cache_file) and getmtime(cache_file) >= self.__weights_time
+
+        # The scripted and compiled networks are shared between the shapes
+        shared = None
+        if self.backend in ('script', 'compile'):
+            shared = next((compiled for compiled in self.__compiled.values() if compiled is not None), None)
+
+        with inference_mode(False), no_grad():
+            args = [arg.clone() for arg in args]
+            try:
+
+                # Load the cached TorchScript network or compile it
+                if shared is not None:
+                    compiled = shared
+                elif from_cache:
+                    compiled = jit.load(cache_file, map_location=self.__device)
+                    print(f"[NetworkController] Load the compiled network from {cache_file}.")
+                elif self.backend == 'trace':
+                    compiled = jit.freeze(jit.trace(self.__network, tuple(args)))
+                elif self.backend == 'script':
+                    compiled = jit.freeze(jit.script(self.__network))
+                else:
+                    compiled = torch.compile(self.__network)
+
+                # Validate the compiled network
+                expected, predicted = self.__network.forward(*args), compiled(*args)
+                expected = expected if isinstance(expected, tuple) else (expected,)
+                predicted = predicted if isinstance(predicted, tuple) else (predicted,)
+                if len(expected) != len(predicted) or \
+                        not all(allclose(e, p, rtol=1e-4, atol=1e-5) for e, p in zip(expected, predicted)):
+                    raise ValueError("outputs differ from the eager mode")
+
+            except Exception as exception:
+                print(f"[NetworkController] Cannot use the '{self.backend}' backend ({exception}), using eager mode.")
+                return None
+
+        # Store the TorchScript network
+        if cache_file is not None and not from_cache and shared is None:
+            jit.save(compiled, cache_file)
+            print(f"[NetworkController] Save the compiled network at {cache_file}.")
+        return compiled
+
+    ################
+    # Quantization #
+    ################
+
+    def quantize(self) -> None:
+        """
+        Apply dynamic int8 quantization to the Linear layers of the network. The weights are quantized once and the
+        activations are quantized on the fly, for CPU inference only.
+        """
+
+        if self.__device is not None and self.__device.type != 'cpu':
+            raise ValueError(f"[NetworkController] The quantized network can only run on CPU, not on {self.__device}.")
+        self.__network = quantize_dynamic(self.__network, {Linear}, dtype=qint8)
+        self.is_quantized = True
+
+    def state_size(self) -> int:
+        """
+        Get the size in bytes of the serialized state of parameters.
+        """
+
+        buffer = BytesIO()
+        save(obj=self.__network.state_dict(), f=buffer)
+        return buffer.getbuffer().nbytes
+
     @property
     def is_ready(self):
         return self.__is_ready
@@ -80,6 +333,26 @@ class NetworkController:
         self.__network.to(self.__device)
         print(f"[Network] Device is {self.__device}")
 
+    def distribute(self, nb_processes: int) -> None:
+        """
+        Wrap the network for data parallel training: the gradients are averaged between the processes of the group
+        after each backward pass. The parameters of the main process are shared on creation.
+
+        :param nb_processes: Number of processes in the group.
+        """
+
+        if self.__device.type == 'cpu':
+            set_num_threads(max(1, cpu_count() // nb_processes))
+        self.__parallel_network = DistributedDataParallel(self.__network)
+
+    def no_sync(self):
+        """
+        Get the context in which the backward passes do not average the gradients between the processes of a data
+        parallel training (gradients accumulation). Without data parallelism, the context does nothing.
+        """
+
+        return nullcontext() if self.__parallel_network is None else self.__parallel_network.no_sync()
+
     def load(self, path: str) -> None:
         """
         Load a state of parameters.
@@ -88,6 +361,7 @@ class NetworkController:
         """
 
         self.__network.load_state_dict(load(f=path, map_location=self.__device, weights_only=True))
+        self.__weights_time = getmtime(path)
 
     def parameters(self):
         """
@@ -110,14 +384,15 @@ class NetworkController:
 
         return sum(p.numel() for p in self.__network.parameters())
 
-    def save(self, path: str) -> None:
+    def save(self, path: str, extension: str = 'pth') -> None:
         """
         Save the current state of the network.
 
         :param path: File to store the parameters.
+        :param extension: Extension of the file.
         """
 
-        save(obj=self.__network.state_dict(), f=f'{path}.pth')
+        save(obj=self.__network.state_dict(), f=f'{path}.{extension}')
 
     def to_torch(self,
                  tensor: ndarray,
@@ -140,5 +415,6 @@ class NetworkController:
         :param tensor: Torch tensor to convert.
         """
 
-        return tensor.cpu().detach().numpy()
+        tensor = tensor.cpu().detach()
+        return tensor.numpy() if tensor.dtype == self.data_type else tensor.to(self.data_type).numpy()
         
\ No newline at end of file
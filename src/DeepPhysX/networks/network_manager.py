@@ -1,15 +1,22 @@
 from typing import Optional, Dict, Any, Type, Union, List, Tuple
-from os import sep, listdir, remove
-from os.path import isfile, isdir, join
-from numpy import ndarray, array
+from os import sep
+from os.path import isfile, isdir, join, getmtime
+from numpy import ndarray, array, asarray, stack, concatenate, mean
+from time import time
+from threading import Lock
+from contextlib import nullcontext
 from torch.nn import Module
 from torch.nn.modules.loss import _Loss
 from torch.optim import Optimizer
-from torch import Tensor, float32, dtype
+from torch import Tensor, float32, bfloat16, dtype
+from torch.autograd.graph import saved_tensors_hooks
 
 from DeepPhysX.networks.network_controller import NetworkController
+from DeepPhysX.networks.prediction_batcher import PredictionBatcher
+from DeepPhysX.networks.checkpoint_manager import CheckpointManager
 from DeepPhysX.database.database_controller import DatabaseController
 from DeepPhysX.utils.path import create_dir, copy_dir
+from DeepPhysX.utils.tracer import tracer
 
 
 class NetworkManager:
@@ -21,7 +28,17 @@ class NetworkManager:
                  data_backward_fields: Union[str, List[str]],
                  network_dir: Optional[str] = None,
                  network_load_id: int = -1,
-                 data_type: dtype = float32):
+                 data_type: dtype = float32,
+                 prediction_batch_size: int = 1,
+                 prediction_window: float = 0.002,
+                 inference_backend: str = 'eager',
+                 mixed_precision: bool = False,
+                 quantize: bool = False,
+                 micro_batch_size: int = 0,
+                 micro_batch_memory: Optional[float] = None,
+                 checkpoint_keep_last: int = 1,
+                 checkpoint_keep_best: int = 0,
+                 async_checkpoint: bool = True):
         """
         NetworkManager handles the neural network instance for inference and training, load and save.
 
@@ -32,6 +49,21 @@ class NetworkManager:
         :param network_dir: Path to the network repository.
         :param network_load_id: If specified, load a specific network state.
         :param data_type: Set the Torch default data type.
+        :param prediction_batch_size: Maximum number of concurrent prediction requests from the simulations computed
+                                      in a single forward pass (capped to the number of simulations).
+        :param prediction_window: Maximum time (in seconds) to wait for concurrent prediction requests.
+        :param inference_backend: Backend of the prediction pipeline, either 'eager', 'trace' (TorchScript trace),
+                                  'script' (TorchScript script) or 'compile' (torch.compile).
+        :param mixed_precision: If True, the forward passes and the loss run in bfloat16 with float32 parameters.
+        :param quantize: If True, the prediction pipeline uses the int8 dynamic quantization of the network.
+        :param micro_batch_size: If > 0, the training batches are split in micro-batches of this size whose gradients
+                                 are accumulated before each optimization step (batch normalization layers then use
+                                 the statistics of the micro-batches).
+        :param micro_batch_memory: If set, memory budget (in MB) of the activations stored for a backward pass: the
+                                   size of the micro-batches is computed from this budget.
+        :param checkpoint_keep_last: Number of the most recent backup states of the network to keep in the session.
+        :param checkpoint_keep_best: Number of the backup states of the network with the lowest loss values to keep.
+        :param async_checkpoint: If True, the states of the network are written to files in a background thread.
         """
 
         # Network repository variables
@@ -40,23 +72,48 @@ class NetworkManager:
         self.saved_counter: int = 0
         self.save_every: int = 0
         self.network_template_name: str = ''
+        self.checkpoint_keep_last: int = checkpoint_keep_last
+        self.checkpoint_keep_best: int = checkpoint_keep_best
+        self.async_checkpoint: bool = async_checkpoint
+        self.__checkpoints: Optional[CheckpointManager] = None
 
         # Network instance
         self.network: NetworkController = NetworkController(network_architecture=network_architecture,
                                                             network_kwargs=network_kwargs,
-                                                            data_type=data_type)
+                                                            data_type=data_type,
+                                                            autocast_type=bfloat16 if mixed_precision else None)
         self.network.set_device()
+        self.inference_backend: str = inference_backend
+        self.quantize: bool = quantize
+        self.__network_file: str = ''
 
         # Training materials variables
         self.loss_fnc: Optional[_Loss] = None
         self.__loss_value: Optional[Any] = None
         self.__optimizer: Optional[Optimizer] = None
 
+        # Gradients accumulation variables
+        if micro_batch_size < 0 or (micro_batch_memory is not None and micro_batch_memory <= 0):
+            raise ValueError(f"[{self.__class__.__name__}] The micro-batch size and memory budget must be positive.")
+        self.micro_batch_size: int = micro_batch_size
+        self.micro_batch_memory: Optional[float] = micro_batch_memory
+        self.__sample_memory: Dict[Tuple[Tuple[int, ...], ...], int] = {}
+
         # Database access variables
         self.__database: DatabaseController = DatabaseController()
         self.data_forward_fields: List[str] = data_forward_fields if isinstance(data_forward_fields, list) else [data_forward_fields]
         self.data_backward_fields: List[str] = data_backward_fields if isinstance(data_backward_fields, list) else [data_backward_fields]
 
+        # Data parallel training variables
+        self.rank: int = 0
+
+        # Prediction requests batching variables
+        self.prediction_batch_size: int = prediction_batch_size
+        self.prediction_window: float = prediction_window
+        self.__batcher: Optional[PredictionBatcher] = None
+        # The predictions never use partially updated parameters or normalization coefficients
+        self.__network_lock: Lock = Lock()
+
     ################
     # Init methods #
     ################
@@ -68,7 +125,9 @@ class NetworkManager:
                                optimizer_kwargs: Optional[Dict[str, Any]],
                                new_session: bool,
                                session: str = 'sessions/default',
-                               save_intermediate_state_every: int = 0) -> None:
+                               save_intermediate_state_every: int = 0,
+                               rank: int = 0,
+                               world_size: int = 1) -> None:
         """
         Init the NetworkManager for the training pipeline.
 
@@ -79,10 +138,13 @@ class NetworkManager:
         :param new_session: If True, create a new training session.
         :param session: Path to the training session.
         :param save_intermediate_state_every: Periodic saves of the state of the network.
+        :param rank: Rank of the process in a data parallel training (only the rank 0 writes in the session).
+        :param world_size: Number of processes in a data parallel training.
         """
 
         # Configure the Network for the current pipeline
         self.network.train()
+        self.rank = rank
         self.network_template_name = session.split(sep)[-1] + '_network_{}'
 
         # Create the training materials
@@ -94,14 +156,29 @@ class NetworkManager:
 
         # Case 1: Training from an existing Network state of parameters
         if new_session and self.network_dir is not None and isdir(self.network_dir):
-            self.network_dir = copy_dir(src_dir=self.network_dir,
-                                        dest_dir=session,
-                                        sub_folders='networks')
-            self.load_network(network_id=self.network_load_id)
+            if self.rank == 0:
+                self.network_dir = copy_dir(src_dir=self.network_dir,
+                                            dest_dir=session,
+                                            sub_folders='networks')
+                self.load_network(network_id=self.network_load_id)
+            else:
+                self.load_network(network_id=self.network_load_id)
+                self.network_dir = join(session, 'networks')
 
         # Case 2: Training from scratch
         else:
-            self.network_dir = create_dir(session_dir=session, session_name='networks')
+            self.network_dir = create_dir(session_dir=session, session_name='networks') if self.rank == 0 else \
+                join(session, 'networks')
+
+        # Create the manager of the saved states of the network
+        self.__checkpoints = CheckpointManager(network_dir=self.network_dir,
+                                               keep_last=self.checkpoint_keep_last,
+                                               keep_best=self.checkpoint_keep_best,
+                                               asynchronous=self.async_checkpoint and self.rank == 0)
+
+        # Data parallel training: the gradients are averaged between the processes
+        if world_size > 1:
+            self.network.distribute(nb_processes=world_size)
 
     def init_prediction_pipeline(self, session: str = 'sessions/default') -> None:
         """
@@ -115,7 +192,22 @@ class NetworkManager:
 
         # Load the Network state of parameters
         self.network_dir = join(session, 'networks')
-        self.load_network(network_id=self.network_load_id)
+        self.__network_file = self.load_network(network_id=self.network_load_id)
+
+        # Load the quantized Network state of parameters if required
+        if self.quantize:
+            self.__load_quantized_network()
+
+        # Compile the Network on the first prediction, the TorchScript networks are cached next to the weights
+        self.__set_backend()
+
+    def __set_backend(self) -> None:
+        """
+        Set the inference backend of the Network, compiled networks are cached next to the loaded weights.
+        """
+
+        name = self.__network_file[:-4] + ('_int8' if self.network.is_quantized else '')
+        self.network.set_backend(backend=self.inference_backend, cache_file=f'{name}_{self.inference_backend}.pt')
 
     @staticmethod
     def __check_init(foo):
@@ -147,12 +239,21 @@ class NetworkManager:
 
         self.__database.init(database_path=database_path, normalize_data=normalize_data)
 
+    @property
+    def normalization(self) -> Dict[str, List[float]]:
+        """
+        Get the normalization coefficients (mean, std) of the database fields (empty if data is not normalized).
+        """
+
+        return self.__database.normalization if self.__database.do_normalize else {}
+
     def reload_normalization(self) -> None:
         """
         Re-compute the normalization coefficients of the database fields.
         """
 
-        self.__database.reload_normalization()
+        with self.__network_lock:
+            self.__database.reload_normalization()
 
     def link_clients(self, nb_clients: Optional[int] = None) -> None:
         """
@@ -168,21 +269,28 @@ class NetworkManager:
             # Add an empty line for each Client
             for _ in range(nb_clients):
                 self.__database.add_data(exchange=True, data={})
+            # Batch the concurrent prediction requests of the Clients
+            if min(self.prediction_batch_size, nb_clients) > 1:
+                self.__batcher = PredictionBatcher(predict_fnc=self.__predict_instances,
+                                                   max_batch_size=min(self.prediction_batch_size, nb_clients),
+                                                   window=self.prediction_window)
 
     ##############################
     # Network storage management #
     ##############################
 
-    def load_network(self, network_id: int) -> None:
+    def load_network(self, network_id: int) -> str:
         """
         Load a Network state of parameters.
 
         :param network_id: Specify the state of the network to load if multiple states were saved during training.
+        :return: The loaded weights file.
         """
 
-        # Get the list of the saved weights files
-        files = sorted([join(self.network_dir, f) for f in listdir(self.network_dir)
-                        if isfile(join(self.network_dir, f)) and f.endswith('.pth')])
+        # Get the list of the saved weights files (from the manifest if available)
+        checkpoints = self.__checkpoints if self.__checkpoints is not None else \
+            CheckpointManager(network_dir=self.network_dir, asynchronous=False)
+        files = checkpoints.files()
 
         # Check the network id
         if len(files) == 0:
@@ -197,40 +305,137 @@ class NetworkManager:
         # Load the set of parameters
         self.network.load(files[network_id])
         print(f"[NetworkManager] Load weights from {files[network_id]}.")
+        return files[network_id]
 
-    def save_network(self, final_save: bool = False) -> None:
+    def save_network(self,
+                     final_save: bool = False,
+                     epoch: Optional[int] = None,
+                     loss: Optional[float] = None) -> None:
         """
-        Save a Network state of parameters.
+        Save a Network state of parameters. The state is copied and written to a file in the background.
 
         :param final_save: If True, save the final state of the network, otherwise an intermediate state.
+        :param epoch: Training epoch of the state.
+        :param loss: Loss value of the state.
         """
 
+        # Only the main process saves the state of the data parallel training
+        if self.rank != 0:
+            return
+
         # Case 1: Final save
         if final_save:
 
-            path = join(self.network_dir, 'network')
-            self.network.save(path=path)
-            print(f"[NetworkManager] Save final set of weights at {path}.")
+            file, kind = 'network.pth', 'final'
+            print(f"[NetworkManager] Save final set of weights at {join(self.network_dir, file)}.")
 
         # Case 2: Intermediate save
         else:
 
             self.saved_counter += 1
 
-            # Remove previous temporary backup file(s)
-            for temp in [f for f in listdir(self.network_dir) if 'temp' in f]:
-                remove(join(self.network_dir, temp))
-
             # Case 2.1: Save intermediate state
             if self.save_every > 0 and self.saved_counter % self.save_every == 0:
-                path = join(self.network_dir, self.network_template_name.format(self.saved_counter))
-                self.network.save(path=path)
-                print(f"[NetworkManager] Save intermediate set of weights at {path}.")
+                file, kind = f'{self.network_template_name.format(self.saved_counter)}.pth', 'intermediate'
+                print(f"[NetworkManager] Save intermediate set of weights at {join(self.network_dir, file)}.")
 
-            # Case 2.2: Save backup file
+            # Case 2.2: Save backup file (previous backups are removed according to the retention policy)
             else:
-                path = join(self.network_dir, f'temp_{self.saved_counter}')
-                self.network.save(path=path)
+                file, kind = f'temp_{self.saved_counter}.pth', 'backup'
+
+        self.__checkpoints.save(state_dict=self.network.state_dict(), file=file, kind=kind, epoch=epoch, loss=loss)
+
+    ################
+    # Quantization #
+    ################
+
+    def __load_quantized_network(self) -> None:
+        """
+        Quantize the loaded Network, load the quantized state of parameters if it was already exported.
+        """
+
+        quantized_file = f'{self.__network_file[:-4]}_int8.pt'
+        self.network.quantize()
+        if isfile(quantized_file) and getmtime(quantized_file) >= getmtime(self.__network_file):
+            self.network.load(quantized_file)
+            print(f"[NetworkManager] Load quantized weights from {quantized_file}.")
+        else:
+            self.network.save(path=quantized_file[:-3], extension='pt')
+            print(f"[NetworkManager] Save quantized weights at {quantized_file}.")
+
+    @__check_init
+    def export_quantized(self,
+                         table_name: str = 'run',
+                         nb_samples: int = 100) -> Dict[str, float]:
+        """
+        Quantize the loaded Network and save its state next to the float weights, then report the size, the latency
+        and the error of the quantized Network versus the float Network on samples of a Database table.
+
+        :param table_name: Name of the Database table to use for the report.
+        :param nb_samples: Maximal number of samples to use for the report.
+        :return: The report values.
+        """
+
+        if self.network.is_quantized:
+            raise ValueError("[NetworkManager] The network is already quantized.")
+
+        # Get samples from the Database
+        lines_id = list(range(1, min(nb_samples, self.__database.nb_lines(table_name=table_name)) + 1))
+        if len(lines_id) > 0:
+            batch_fwd = self.__database.get_batch(lines_id=lines_id, fields=self.data_forward_fields,
+                                                  table_name=table_name)
+            batch_bwd = self.__database.get_batch(lines_id=lines_id, fields=self.data_backward_fields,
+                                                  table_name=table_name)
+            inputs = [array(batch_fwd[field]) for field in self.data_forward_fields]
+            targets = [array(batch_bwd[field]) for field in self.data_backward_fields]
+        else:
+            print(f"[NetworkManager] WARNING: The '{table_name}' table is empty, latency and error are not reported.")
+
+        # Measure the float Network then the quantized Network
+        report = {}
+        for name in ('float', 'int8'):
+            if name == 'int8':
+                self.__load_quantized_network()
+                self.__set_backend()
+            report[f'{name}_size'] = self.network.state_size()
+            if len(lines_id) > 0:
+                report[f'{name}_latency'], report[f'{name}_predictions'] = self.__measure_predictions(inputs=inputs)
+                report[f'{name}_error'] = mean([abs(p - t).mean() for p, t in
+                                                zip(report[f'{name}_predictions'], targets)])
+
+        # Print the report
+        print(f"[NetworkManager] Quantization report on {len(lines_id)} samples of the '{table_name}' table:")
+        for name in ('float', 'int8'):
+            description = f"    {name:>5}: size {report[f'{name}_size'] / 1024:.1f}kB"
+            if len(lines_id) > 0:
+                description += f" | latency {report[f'{name}_latency'] * 1e3:.3f}ms" \
+                               f" | mean absolute error {report[f'{name}_error']:.3e}"
+            print(description)
+        if len(lines_id) > 0:
+            report['int8_deviation'] = mean([abs(q - f).mean() for q, f in
+                                             zip(report.pop('int8_predictions'), report.pop('float_predictions'))])
+            print(f"    Mean deviation of the quantized predictions: {report['int8_deviation']:.3e}")
+        return report
+
+    def __measure_predictions(self, inputs: List[ndarray]) -> Tuple[float, List[ndarray]]:
+        """
+        Compute the predictions of the samples one by one.
+
+        :param inputs: Batch of each forward field.
+        :return: The mean latency of a prediction and the predictions of each backward field.
+        """
+
+        # Warm up (the compiled backends are compiled on the first prediction)
+        with self.__network_lock:
+            self.__infer(inputs=[field[:1] for field in inputs])
+
+        predictions, start = [], time()
+        with self.__network_lock:
+            for i in range(len(inputs[0])):
+                outputs = self.__infer(inputs=[field[i:i + 1] for field in inputs])
+                predictions.append([outputs[field].copy() for field in self.data_backward_fields])
+        latency = (time() - start) / len(inputs[0])
+        return latency, [concatenate(field) for field in zip(*predictions)]
 
     #####################################
     # Network optimization & prediction #
@@ -245,18 +450,49 @@ class NetworkManager:
         """
 
         # 1. Get data from the Database
-        batch_fwd = self.__database.get_batch(lines_id=lines_id, fields=self.data_forward_fields)
-        batch_bwd = self.__database.get_batch(lines_id=lines_id, fields=self.data_backward_fields)
+        with tracer.span('db_fetch'):
+            batch_fwd = self.__database.get_batch(lines_id=lines_id, fields=self.data_forward_fields)
+            batch_bwd = self.__database.get_batch(lines_id=lines_id, fields=self.data_backward_fields)
+
+        # 2. Convert data to PyTorch & normalize if required
+        return self.__to_torch(batch_fwd=batch_fwd, batch_bwd=batch_bwd)
+
+    @__check_init
+    def get_data_from_samples(self, samples: List[Dict[str, Any]]) -> Tuple[Dict[str, Tensor], Dict[str, Tensor]]:
+        """
+        Get data from samples streamed in memory and convert fields to Torch tensors, apply normalization if required.
+
+        :param samples: Streamed samples.
+        """
+
+        # 1. Gather the fields of the samples
+        with tracer.span('batch_assembly'):
+            batch_fwd = {field: [sample[field] for sample in samples] for field in self.data_forward_fields}
+            batch_bwd = {field: [sample[field] for sample in samples] for field in self.data_backward_fields}
 
         # 2. Convert data to PyTorch & normalize if required
+        return self.__to_torch(batch_fwd=batch_fwd, batch_bwd=batch_bwd)
+
+    def __to_torch(self,
+                   batch_fwd: Dict[str, Any],
+                   batch_bwd: Dict[str, Any]) -> Tuple[Dict[str, Tensor], Dict[str, Tensor]]:
+        """
+        Convert the batched fields to Torch tensors, apply normalization if required.
+
+        :param batch_fwd: Batch of forward data fields.
+        :param batch_bwd: Batch of backward data fields.
+        """
+
         for batch in (batch_fwd, batch_bwd):
             for field_name in batch.keys():
-                batch[field_name] = array(batch[field_name])
-                if self.__database.do_normalize and field_name in self.__database.normalization:
-                    batch[field_name] = self.normalize_data(data=batch[field_name],
-                                                            normalization=self.__database.normalization[field_name])
-                batch[field_name] = self.network.to_torch(tensor=batch[field_name],
-                                                          grad=self.network.is_training)
+                with tracer.span('batch_assembly'):
+                    batch[field_name] = array(batch[field_name])
+                    if self.__database.do_normalize and field_name in self.__database.normalization:
+                        batch[field_name] = self.normalize_data(data=batch[field_name],
+                                                                normalization=self.__database.normalization[field_name])
+                with tracer.span('to_torch'):
+                    batch[field_name] = self.network.to_torch(tensor=batch[field_name],
+                                                              grad=self.network.is_training)
 
         return batch_fwd, batch_bwd
 
@@ -268,7 +504,8 @@ class NetworkManager:
         :param batch_fwd: Batch of forward data samples from the database.
         """
 
-        return self.network.predict(*batch_fwd.values())
+        with tracer.span('forward'):
+            return self.network.predict(*batch_fwd.values())
 
     @__check_init
     def get_loss(self,
@@ -283,50 +520,237 @@ class NetworkManager:
 
         # Compute the loss function to the network prediction and the backward data
         net_predict = net_predict if isinstance(net_predict, tuple) else (net_predict,)
-        self.__loss_value = self.loss_fnc(*net_predict, *batch_bwd.values())
+        with tracer.span('loss'), self.network.autocast():
+            self.__loss_value = self.loss_fnc(*net_predict, *batch_bwd.values())
         return self.__loss_value.item()
 
     @__check_init
-    def optimize(self) -> None:
+    def optimize(self,
+                 batch_fwd: Optional[Dict[str, Tensor]] = None,
+                 batch_bwd: Optional[Dict[str, Tensor]] = None) -> Optional[float]:
         """
         Compute a step of optimization.
+        Without batches, the gradients are computed from the last loss value (see 'get_loss').
+        With batches, the forward and backward passes are computed by micro-batches whose gradients are accumulated
+        before the optimization step, so that the peak memory is bounded by the size of the micro-batches.
+
+        :param batch_fwd: Batch of forward data samples from the database.
+        :param batch_bwd: Batch of backward data samples from the database.
+        :return: The loss value of the whole batch if batches were given.
+        """
+
+        with self.__network_lock:
+            return self.__optimize(batch_fwd=batch_fwd, batch_bwd=batch_bwd)
+
+    def __optimize(self,
+                   batch_fwd: Optional[Dict[str, Tensor]],
+                   batch_bwd: Optional[Dict[str, Tensor]]) -> Optional[float]:
+        """
+        Compute a step of optimization (see 'optimize').
+
+        :param batch_fwd: Batch of forward data samples from the database.
+        :param batch_bwd: Batch of backward data samples from the database.
         """
 
         self.__optimizer.zero_grad()
-        self.__loss_value.backward()
-        self.__optimizer.step()
+
+        # Case 1: Backward pass of the last loss value
+        if batch_fwd is None:
+            with tracer.span('backward'):
+                self.__loss_value.backward()
+            with tracer.span('optimizer_step'):
+                self.__optimizer.step()
+            return None
+
+        # Case 2: Gradients accumulation over the micro-batches
+        batch_size = len(next(iter(batch_fwd.values())))
+        shapes = tuple(tuple(field.shape[1:]) for field in (*batch_fwd.values(), *batch_bwd.values()))
+        micro_batch_size = self.__get_micro_batch_size(batch_size=batch_size, shapes=shapes)
+        # The loss of each micro-batch is weighted by its share of the batch unless the loss is a sum
+        weighted = getattr(self.loss_fnc, 'reduction', 'mean') != 'sum'
+        loss, start = 0., 0
+        while start < batch_size:
+            end = min(start + micro_batch_size, batch_size)
+            micro_fwd = [field[start:end] for field in batch_fwd.values()]
+            micro_bwd = [field[start:end] for field in batch_bwd.values()]
+            # The memory of the activations is measured on the first micro-batch of a new shape of data
+            measure = self.micro_batch_memory is not None and shapes not in self.__sample_memory
+            saved = {}
+            # The gradients are only averaged between processes after the last micro-batch
+            with self.network.no_sync() if end < batch_size else nullcontext():
+                with self.__count_saved_tensors(saved) if measure else nullcontext():
+                    with tracer.span('forward'):
+                        net_predict = self.network.predict(*micro_fwd)
+                    net_predict = net_predict if isinstance(net_predict, tuple) else (net_predict,)
+                    with tracer.span('loss'), self.network.autocast():
+                        loss_value = self.loss_fnc(*net_predict, *micro_bwd)
+                if weighted:
+                    loss_value = loss_value * ((end - start) / batch_size)
+                with tracer.span('backward'):
+                    loss_value.backward()
+            loss += loss_value.item()
+            if measure:
+                self.__sample_memory[shapes] = max(1, sum(saved.values()) // (end - start))
+                micro_batch_size = self.__get_micro_batch_size(batch_size=batch_size, shapes=shapes)
+            start = end
+        with tracer.span('optimizer_step'):
+            self.__optimizer.step()
+        return loss
+
+    def __get_micro_batch_size(self,
+                               batch_size: int,
+                               shapes: Tuple[Tuple[int, ...], ...]) -> int:
+        """
+        Get the size of the micro-batches, either fixed or computed from the memory budget.
+        The memory of a sample is measured once per shape of data on a first micro-batch of two samples.
+
+        :param batch_size: Number of samples in the batch.
+        :param shapes: Shapes of a sample of each data field.
+        """
+
+        if self.micro_batch_memory is None:
+            return batch_size if self.micro_batch_size == 0 else min(self.micro_batch_size, batch_size)
+
+        # The memory of a sample is not measured yet for this shape of data
+        if (sample_memory := self.__sample_memory.get(shapes)) is None:
+            return min(2, batch_size)
+
+        # Fit the micro-batch in the memory budget
+        micro_batch_size = max(1, int(self.micro_batch_memory * 2 ** 20) // sample_memory)
+        if self.micro_batch_size > 0:
+            micro_batch_size = min(micro_batch_size, self.micro_batch_size)
+        return min(micro_batch_size, batch_size)
+
+    def __count_saved_tensors(self, saved: Dict[Tuple[int, dtype], int]) -> saved_tensors_hooks:
+        """
+        Get a context that records the size of the tensors saved for the backward pass (parameters excluded).
+
+        :param saved: Sizes in bytes of the saved tensors, filled by the context.
+        """
+
+        parameters = {p.data_ptr() for p in self.network.parameters()}
+
+        def pack(tensor: Tensor) -> Tensor:
+            if tensor.data_ptr() not in parameters:
+                saved[(tensor.data_ptr(), tensor.dtype)] = tensor.numel() * tensor.element_size()
+            return tensor
+
+        return saved_tensors_hooks(pack, lambda tensor: tensor)
 
     @__check_init
     def get_prediction_from_simulation(self, instance_id: int) -> None:
         """
-        Prediction request from a simulation.
+        Prediction request from a simulation. Concurrent requests are computed in a single batch if enabled.
 
         :param instance_id: Indices of the simulation that requested a prediction.
         """
 
-        # 1. Normalize the batch of data from the exchange db
-        normalization = self.__database.normalization
-        sample = self.__database.get_data(exchange=True, line_id=instance_id, fields=self.data_forward_fields)
-        del sample['id']
-        for field in sample.keys():
-            sample[field] = array([sample[field]])
-            if field in normalization:
-                sample[field] = self.normalize_data(data=sample[field], normalization=normalization[field])
-            sample[field] = self.network.to_torch(tensor=sample[field], grad=False)
-
-        # 2. Compute prediction
-        net_predict = self.network.predict(*(sample[field_name] for field_name in self.data_forward_fields))
-        net_predict = net_predict if isinstance(net_predict, tuple) else (net_predict,)
+        if self.__batcher is None:
+            self.__predict_instances(instance_ids=[instance_id])
+        else:
+            self.__batcher.submit(instance_id)
+
+    def __predict_instances(self, instance_ids: List[int]) -> List[None]:
+        """
+        Compute the predictions of a batch of simulations.
+
+        :param instance_ids: Indices of the simulations that requested a prediction.
+        """
+
+        # 1. Get the batch of data from the exchange db
+        samples = [self.__database.get_data(exchange=True, line_id=instance_id, fields=self.data_forward_fields)
+                   for instance_id in instance_ids]
+        inputs = [stack([sample[field] for sample in samples]) for field in self.data_forward_fields]
+
+        # 2. Compute prediction and write it in the exchange db
+        with self.__network_lock:
+            outputs = self.__infer(inputs=inputs)
+            for i, instance_id in enumerate(instance_ids):
+                self.__database.update(exchange=True,
+                                       data={field: value[i:i + 1] for field, value in outputs.items()},
+                                       line_id=instance_id)
+        return [None] * len(instance_ids)
+
+    @__check_init
+    def get_prediction_from_arrays(self, data: Dict[str, ndarray]) -> Dict[str, ndarray]:
+        """
+        Direct prediction request from a simulation living in the same process, without using the exchange database.
+
+        :param data: Forward data fields of a single sample.
+        :return: Backward data fields predicted for the sample.
+        """
 
-        # 3. Return the prediction and write it in the exchange db
-        data = {}
-        for field, value in zip(self.data_backward_fields, net_predict):
-            data[field] = self.network.to_numpy(tensor=net_predict[0])
-            if field in normalization.keys():
-                data[field] = self.normalize_data(data=data[field], normalization=normalization[field],
-                                                  reverse=True)
-            data[field].reshape(-1)
-        self.__database.update(exchange=True, data=data, line_id=instance_id)
+        # 1. Get the sample as a batch of one
+        inputs = []
+        for field in self.data_forward_fields:
+            if field not in data:
+                raise ValueError(f"[NetworkManager] The field '{field}' is required to compute a prediction "
+                                 f"(forward fields: {self.data_forward_fields}).")
+            inputs.append(asarray(data[field])[None])
+
+        # 2. Compute prediction (copied since the output buffers are reused)
+        with self.__network_lock:
+            return {field: value[0].copy() for field, value in self.__infer(inputs=inputs).items()}
+
+    @__check_init
+    def get_predictions_from_samples(self, samples: List[Dict[str, ndarray]]) -> List[Dict[str, ndarray]]:
+        """
+        Prediction of a list of samples in a single batch, without using the exchange database.
+
+        :param samples: Forward data fields of each sample.
+        :return: Backward data fields predicted for each sample.
+        """
+
+        # 1. Stack the samples as a batch
+        inputs = []
+        for field in self.data_forward_fields:
+            if any(field not in sample for sample in samples):
+                raise ValueError(f"[NetworkManager] The field '{field}' is required to compute a prediction "
+                                 f"(forward fields: {self.data_forward_fields}).")
+            inputs.append(stack([asarray(sample[field]) for sample in samples]))
+
+        # 2. Compute prediction (copied since the output buffers are reused)
+        with self.__network_lock:
+            outputs = self.__infer(inputs=inputs)
+            return [{field: value[i].copy() for field, value in outputs.items()} for i in range(len(samples))]
+
+    @__check_init
+    def get_prediction_from_lines(self,
+                                  lines_id: List[int],
+                                  table_name: Optional[str] = None) -> Dict[str, ndarray]:
+        """
+        Prediction of a batch of samples of the Database.
+
+        :param lines_id: Indices of the samples.
+        :param table_name: Name of the Table of the samples (default is the current Table).
+        :return: Backward data fields predicted for the batch.
+        """
+
+        # 1. Get the batch of data from the Database
+        with tracer.span('db_fetch'):
+            batch = self.__database.get_batch(lines_id=lines_id, fields=self.data_forward_fields, table_name=table_name)
+        inputs = [array(batch[field]) for field in self.data_forward_fields]
+
+        # 2. Compute prediction (copied since the output buffers are reused)
+        with self.__network_lock:
+            return {field: value.copy() for field, value in self.__infer(inputs=inputs).items()}
+
+    def __infer(self, inputs: List[ndarray]) -> Dict[str, ndarray]:
+        """
+        Compute the prediction of the network on a batch of forward fields, with normalized inputs and denormalized
+        outputs.
+
+        :param inputs: Batch of each forward field.
+        """
+
+        normalization = self.__database.normalization
+        with tracer.span('prediction'):
+            outputs = self.network.infer(inputs=inputs,
+                                         input_normalization=[normalization.get(field)
+                                                              for field in self.data_forward_fields],
+                                         output_normalization=[normalization.get(field)
+                                                               for field in self.data_backward_fields])
+        return dict(zip(self.data_backward_fields, outputs))
 
     @classmethod
     def normalize_data(cls,
@@ -359,6 +783,8 @@ class NetworkManager:
 
         if self.network.is_training:
             self.save_network(final_save=True)
+        if self.__checkpoints is not None:
+            self.__checkpoints.close()
         del self.network
 
     def __str__(self) -> str:
@@ -368,4 +794,17 @@ class NetworkManager:
         description += f"    networks Directory: {self.network_dir}\n"
         description += f"    Managed objects: networks: {self.network.__class__.__name__}\n"
         description += str(self.network)
+        description += f"    Inference backend: {self.inference_backend}\n"
+        description += f"    Mixed precision: {self.network.autocast_type is not None}\n"
+        if self.micro_batch_memory is not None:
+            description += f"    Micro-batches memory budget: {self.micro_batch_memory} MB\n"
+            for shapes, sample_memory in self.__sample_memory.items():
+                description += f"    Activations memory of samples {shapes}: " \
+                               f"{sample_memory / 2 ** 10:.1f} KB per sample\n"
+        elif self.micro_batch_size > 0:
+            description += f"    Micro-batches size: {self.micro_batch_size}\n"
+        if self.__batcher is not None:
+            description += str(self.__batcher)
+        if self.__checkpoints is not None:
+            description += str(self.__checkpoints)
         return description
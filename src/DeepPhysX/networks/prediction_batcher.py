@@ -0,0 +1,108 @@
+from typing import Any, Callable, Dict, List, Tuple
+from threading import Condition
+from itertools import count
+from time import time
+
+
+class PredictionBatcher:
+
+    def __init__(self,
+                 predict_fnc: Callable[[List[Any]], List[Any]],
+                 max_batch_size: int = 1,
+                 window: float = 0.002):
+        """
+        PredictionBatcher gathers the prediction requests submitted concurrently by several threads to compute them
+        in a single batched call. The first waiting thread leads the batch: it waits until the batch is full or the
+        time window is over, computes the whole batch and scatters the results back to the waiting threads.
+
+        :param predict_fnc: Function computing the list of outputs of a list of requests.
+        :param max_batch_size: Maximum number of requests in a batch.
+        :param window: Maximum time (in seconds) the leader waits for other requests.
+        """
+
+        self.__predict_fnc: Callable[[List[Any]], List[Any]] = predict_fnc
+        self.max_batch_size: int = max(max_batch_size, 1)
+        self.window: float = window
+
+        # Requests synchronization
+        self.__condition: Condition = Condition()
+        self.__tickets = count()
+        self.__pending: List[Tuple[int, Any]] = []
+        self.__results: Dict[int, Tuple[Any, Any]] = {}
+        self.__leading: bool = False
+
+        # Batches statistics
+        self.nb_requests: int = 0
+        self.nb_batches: int = 0
+
+    def submit(self, request: Any) -> Any:
+        """
+        Submit a prediction request and wait for its output.
+
+        :param request: The request to compute.
+        :return: The output of the request.
+        """
+
+        with self.__condition:
+            ticket = next(self.__tickets)
+            self.__pending.append((ticket, request))
+            self.__condition.notify_all()
+
+            while ticket not in self.__results:
+
+                # Wait if another thread is leading or if the request is already in a running batch
+                if self.__leading or ticket not in (pending[0] for pending in self.__pending):
+                    self.__condition.wait()
+                    continue
+
+                # Lead the batch: wait for the batch to be full or for the end of the time window
+                self.__leading = True
+                deadline = time() + self.window
+                while len(self.__pending) < self.max_batch_size and (timeout := deadline - time()) > 0:
+                    self.__condition.wait(timeout)
+                batch = self.__pending[:self.max_batch_size]
+                self.__pending = self.__pending[self.max_batch_size:]
+
+                # Compute the batch outside the lock
+                self.__condition.release()
+                try:
+                    outputs, error = list(self.__predict_fnc([request for _, request in batch])), None
+                    # Each request must get its own output, otherwise the waiting threads would never be released
+                    if len(outputs) != len(batch):
+                        raise ValueError(f"[{self.__class__.__name__}] The prediction function returned "
+                                         f"{len(outputs)} outputs for {len(batch)} requests.")
+                except Exception as exception:
+                    outputs, error = [None] * len(batch), exception
+                finally:
+                    self.__condition.acquire()
+
+                # Scatter the results
+                for (batch_ticket, _), output in zip(batch, outputs):
+                    self.__results[batch_ticket] = (output, error)
+                self.nb_requests += len(batch)
+                self.nb_batches += 1
+                self.__leading = False
+                self.__condition.notify_all()
+
+            output, error = self.__results.pop(ticket)
+
+        if error is not None:
+            raise error
+        return output
+
+    @property
+    def mean_batch_size(self) -> float:
+        """
+        Get the mean number of requests per computed batch.
+        """
+
+        return self.nb_requests / max(self.nb_batches, 1)
+
+    def __str__(self) -> str:
+
+        description = "\n"
+        description += f"# PredictionBatcher\n"
+        description += f"    Max batch size: {self.max_batch_size}\n"
+        description += f"    Time window: {self.window}s\n"
+        description += f"    Mean batch size: {self.mean_batch_size:.2f}\n"
+        return description
@@ -0,0 +1,135 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from time import time
+from numpy import ndarray
+from torch import Tensor, inference_mode, stack
+
+from DeepPhysX.networks.network_manager import NetworkManager
+
+# State update function: (current state, denormalized prediction) -> next state
+StateUpdate = Callable[[Dict[str, Tensor], Dict[str, Tensor]], Dict[str, Tensor]]
+
+
+class RolloutEngine:
+
+    def __init__(self,
+                 network_manager: NetworkManager,
+                 state_update: StateUpdate):
+        """
+        RolloutEngine evaluates the long-horizon behaviour of a Network: the predictions are fed back as the inputs of
+        the next step through a state update function, entirely on tensors (no simulation nor Database in the loop).
+
+        :param network_manager: Manager of the trained Network (initialized and connected to its Database to get the
+                                normalization coefficients).
+        :param state_update: Function computing the next state (dict of forward fields) from the current state and
+                             the denormalized prediction (dict of backward fields), on batched tensors.
+        """
+
+        self.network_manager: NetworkManager = network_manager
+        self.state_update: StateUpdate = state_update
+        self.report: Dict[str, Any] = {}
+
+        # Normalization coefficients as device tensors
+        network = self.network_manager.network
+        normalization = self.network_manager.normalization
+        self.__normalization: Dict[str, Tuple[Tensor, Tensor]] = {
+            field: (network.to_torch(tensor=coefficients[0], grad=False),
+                    network.to_torch(tensor=coefficients[1], grad=False))
+            for field, coefficients in normalization.items()}
+
+    def rollout(self,
+                initial_state: Dict[str, Union[ndarray, Tensor]],
+                nb_steps: int,
+                ground_truth: Optional[Dict[str, Union[ndarray, Tensor]]] = None) -> Dict[str, Tensor]:
+        """
+        Compute a rollout of the Network from a batch of initial states.
+
+        :param initial_state: Batch of initial states (a value for each forward field).
+        :param nb_steps: Number of steps of the rollout.
+        :param ground_truth: Ground truth trajectories of some state fields with shape (nb_steps, batch_size, ...), the
+                             drift of the rollout is reported for these fields.
+        :return: The trajectories of the state fields with shape (nb_steps, batch_size, ...).
+        """
+
+        ground_truth = {} if ground_truth is None else ground_truth
+        if len(unknown_fields := set(ground_truth) - set(initial_state)) > 0:
+            raise ValueError(f"[{self.__class__.__name__}] The ground truth fields {unknown_fields} are not state "
+                             f"fields (state fields: {set(initial_state)}).")
+
+        network = self.network_manager.network
+        forward_fields = self.network_manager.data_forward_fields
+        backward_fields = self.network_manager.data_backward_fields
+        network.eval()
+
+        with inference_mode():
+
+            # Initial state on the device
+            state = {field: network.to_torch(tensor=value, grad=False) for field, value in initial_state.items()}
+            trajectories: Dict[str, List[Tensor]] = {field: [] for field in state}
+            batch_size = len(next(iter(state.values())))
+
+            # Feed the predictions back as inputs
+            start = time()
+            for _ in range(nb_steps):
+                inputs = [self.__normalize(field=field, data=state[field]) for field in forward_fields]
+                outputs = network.infer_tensors(*inputs)
+                outputs = outputs if isinstance(outputs, tuple) else (outputs,)
+                prediction = {field: self.__denormalize(field=field, data=output.to(network.data_type))
+                              for field, output in zip(backward_fields, outputs)}
+                state = self.state_update(state, prediction)
+                for field in trajectories:
+                    trajectories[field].append(state[field])
+            trajectories = {field: stack(values) for field, values in trajectories.items()}
+            elapsed = time() - start
+
+            # Throughput and drift against the ground truth
+            self.report = {'nb_steps': nb_steps,
+                           'batch_size': batch_size,
+                           'time': elapsed,
+                           'steps_per_second': nb_steps / max(elapsed, 1e-9),
+                           'samples_per_second': nb_steps * batch_size / max(elapsed, 1e-9),
+                           'drift': {}}
+            for field, values in ground_truth.items():
+                values = network.to_torch(tensor=values, grad=False).reshape(trajectories[field].shape)
+                errors = (trajectories[field] - values).reshape(nb_steps, batch_size, -1)
+                self.report['drift'][field] = network.to_numpy((errors ** 2).mean(dim=(1, 2)).sqrt())
+
+        return trajectories
+
+    def __normalize(self, field: str, data: Tensor) -> Tensor:
+        """
+        Normalize a batched field following the standard score of the Database.
+
+        :param field: Name of the field.
+        :param data: Batched field.
+        """
+
+        if field in self.__normalization:
+            mean, std = self.__normalization[field]
+            return (data - mean) / std
+        return data
+
+    def __denormalize(self, field: str, data: Tensor) -> Tensor:
+        """
+        Unapply the normalization of a batched field.
+
+        :param field: Name of the field.
+        :param data: Normalized batched field.
+        """
+
+        if field in self.__normalization:
+            mean, std = self.__normalization[field]
+            return data * std + mean
+        return data
+
+    def __str__(self) -> str:
+
+        description = "\n"
+        description += f"# {self.__class__.__name__}\n"
+        if len(self.report) > 0:
+            description += f"    Rollout: {self.report['nb_steps']} steps of {self.report['batch_size']} states in " \
+                           f"{self.report['time']:.3f}s ({self.report['steps_per_second']:.1f} steps/s, " \
+                           f"{self.report['samples_per_second']:.1f} states/s)\n"
+            for field, drift in self.report['drift'].items():
+                description += f"    Drift of '{field}': {drift[0]:.3e} (first step), {drift.mean():.3e} (mean), " \
+                               f"{drift[-1]:.3e} (last step)\n"
+        return description
@@ -0,0 +1,324 @@
+from typing import Deque, Dict, List, Tuple, Union
+from argparse import ArgumentParser
+from importlib import import_module
+from os import remove
+from os.path import exists
+from socket import socket, AF_UNIX, SOCK_STREAM
+from select import select
+from threading import Thread, Lock
+from collections import deque
+from time import time
+from json import loads
+from numpy import ndarray, percentile
+
+from DeepPhysX.simulation.multiprocess.tcpip_object import TcpIpObject
+from DeepPhysX.database.database_manager import DatabaseManager
+from DeepPhysX.networks.network_manager import NetworkManager
+from DeepPhysX.networks.prediction_batcher import PredictionBatcher
+
+# Address of a prediction server: path of a Unix socket or (host, port)
+Address = Union[str, Tuple[str, int]]
+
+
+class PredictionServer(TcpIpObject):
+
+    def __init__(self,
+                 network_manager: NetworkManager,
+                 address: Address = ('localhost', 10000),
+                 max_batch_size: int = 8,
+                 window: float = 0.002,
+                 max_client_count: int = 64,
+                 history_size: int = 10000):
+        """
+        PredictionServer serves the predictions of a trained Network to external processes with the DeepPhysX binary
+        protocol. Each client is handled in its own thread and the concurrent requests are computed in batches.
+
+        :param network_manager: Manager of the trained Network (initialized and connected to its Database to get the
+                                normalization coefficients).
+        :param address: Path of a Unix socket or (host, port) of a TCP socket to listen on.
+        :param max_batch_size: Maximum number of concurrent requests computed in a single forward pass.
+        :param window: Maximum time (in seconds) to wait for concurrent requests.
+        :param max_client_count: Maximum number of pending connections.
+        :param history_size: Number of latencies kept to compute the percentiles.
+        """
+
+        super(PredictionServer, self).__init__()
+        self.command_dict['stats'] = b'stat'
+
+        # Bind to server address
+        self.address: Address = address
+        if isinstance(address, str):
+            self.sock.close()
+            if exists(address):
+                remove(address)
+            self.sock = socket(AF_UNIX, SOCK_STREAM)
+            self.sock.bind(address)
+        else:
+            self.ip_address, self.port = address
+            self.sock.bind(address)
+            self.port = self.sock.getsockname()[1]
+        self.sock.listen(max_client_count)
+
+        # Batch the concurrent requests
+        self.network_manager: NetworkManager = network_manager
+        self.batcher: PredictionBatcher = PredictionBatcher(
+            predict_fnc=self.network_manager.get_predictions_from_samples,
+            max_batch_size=max_batch_size,
+            window=window)
+
+        # Clients variables
+        self.__running: bool = True
+        self.__nb_clients: int = 0
+
+        # Latencies of the requests
+        self.__lock: Lock = Lock()
+        self.__latencies: Deque[float] = deque(maxlen=history_size)
+
+    def warm_up(self,
+                samples: List[Dict[str, ndarray]],
+                nb_iterations: int = 10) -> None:
+        """
+        Compute a few predictions before serving the clients so that the first requests do not pay for the
+        initialization of the inference backend (compilation, memory allocations).
+
+        :param samples: Samples to predict (forward fields).
+        :param nb_iterations: Number of predictions of single samples and of full batches.
+        """
+
+        if len(samples) == 0:
+            return
+        start = time()
+        for _ in range(nb_iterations):
+            self.network_manager.get_predictions_from_samples(samples=samples[:1])
+            self.network_manager.get_predictions_from_samples(samples=samples[:self.batcher.max_batch_size])
+        print(f"[{self.__class__.__name__}] Warm-up done in {time() - start:.2f}s.")
+
+    def serve_forever(self) -> None:
+        """
+        Accept the clients until the server is closed.
+        """
+
+        print(f"[{self.__class__.__name__}] Serving predictions on "
+              f"{self.address if isinstance(self.address, str) else f'{self.ip_address}:{self.port}'}.")
+        while self.__running:
+
+            # Wait for a new connection
+            readable, _, _ = select([self.sock], [], [], 0.5)
+            if len(readable) == 0 or not self.__running:
+                continue
+            client, _ = self.sock.accept()
+            client.setblocking(True)
+
+            # Handle the client in its own thread
+            self.__nb_clients += 1
+            Thread(target=self.__serve_client, args=(client, self.__nb_clients), daemon=True).start()
+
+    def __serve_client(self,
+                       client: socket,
+                       client_id: int) -> None:
+        """
+        Answer the requests of a client until it exits.
+
+        :param client: Socket of the client.
+        :param client_id: Index of the client.
+        """
+
+        print(f"[{self.__class__.__name__}] Client n°{client_id} connected.")
+        with client:
+            while self.__running:
+                try:
+                    cmd = self.receive_data(sender=client)
+
+                    # Prediction request: forward fields of a sample
+                    if cmd == self.command_dict['prediction']:
+                        data = self.receive_dict(sender=client)
+                        start = time()
+                        try:
+                            prediction = self.batcher.submit(data)
+                        except Exception as error:
+                            prediction = {'::error::': str(error)}
+                        self.send_unnamed_dict(dict_to_send=prediction, receiver=client)
+                        with self.__lock:
+                            self.__latencies.append(time() - start)
+
+                    # Statistics request
+                    elif cmd == self.command_dict['stats']:
+                        self.send_unnamed_dict(dict_to_send=self.summary(), receiver=client)
+
+                    # Exit request
+                    elif cmd == self.command_dict['exit']:
+                        break
+
+                except (ConnectionError, OSError):
+                    break
+        print(f"[{self.__class__.__name__}] Client n°{client_id} disconnected.")
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Get the statistics of the served requests: number of requests and batches, mean batch size and latencies
+        percentiles (s).
+        """
+
+        with self.__lock:
+            latencies = list(self.__latencies)
+        summary = {'nb_requests': self.batcher.nb_requests,
+                   'nb_batches': self.batcher.nb_batches,
+                   'mean_batch_size': self.batcher.mean_batch_size}
+        for p in (50, 90, 99):
+            summary[f'latency_p{p}'] = float(percentile(latencies, p)) if len(latencies) > 0 else 0.
+        return summary
+
+    def close(self) -> None:
+        """
+        Stop serving and close the socket.
+        """
+
+        self.__running = False
+        self.sock.close()
+        if isinstance(self.address, str) and exists(self.address):
+            remove(self.address)
+        print(self)
+
+    def __str__(self) -> str:
+
+        summary = self.summary()
+        description = "\n"
+        description += f"# {self.__class__.__name__}\n"
+        description += f"    Requests: {summary['nb_requests']} in {summary['nb_batches']} batches " \
+                       f"(mean batch size {summary['mean_batch_size']:.2f})\n"
+        description += f"    Latency: {summary['latency_p50'] * 1e3:.2f}ms (p50), " \
+                       f"{summary['latency_p90'] * 1e3:.2f}ms (p90), {summary['latency_p99'] * 1e3:.2f}ms (p99)\n"
+        return description
+
+
+class PredictionClient(TcpIpObject):
+
+    def __init__(self, address: Address = ('localhost', 10000)):
+        """
+        PredictionClient requests predictions to a running PredictionServer.
+
+        :param address: Path of the Unix socket or (host, port) of the TCP socket of the server.
+        """
+
+        super(PredictionClient, self).__init__()
+        self.command_dict['stats'] = b'stat'
+
+        # Connect to the server
+        if isinstance(address, str):
+            self.sock.close()
+            self.sock = socket(AF_UNIX, SOCK_STREAM)
+        self.sock.connect(address)
+
+    def predict(self, **kwargs) -> Dict[str, ndarray]:
+        """
+        Request the prediction of a sample.
+
+        :param kwargs: Forward fields of the sample.
+        :return: Backward fields predicted for the sample.
+        """
+
+        self.send_command_prediction()
+        self.send_unnamed_dict(dict_to_send=kwargs)
+        prediction = self.receive_dict()
+        if '::error::' in prediction:
+            raise ValueError(f"[{self.__class__.__name__}] The server failed to compute the prediction: "
+                             f"{prediction['::error::']}")
+        return prediction
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get the statistics of the server (see 'PredictionServer.summary').
+        """
+
+        self.send_data(data_to_send=self.command_dict['stats'])
+        return self.receive_dict()
+
+    def close(self) -> None:
+        """
+        Disconnect from the server.
+        """
+
+        try:
+            self.send_command_exit()
+        except (ConnectionError, OSError):
+            pass
+        self.sock.close()
+
+
+def serve() -> None:
+    """
+    Serve the predictions of the network of a training session.
+    Usage: python -m DeepPhysX.networks.serve --session <path> --architecture <module.Class> --network-kwargs <json>
+           --forward <fields> --backward <fields> [--unix <path> | --host <host> --port <port>]
+    """
+
+    parser = ArgumentParser(prog='python -m DeepPhysX.networks.serve',
+                            description='Serve the predictions of a trained DeepPhysX network.')
+    parser.add_argument('--session', required=True,
+                        help='Path to the training session.')
+    parser.add_argument('--architecture', required=True, metavar='MODULE.CLASS',
+                        help='Network architecture (e.g. DeepPhysX.networks.architectures.mlp.MLP).')
+    parser.add_argument('--network-kwargs', default='{}', metavar='JSON',
+                        help='Kwargs to create an instance of the network architecture.')
+    parser.add_argument('--forward', nargs='+', required=True,
+                        help='Data fields used to fill the forward function of the network.')
+    parser.add_argument('--backward', nargs='+', required=True,
+                        help='Data fields predicted by the network.')
+    parser.add_argument('--no-normalize', action='store_true',
+                        help='Do not use the normalization coefficients of the dataset.')
+    parser.add_argument('--unix', default=None, metavar='PATH',
+                        help='Path of the Unix socket to listen on.')
+    parser.add_argument('--host', default='localhost',
+                        help='Address of the TCP socket to listen on.')
+    parser.add_argument('--port', type=int, default=10000,
+                        help='Port of the TCP socket to listen on.')
+    parser.add_argument('--batch-size', type=int, default=8,
+                        help='Maximum number of concurrent requests computed in a single forward pass.')
+    parser.add_argument('--window', type=float, default=0.002,
+                        help='Maximum time (in seconds) to wait for concurrent requests.')
+    parser.add_argument('--backend', default='eager', choices=['eager', 'trace', 'script', 'compile'],
+                        help='Inference backend of the network.')
+    parser.add_argument('--warm-up', type=int, default=10,
+                        help='Number of warm-up predictions computed with the training samples.')
+    args = parser.parse_args()
+
+    # Import the network architecture
+    module_name, class_name = args.architecture.rsplit('.', 1)
+    architecture = getattr(import_module(module_name), class_name)
+
+    # Load the network and the normalization coefficients once
+    database_manager = DatabaseManager(normalize=not args.no_normalize)
+    database_manager.init_prediction_pipeline(session=args.session)
+    network_manager = NetworkManager(network_architecture=architecture,
+                                     network_kwargs=loads(args.network_kwargs),
+                                     data_forward_fields=args.forward,
+                                     data_backward_fields=args.backward,
+                                     inference_backend=args.backend)
+    network_manager.init_prediction_pipeline(session=args.session)
+    network_manager.connect_to_database(database_path=(database_manager.database_dir, 'dataset'),
+                                        normalize_data=database_manager.normalize)
+
+    # Create the server and warm it up with the first training samples
+    server = PredictionServer(network_manager=network_manager,
+                              address=(args.host, args.port) if args.unix is None else args.unix,
+                              max_batch_size=args.batch_size,
+                              window=args.window)
+    database_manager.change_mode('train')
+    if (nb_samples := min(database_manager.nb_lines(), args.batch_size)) > 0 and args.warm_up > 0:
+        lines = database_manager.get_lines(lines_id=list(range(1, nb_samples + 1)), fields=args.forward)
+        server.warm_up(samples=[{field: lines[field][i] for field in args.forward} for i in range(nb_samples)],
+                       nb_iterations=args.warm_up)
+
+    # Serve until interrupted
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        network_manager.close()
+        database_manager.close()
+
+
+if __name__ == '__main__':
+    serve()
@@ -1,10 +1,11 @@
-from typing import Dict, Any, Iterable, Optional
+from typing import Dict, Any, Iterable, Optional, List
 from torch.utils.tensorboard import SummaryWriter
-from tensorboard import program
-from webbrowser import open as w_open
-from numpy import full, inf, array, ndarray, append, concatenate
+from numpy import full, inf, array, ndarray, concatenate, savetxt
+from os import makedirs
 from os.path import join
 
+from DeepPhysX.networks.metrics import MetricsSink, TensorboardSink, MetricsBuffer
+
 
 def generate_default_scene():
     return {'camera': {'cls': 'PerspectiveCamera', 'fov': 75},
@@ -20,30 +21,45 @@ class StatsManager:
 
     def __init__(self,
                  session: str,
-                 keep_losses: bool = False):
+                 keep_losses: bool = False,
+                 sinks: Optional[List[MetricsSink]] = None,
+                 launch_tensorboard: bool = False,
+                 flush_interval: float = 1.):
         """
-        StatsManager records all the given values using the Tensorboard framework.
-        Open a tab in the navigator to inspect these values during the training.
+        StatsManager records all the given values using the Tensorboard framework by default.
+        The scalar values are buffered in memory and written to the sinks by a background thread.
 
         :param session: Path to the session repository.
         :param keep_losses: If True, allow saving loss to .csv file.
+        :param sinks: Backends storing the scalar values (a Tensorboard writer in the stats repository by default).
+        :param launch_tensorboard: If True, launch a Tensorboard server and open a tab in the navigator to inspect the
+                                   values during the training.
+        :param flush_interval: Time (in seconds) between two writes of the buffered values to the sinks.
         """
 
         self.name: str = self.__class__.__name__
 
-        # Init writer
+        # Init sinks (the Tensorboard writer is also used for non-scalar values)
         self.log_dir: str = join(session, 'stats/')
-        self.writer: SummaryWriter = SummaryWriter(self.log_dir)
+        sinks = [TensorboardSink(log_dir=self.log_dir)] if sinks is None else sinks
+        writers = [sink.writer for sink in sinks if isinstance(sink, TensorboardSink)]
+        self.writer: Optional[SummaryWriter] = writers[0] if len(writers) > 0 else None
+        self.sinks: List[MetricsSink] = sinks
+        self.__buffer: MetricsBuffer = MetricsBuffer(sinks=sinks, flush_interval=flush_interval)
 
         # Open Tensorboard
-        tb = program.TensorBoard()
-        tb.configure(argv=[None, '--logdir', self.log_dir, '--load_fast=false'])
-        url = tb.launch()
-        w_open(url)
+        self.launch_tensorboard: bool = launch_tensorboard
+        if launch_tensorboard:
+            from tensorboard import program
+            from webbrowser import open as w_open
+            tb = program.TensorBoard()
+            tb.configure(argv=[None, '--logdir', self.log_dir, '--load_fast=false'])
+            url = tb.launch()
+            w_open(url)
 
         # Values
         self.mean: ndarray = full(4, inf)  # Contains in the 1st dimension the mean, and 2nd the variance of the mean
-        self.train_loss: ndarray = array([])
+        self.train_loss: List[float] = []
         self.keep_losses: bool = keep_losses
         self.tag_dict: Dict[str, int] = {}
 
@@ -56,12 +72,12 @@ class StatsManager:
         """
 
         var = self.update_mean_get_var(0, value, count + 1)
-        self.writer.add_scalar("Train/Batch/Loss", value, count)
-        self.writer.add_scalar("Train/Batch/Mean", self.mean[0], count)
+        self.__buffer.add("Train/Batch/Loss", value, count)
+        self.__buffer.add("Train/Batch/Mean", self.mean[0], count)
         if var is not None:
-            self.writer.add_scalar("Train/Batch/Variance", var, count)
+            self.__buffer.add("Train/Batch/Variance", var, count)
         if self.keep_losses is True:
-            self.train_loss = append(self.train_loss, value)
+            self.train_loss.append(value)
 
     def add_train_epoch_loss(self, value: float, count: int) -> None:
         """
@@ -72,10 +88,10 @@ class StatsManager:
         """
 
         var = self.update_mean_get_var(1, value, count + 1)
-        self.writer.add_scalar("Train/Epoch/Loss", value, count)
-        self.writer.add_scalar("Train/Epoch/Mean", self.mean[1], count)
+        self.__buffer.add("Train/Epoch/Loss", value, count)
+        self.__buffer.add("Train/Epoch/Mean", self.mean[1], count)
         if var is not None:
-            self.writer.add_scalar("Train/Epoch/Variance", var, count)
+            self.__buffer.add("Train/Epoch/Variance", var, count)
 
     def add_train_test_batch_loss(self, train_value: float, test_value: float, count: int) -> None:
         """
@@ -86,6 +102,8 @@ class StatsManager:
         :param int count: ID of the value
         """
 
+        if self.writer is None:
+            return
         if train_value is not None:
             self.writer.add_scalars("Combined/Batch/Loss", {'Train': train_value}, count)
         if test_value is not None:
@@ -101,6 +119,8 @@ class StatsManager:
         :param Iterable counts: ID of the plots
         """
 
+        if self.writer is None:
+            return
         for t, v, c in zip(tags, values, counts):
             self.writer.add_scalars(graph_name, {t: v}, c)
 
@@ -113,10 +133,10 @@ class StatsManager:
         """
 
         var = self.update_mean_get_var(2, value, count + 1)
-        self.writer.add_scalar("Test/Valid/Loss", value, count)
-        self.writer.add_scalar("Test/Valid/Mean", self.mean[2], count)
+        self.__buffer.add("Test/Valid/Loss", value, count)
+        self.__buffer.add("Test/Valid/Mean", self.mean[2], count)
         if var is not None:
-            self.writer.add_scalar("Test/Valid/Variance", var, count)
+            self.__buffer.add("Test/Valid/Variance", var, count)
 
     def add_test_loss_OOB(self, value: float, count: int) -> None:
         """
@@ -127,10 +147,10 @@ class StatsManager:
         """
 
         var = self.update_mean_get_var(3, value, count + 1)
-        self.writer.add_scalar("Test/Out-of-boundaries/Loss", value, count)
-        self.writer.add_scalar("Test/Out-of-boundaries/Mean", self.mean[3], count)
+        self.__buffer.add("Test/Out-of-boundaries/Loss", value, count)
+        self.__buffer.add("Test/Out-of-boundaries/Mean", self.mean[3], count)
         if var is not None:
-            self.writer.add_scalar("Test/Out-of-boundaries/Variance", var, count)
+            self.__buffer.add("Test/Out-of-boundaries/Variance", var, count)
 
     def add_custom_scalar(self, tag: str, value: float, count: int) -> None:
         """
@@ -141,7 +161,37 @@ class StatsManager:
         :param int count: ID of the value
         """
 
-        self.writer.add_scalar(tag, value, count)
+        self.__buffer.add(tag, value, count)
+
+    def add_custom_histogram(self, tag: str, values: ndarray, count: int) -> None:
+        """
+        Add a histogram of values to tensorboard framework.
+
+        :param str tag: Graph name
+        :param ndarray values: Values to store
+        :param int count: ID of the values
+        """
+
+        if self.writer is not None:
+            self.writer.add_histogram(tag, values, count)
+
+    def add_clients_telemetry(self, telemetry: Any, count: int) -> None:
+        """
+        Add the telemetry of the simulation clients to tensorboard framework.
+
+        :param ClientTelemetry telemetry: Telemetry of the SimulationManager
+        :param int count: ID of the values
+        """
+
+        for client_id, client in telemetry.summary().items():
+            tag = f'Clients/n°{client_id}'
+            self.__buffer.add(f'{tag}/Samples', client['nb_samples'], count)
+            self.__buffer.add(f'{tag}/Step time (ms)', client['step_time'] * 1e3, count)
+            self.__buffer.add(f'{tag}/Max step time (ms)', client['max_step_time'] * 1e3, count)
+            self.__buffer.add(f'{tag}/Rejection rate', client['rejection_rate'], count)
+            self.__buffer.add(f'{tag}/DB write (ms)', client['db_write_time'] * 1e3, count)
+            self.__buffer.add(f'{tag}/Prediction (ms)', client['prediction_time'] * 1e3, count)
+        self.__buffer.add('Clients/Stalled', len(telemetry.stalled_clients()), count)
 
     def add_custom_scalar_full(self, tag: str, value: float, count: int) -> None:
         """
@@ -157,10 +207,10 @@ class StatsManager:
         except KeyError:
             self.tag_dict[tag] = len(self.tag_dict) + 4  # Size of self.mean at the initialization
         var = self.update_mean_get_var(self.tag_dict[tag], value, count + 1)
-        self.writer.add_scalar(tag + "/Value", value, count)
-        self.writer.add_scalar(tag + "/Mean", self.mean[self.tag_dict[tag]], count)
+        self.__buffer.add(tag + "/Value", value, count)
+        self.__buffer.add(tag + "/Mean", self.mean[self.tag_dict[tag]], count)
         if var is not None:
-            self.writer.add_scalar(tag + "/Variance", var, count)
+            self.__buffer.add(tag + "/Variance", var, count)
 
     def update_mean_get_var(self, index: int, value: float, count: int) -> Optional[ndarray]:
         """
@@ -197,6 +247,8 @@ class StatsManager:
         :param Optional[Dict[Any, Any]] config_dict: Dictionary with ThreeJS classes names and configuration.
         """
 
+        if self.writer is None:
+            return
         if config_dict is None:
             config_dict = {**generate_default_scene(), **generate_default_material()}
         # Information should be written using (Batch, number of vertex, 3) as shape. Hence, if not we emulate it
@@ -224,6 +276,8 @@ class StatsManager:
         :param Optional[Dict[Any, Any]] config_dict: Dictionary with ThreeJS classes names and configuration.
         """
 
+        if self.writer is None:
+            return
         if config_dict is None:
             config_dict = {**generate_default_scene(), **generate_default_material()}
         # Information should be written using (Batch, number of vertex, 3) as shape. Hence, if not we emulate it
@@ -250,6 +304,8 @@ class StatsManager:
         :param bool save_gradients: If True will save gradient to tensorboard
         """
 
+        if self.writer is None:
+            return
         for tag, value in network.named_parameters():
             tag = tag.replace('.', '/')
             if save_weights:
@@ -262,7 +318,11 @@ class StatsManager:
         Launch the closing procedure of the StatsManager.
         """
 
-        self.writer.close()
+        self.__buffer.close()
+        if self.keep_losses:
+            # The directory is only created by the Tensorboard sink
+            makedirs(self.log_dir, exist_ok=True)
+            savetxt(join(self.log_dir, 'train_loss.csv'), array(self.train_loss), delimiter=',')
         del self.train_loss
 
     def __str__(self):
@@ -270,6 +330,7 @@ class StatsManager:
         description = "\n"
         description += f"# {self.name}\n"
         description += f"    Stats repository: {self.log_dir}\n"
+        description += f"    Metrics sinks: {', '.join(sink.__class__.__name__ for sink in self.sinks)}\n"
         description += f"    Store losses as CSV: {self.keep_losses}\n"
         if self.keep_losses:
             description += f"    CSV file path: {self.log_dir}\n"
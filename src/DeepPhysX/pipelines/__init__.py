@@ -1,3 +1,4 @@
 from DeepPhysX.pipelines.data_pipeline import DataPipeline
 from DeepPhysX.pipelines.training_pipeline import TrainingPipeline
-from DeepPhysX.pipelines.prediction_pipeline import PredictionPipeline, SofaPredictionPipeline
\ No newline at end of file
+from DeepPhysX.pipelines.prediction_pipeline import PredictionPipeline, SofaPredictionPipeline
+from DeepPhysX.pipelines.batch_prediction_pipeline import BatchPredictionPipeline
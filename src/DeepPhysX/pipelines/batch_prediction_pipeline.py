@@ -0,0 +1,139 @@
+from typing import Dict, List, Optional
+from os.path import join, exists
+from time import time
+from numpy import ndarray
+from vedo import ProgressBar
+
+from DeepPhysX.database.database_manager import DatabaseManager
+from DeepPhysX.networks.network_manager import NetworkManager
+from DeepPhysX.utils.path import get_session_dir
+from DeepPhysX.utils.tracer import tracer
+
+
+class BatchPredictionPipeline:
+
+    def __init__(self,
+                 network_manager: NetworkManager,
+                 database_manager: DatabaseManager,
+                 session_dir: str = 'sessions',
+                 session_name: str = 'training',
+                 mode: str = 'test',
+                 batch_size: int = 256,
+                 output_database: Optional[str] = 'predictions',
+                 compute_errors: bool = True,
+                 trace: bool = False):
+        """
+        BatchPredictionPipeline computes the predictions of a Network for all the samples of a Database Table,
+        without any simulation. The samples are predicted by batches and the predictions are written in bulk.
+
+        :param network_manager: Manager for the neural Network.
+        :param database_manager: Manager for the Database.
+        :param session_dir: Path to the directory that contains the DeepPhysX session repositories.
+        :param session_name: Name of the current session repository.
+        :param mode: Table of the samples to predict, either 'train', 'test' or 'run'.
+        :param batch_size: Number of samples to predict per batch.
+        :param output_database: Name of the Database of the predictions in the dataset repository. If None, the
+                                predictions are written as new fields of the Table of the samples.
+        :param compute_errors: If True, the squared error of each sample is computed for each predicted field stored
+                               in the Table.
+        :param trace: If True, the timeline of the stages of the pipeline is written as a Chrome trace in the session
+                      repository.
+        """
+
+        # Define the session repository
+        self.session_dir = get_session_dir(session_dir, False)
+        if not exists(path := join(self.session_dir, session_name)):
+            raise ValueError(f"[{self.__class__.__name__}] The following directory does not exist: {path}")
+        if mode not in ('train', 'test', 'run'):
+            raise ValueError(f"[{self.__class__.__name__}] Unknown mode '{mode}', available modes are 'train', "
+                             f"'test' and 'run'.")
+
+        # Trace the stages of the pipeline
+        self.trace = trace
+        if self.trace:
+            tracer.enable(trace_file=join(path, 'trace.json'))
+
+        # Create a DatabaseManager
+        self.database_manager = database_manager
+        self.database_manager.init_prediction_pipeline(session=path)
+        self.database_manager.change_mode(mode)
+
+        # Create a NetworkManager
+        self.network_manager = network_manager
+        self.network_manager.init_prediction_pipeline(session=path)
+        self.network_manager.connect_to_database(database_path=(self.database_manager.database_dir, 'dataset'),
+                                                 normalize_data=self.database_manager.normalize)
+
+        # Prediction variables
+        self.mode = mode
+        self.batch_size = max(batch_size, 1)
+        self.output_database = output_database
+        self.error_fields: List[str] = [field for field in self.network_manager.data_backward_fields
+                                        if compute_errors and field in self.database_manager.json_content['fields']]
+        self.errors: Dict[str, float] = {}
+
+    def execute(self) -> None:
+        """
+        Launch the batch prediction Pipeline.
+        """
+
+        nb_samples = self.database_manager.nb_lines()
+        nb_batches = (nb_samples + self.batch_size - 1) // self.batch_size
+        progress_bar = ProgressBar(start=0, stop=max(nb_batches, 1), c='orange', title="Batch Prediction")
+        errors = {field: 0. for field in self.error_fields}
+        start = time()
+
+        for first_line in range(1, nb_samples + 1, self.batch_size):
+            lines_id = list(range(first_line, min(first_line + self.batch_size, nb_samples + 1)))
+
+            # Predict the batch
+            predictions = self.network_manager.get_prediction_from_lines(lines_id=lines_id, table_name=self.mode)
+            data = {f'{field}_prediction': value for field, value in predictions.items()}
+
+            # Compute the error of each sample
+            if len(self.error_fields) > 0:
+                ground_truth = self.database_manager.get_lines(lines_id=lines_id, fields=self.error_fields)
+                for field in self.error_fields:
+                    data[f'{field}_error'] = self.__squared_errors(prediction=predictions[field],
+                                                                   ground_truth=ground_truth[field])
+                    errors[field] += data[f'{field}_error'].sum()
+
+            # Write the batch of predictions
+            self.database_manager.add_predictions(lines_id=lines_id, data=data, database_name=self.output_database)
+            progress_bar.print()
+
+        # Summary
+        elapsed = time() - start
+        self.errors = {field: error / max(nb_samples, 1) for field, error in errors.items()}
+        print(f"[{self.__class__.__name__}] {nb_samples} samples predicted in {elapsed:.2f}s "
+              f"({nb_samples / max(elapsed, 1e-9):.1f} samples/s).")
+        for field, error in self.errors.items():
+            print(f"[{self.__class__.__name__}] Mean squared error of '{field}': {error:.6e}")
+
+        # Close managers
+        self.database_manager.close()
+        self.network_manager.close()
+        if self.trace:
+            tracer.close()
+
+    @staticmethod
+    def __squared_errors(prediction: ndarray,
+                         ground_truth: ndarray) -> ndarray:
+        """
+        Compute the mean squared error of each sample of a batch.
+
+        :param prediction: Batch of predictions.
+        :param ground_truth: Batch of ground truth values.
+        """
+
+        return ((prediction - ground_truth.reshape(prediction.shape)) ** 2).reshape(len(prediction), -1).mean(axis=1)
+
+    def __str__(self):
+
+        description = "\n"
+        description += f"# {self.__class__.__name__}\n"
+        description += f"    Session repository: {self.session_dir}\n"
+        description += f"    Predicted Table: {self.mode}\n"
+        description += f"    Batch size: {self.batch_size}\n"
+        description += f"    Predictions: {self.output_database if self.output_database else 'fields of the Table'}\n"
+        return description
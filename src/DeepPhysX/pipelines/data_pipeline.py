@@ -1,9 +1,12 @@
+from typing import Optional
 from os.path import join, sep, exists
 from vedo import ProgressBar
 
 from DeepPhysX.database.database_manager import DatabaseManager
 from DeepPhysX.simulation.simulation_manager import SimulationManager
 from DeepPhysX.utils.path import create_dir, get_session_dir
+from DeepPhysX.utils.resources import ResourcePlanner
+from DeepPhysX.utils.tracer import tracer
 
 
 class DataPipeline:
@@ -15,7 +18,9 @@ class DataPipeline:
                  session_dir: str = 'sessions',
                  session_name: str = 'data_generation',
                  batch_nb: int = 0,
-                 batch_size: int = 0):
+                 batch_size: int = 0,
+                 resource_planner: Optional[ResourcePlanner] = None,
+                 trace: bool = False):
         """
         DataPipeline implements the main loop that produces data from a numerical simulation.
 
@@ -26,6 +31,9 @@ class DataPipeline:
         :param session_name: Name of the current session repository.
         :param batch_nb: Number of batches to produce.
         :param batch_size: Number of samples to produce per batch.
+        :param resource_planner: Partition of the CPU cores between the processes.
+        :param trace: If True, the timeline of the stages of the pipeline is written as a Chrome trace in the session
+                      repository.
         """
 
         # Create a new session if required
@@ -35,6 +43,11 @@ class DataPipeline:
             session_name = create_dir(session_dir=session_dir,
                                       session_name=session_name).split(sep)[-1]
 
+        # Trace the stages of the pipeline (before the simulations are launched)
+        self.__trace = trace
+        if self.__trace:
+            tracer.enable(trace_file=join(session_dir, session_name, 'trace.json'))
+
         # Create a DatabaseManager
         self.database_manager = database_manager
         self.database_manager.init_data_pipeline(session=join(session_dir, session_name),
@@ -42,7 +55,10 @@ class DataPipeline:
 
         # Create a SimulationManager
         self.simulation_manager = simulation_manager
-        self.simulation_manager.init_data_pipeline(batch_size=batch_size)
+        self.simulation_manager.init_data_pipeline(batch_size=batch_size,
+                                                   resource_planner=resource_planner)
+        if resource_planner is not None:
+            resource_planner.apply_trainer()
         self.simulation_manager.connect_to_database(database_path=(self.database_manager.database_dir, 'dataset'),
                                                     normalize_data=self.database_manager.normalize)
 
@@ -72,9 +88,11 @@ class DataPipeline:
             batch_id += 1
             self.__progress_bar.print()
 
-        # Close managers
-        self.database_manager.close()
+        # Close managers (simulations are closed first to stop any run-ahead production)
         self.simulation_manager.close()
+        self.database_manager.close()
+        if self.__trace:
+            tracer.close()
 
     def __str__(self):
 
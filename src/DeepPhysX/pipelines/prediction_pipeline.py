@@ -5,6 +5,7 @@ from DeepPhysX.simulation.simulation_manager import SimulationManager
 from DeepPhysX.database.database_manager import DatabaseManager
 from DeepPhysX.networks.network_manager import NetworkManager
 from DeepPhysX.utils.path import get_session_dir
+from DeepPhysX.utils.tracer import tracer
 
 try:
     import Sofa
@@ -22,7 +23,9 @@ class PredictionPipeline:
                  session_dir: str = 'sessions',
                  session_name: str = 'training',
                  step_nb: int = -1,
-                 record: bool = False):
+                 record: bool = False,
+                 async_prediction: bool = False,
+                 trace: bool = False):
         """
         PredictionPipeline implements the main loop that uses a Network predictions in the numerical Simulation.
 
@@ -33,6 +36,10 @@ class PredictionPipeline:
         :param session_name: Name of the current session repository.
         :param step_nb: Number of step of predictions tu run (set to -1 for infinite).
         :param record: Save the produced samples in the Database.
+        :param async_prediction: If True, the predictions are computed in a worker thread and the simulation applies
+                                 the latest completed prediction instead of waiting for the network.
+        :param trace: If True, the timeline of the stages of the pipeline is written as a Chrome trace in the session
+                      repository.
         """
 
         # Define the session repository
@@ -40,6 +47,11 @@ class PredictionPipeline:
         if not exists(path := join(self.session_dir, session_name)):
             raise ValueError(f"[{self.__class__.__name__}] The following directory does not exist: {path}")
 
+        # Trace the stages of the pipeline (before the simulations are launched)
+        self.trace = trace
+        if self.trace:
+            tracer.enable(trace_file=join(path, 'trace.json'))
+
         # Create a DatabaseManager
         self.database_manager = database_manager
         self.database_manager.init_prediction_pipeline(session=join(self.session_dir, session_name))
@@ -56,6 +68,8 @@ class PredictionPipeline:
         self.network_manager.connect_to_database(database_path=(self.database_manager.database_dir, 'dataset'),
                                                  normalize_data=self.database_manager.normalize)
         self.simulation_manager.connect_to_network_manager(network_manager=self.network_manager)
+        if async_prediction:
+            self.simulation_manager.start_async_prediction()
 
         # Prediction variables
         self.step_nb = step_nb
@@ -93,6 +107,8 @@ class PredictionPipeline:
         self.simulation_manager.close()
         self.database_manager.close()
         self.network_manager.close()
+        if self.trace:
+            tracer.close()
 
     def __str__(self):
 
@@ -113,6 +129,8 @@ class SofaPredictionPipeline(Sofa.Core.Controller, PredictionPipeline):
                  session_name: str = 'training',
                  step_nb: int = -1,
                  record: bool = False,
+                 async_prediction: bool = False,
+                 trace: bool = False,
                  *args, **kwargs):
         """
         SofaPredictionPipeline allows to run the main prediction loop in a SOFA GUI.
@@ -124,6 +142,10 @@ class SofaPredictionPipeline(Sofa.Core.Controller, PredictionPipeline):
         :param session_name: Name of the current session repository.
         :param step_nb: Number of step of predictions tu run (set to -1 for infinite).
         :param record: Save the produced samples in the Database.
+        :param async_prediction: If True, the predictions are computed in a worker thread and the simulation applies
+                                 the latest completed prediction instead of waiting for the network.
+        :param trace: If True, the timeline of the stages of the pipeline is written as a Chrome trace in the session
+                      repository.
         """
 
         Sofa.Core.Controller.__init__(self, name='DPX_Pipeline', *args, **kwargs)
@@ -135,7 +157,9 @@ class SofaPredictionPipeline(Sofa.Core.Controller, PredictionPipeline):
                                     session_dir=session_dir,
                                     session_name=session_name,
                                     step_nb=step_nb,
-                                    record=record)
+                                    record=record,
+                                    async_prediction=async_prediction,
+                                    trace=trace)
 
         # Get the simulation root node and add the pipeline to trigger the event bellow
         self.root: Sofa.Core.Node = self.simulation_manager.simulation_controller.simulation.root
@@ -157,6 +181,8 @@ class SofaPredictionPipeline(Sofa.Core.Controller, PredictionPipeline):
         self.simulation_manager.close()
         self.database_manager.close()
         self.network_manager.close()
+        if self.trace:
+            tracer.close()
 
     def onAnimateEndEvent(self, event):
         """
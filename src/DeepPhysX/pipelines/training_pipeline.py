@@ -1,6 +1,7 @@
 from typing import Optional, Type, Dict, Any, Callable
 from os.path import join, isfile, exists, sep
 from datetime import datetime
+from time import time
 from vedo import ProgressBar
 from torch.nn import Module
 from torch.optim import Optimizer
@@ -10,6 +11,10 @@ from DeepPhysX.networks.network_manager import NetworkManager
 from DeepPhysX.networks.stats_manager import StatsManager
 from DeepPhysX.simulation.simulation_manager import SimulationManager
 from DeepPhysX.utils.path import create_dir, get_session_dir
+from DeepPhysX.utils.resources import ResourcePlanner
+from DeepPhysX.utils.tracer import tracer
+from DeepPhysX.utils.distributed import init_distributed, close_distributed, get_rank, get_world_size, barrier, \
+    broadcast_object
 
 
 class TrainingPipeline:
@@ -29,7 +34,14 @@ class TrainingPipeline:
                  batch_nb: int = 0,
                  batch_size: int = 0,
                  use_tensorboard: bool = True,
-                 save_intermediate_state_every: int = 0):
+                 save_intermediate_state_every: int = 0,
+                 resource_planner: Optional[ResourcePlanner] = None,
+                 distributed: bool = False,
+                 overlap_simulation: bool = False,
+                 max_staleness: int = 1,
+                 stream_data: bool = False,
+                 persist_streamed_data: bool = True,
+                 trace: bool = False):
         """
         TrainingPipeline implements the main loop that trains a neural network from simulation data.
         Data can be pre-computed or generated on the fly.
@@ -49,30 +61,83 @@ class TrainingPipeline:
         :param batch_size: Number of samples to produce per batch.
         :param use_tensorboard: If True, display training curves in tensorboard.
         :param save_intermediate_state_every: Save the Network state periodically if > 1.
+        :param resource_planner: Partition of the CPU cores between the training and the simulation processes.
+        :param distributed: If True, the pipeline joins the process group it was launched in (see the launcher in
+                            'DeepPhysX.utils.distributed') for a data parallel offline training: each process trains
+                            on its own shard of the Database with batches of 'batch_size' samples.
+        :param overlap_simulation: If True, the simulations produce the next batches in the background while the
+                                   current batch is optimized (online training only).
+        :param max_staleness: Maximum number of batches produced ahead of the optimized batch with the overlapped
+                              production, the predictions requested by the simulations can thus be computed by a
+                              network that is up to 'max_staleness' optimization steps behind.
+        :param stream_data: If True, the produced samples are sent to the network in memory instead of being read back
+                            from the Database (online training only).
+        :param persist_streamed_data: If True, the streamed samples are written in the Database in the background,
+                                      otherwise they are only used once (requires 'always_produce' simulations).
+        :param trace: If True, the time spent in each stage of the pipeline is reported in the StatsManager at each
+                      epoch and the timeline is written as a Chrome trace in the session repository.
         """
 
-        # Create a new session if required
+        # Join the process group of the data parallel training
+        if distributed:
+            init_distributed()
+        self.rank, self.world_size = get_rank(), get_world_size()
+        if self.world_size > 1 and (simulation_manager is not None or database_manager.existing_dir is None):
+            raise ValueError(f"[{self.__class__.__name__}] The data parallel training is only available for offline "
+                             f"training, an existing Database must be used without any SimulationManager.")
+
+        if overlap_simulation and (simulation_manager is None or database_manager.existing_dir is not None):
+            raise ValueError(f"[{self.__class__.__name__}] The overlapped production is only available for online "
+                             f"training, a SimulationManager must be used to produce a new Database.")
+
+        if stream_data and (simulation_manager is None or database_manager.existing_dir is not None):
+            raise ValueError(f"[{self.__class__.__name__}] The streaming mode is only available for online training, "
+                             f"a SimulationManager must be used to produce a new Database.")
+        if stream_data and not persist_streamed_data and not simulation_manager.always_produce:
+            raise ValueError(f"[{self.__class__.__name__}] The streamed samples must be persisted to be used after the "
+                             f"first epoch, use 'persist_streamed_data' or an 'always_produce' SimulationManager.")
+
+        # Create a new session if required (by the main process only)
         self.session_dir = get_session_dir(session_dir, new_session)
         if not new_session:
             new_session = not exists(join(self.session_dir, session_name))
-        if new_session:
+        if new_session and self.rank == 0:
             session_name = create_dir(session_dir=self.session_dir,
                                       session_name=session_name).split(sep)[-1]
+        session_name, seed = broadcast_object((session_name, int(datetime.now().timestamp())))
         self.produce_data = database_manager.existing_dir is None
 
+        # Trace the stages of the pipeline (before the simulations are launched)
+        self.trace = trace and self.rank == 0
+        if self.trace:
+            tracer.enable(trace_file=join(self.session_dir, session_name, 'trace.json'))
+
+        # The main process initializes the session repository before the other processes
+        if self.rank > 0:
+            barrier()
+
         # Create a DatabaseManager
         self.database_manager = database_manager
         self.database_manager.init_training_pipeline(session=join(self.session_dir, session_name),
                                                      new_session=new_session,
-                                                     produce_data=self.produce_data)
+                                                     produce_data=self.produce_data,
+                                                     rank=self.rank,
+                                                     world_size=self.world_size,
+                                                     seed=seed,
+                                                     stream_data=stream_data,
+                                                     persist_data=persist_streamed_data)
+        if self.rank == 0:
+            barrier()
 
         # Create a SimulationManager
         self.simulation_manager = None
         if simulation_manager is not None:
             self.simulation_manager = simulation_manager
-            self.simulation_manager.init_training_pipeline(batch_size=batch_size)
+            self.simulation_manager.init_training_pipeline(batch_size=batch_size,
+                                                           resource_planner=resource_planner)
             self.simulation_manager.connect_to_database(database_path=(self.database_manager.database_dir, 'dataset'),
-                                                        normalize_data=self.database_manager.normalize)
+                                                        normalize_data=self.database_manager.normalize,
+                                                        stream_data=stream_data)
 
         # Create a NetworkManager
         self.network_manager = network_manager
@@ -82,14 +147,24 @@ class TrainingPipeline:
                                                     optimizer_kwargs=optimizer_kwargs,
                                                     new_session=new_session,
                                                     session=join(self.session_dir, session_name),
-                                                    save_intermediate_state_every=save_intermediate_state_every)
+                                                    save_intermediate_state_every=save_intermediate_state_every,
+                                                    rank=self.rank,
+                                                    world_size=self.world_size)
         self.network_manager.connect_to_database(database_path=(self.database_manager.database_dir, 'dataset'),
                                                  normalize_data=self.database_manager.normalize)
         if self.simulation_manager is not None:
             self.simulation_manager.connect_to_network_manager(network_manager=self.network_manager)
 
+        # Pin the training process to its cores
+        self.resource_planner = resource_planner
+        if self.resource_planner is not None:
+            if self.simulation_manager is None:
+                self.resource_planner.plan(nb_clients=0)
+            self.resource_planner.apply_trainer()
+
         # Create a StatsManager
-        self.stats_manager = StatsManager(session=join(self.session_dir, session_name)) if use_tensorboard else None
+        self.stats_manager = StatsManager(session=join(self.session_dir, session_name)) \
+            if use_tensorboard and self.rank == 0 else None
 
         # Training variables
         self.epoch_nb = epoch_nb
@@ -99,6 +174,9 @@ class TrainingPipeline:
         self.batch_id = 0
         self.nb_samples = batch_nb * batch_size * epoch_nb
         self.loss_dict = None
+        self.overlap_simulation = overlap_simulation
+        self.max_staleness = max_staleness
+        self.stream_data = stream_data
 
         # Progressbar
         self.digits = ['{' + f':0{len(str(self.epoch_nb))}d' + '}',
@@ -111,7 +189,7 @@ class TrainingPipeline:
         # Save info file
         filename = join(join(self.session_dir, session_name), 'info.txt')
         date_time = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
-        if not isfile(filename):
+        if not isfile(filename) and self.rank == 0:
             f = open(filename, "w+")
             # Session description template for user
             f.write("## DeepPhysX Training Session ##\n")
@@ -129,6 +207,8 @@ class TrainingPipeline:
 
             if self.stats_manager is not None:
                 f.write(str(self.stats_manager))
+            if self.resource_planner is not None:
+                f.write(str(self.resource_planner))
             f.close()
 
     def execute(self, user_training_loop: Optional[Callable] = None) -> None:
@@ -137,11 +217,13 @@ class TrainingPipeline:
         """
 
         self.__default_training_loop() if user_training_loop is None else user_training_loop()
-        # Training end
-        for manager in (self.database_manager, self.network_manager, self.stats_manager, self.simulation_manager):
+        # Training end (simulations are closed first to stop any run-ahead production)
+        for manager in (self.simulation_manager, self.database_manager, self.network_manager, self.stats_manager):
             if manager is not None:
                 manager.close()
-
+        if self.trace:
+            tracer.close()
+        close_distributed()
 
     def __default_training_loop(self) -> None:
         """
@@ -161,14 +243,31 @@ class TrainingPipeline:
                 id_epoch, nb_epoch = self.digits[0].format(self.epoch_id + 1), self.digits[0].format(self.epoch_nb)
                 id_batch, nb_batch = self.digits[1].format(self.batch_id + 1), self.digits[1].format(self.batch_nb)
                 self.progress_bar.title = f'Epoch n°{id_epoch}/{nb_epoch} - Batch n°{id_batch}/{nb_batch} '
-                self.progress_bar.print()
+                if self.rank == 0:
+                    self.progress_bar.print()
 
                 # Get data from Environment(s) if used and if the data should be created at this epoch
+                start_time = time()
+                simulation_time = None
+                streamed = False
                 if self.simulation_manager is not None and self.produce_data and \
                         (self.epoch_id == 0 or self.simulation_manager.always_produce):
 
-                    self.data_lines = self.simulation_manager.get_data(animate=True)
-                    self.database_manager.add_data(self.data_lines)
+                    # The next batches are produced while the current batch is optimized
+                    if self.overlap_simulation:
+                        nb_epochs = self.epoch_nb if self.simulation_manager.always_produce else 1
+                        self.simulation_manager.start_prefetch(nb_batches=self.batch_nb * nb_epochs,
+                                                               max_staleness=self.max_staleness)
+                        self.data_lines = self.simulation_manager.get_prefetched_data()
+                    else:
+                        self.data_lines = self.simulation_manager.get_data(animate=True)
+                    # The streamed batches are lists of samples instead of indices of lines
+                    if self.stream_data:
+                        streamed = True
+                        self.database_manager.add_samples(self.data_lines)
+                    else:
+                        self.database_manager.add_data(self.data_lines)
+                    simulation_time = time() - start_time
 
                 # Get data from Dataset
                 else:
@@ -185,10 +284,19 @@ class TrainingPipeline:
                             self.simulation_manager = None
 
                 # Optimize
-                batch_fwd, batch_bwd = self.network_manager.get_data(lines_id=self.data_lines)
-                net_predict = self.network_manager.get_predict(batch_fwd=batch_fwd)
-                loss = self.network_manager.get_loss(net_predict=net_predict, batch_bwd=batch_bwd)
-                self.network_manager.optimize()
+                if streamed:
+                    batch_fwd, batch_bwd = self.network_manager.get_data_from_samples(samples=self.data_lines)
+                else:
+                    batch_fwd, batch_bwd = self.network_manager.get_data(lines_id=self.data_lines)
+                loss = self.network_manager.optimize(batch_fwd=batch_fwd, batch_bwd=batch_bwd)
+
+                # Balance the cores between simulation and training
+                if self.resource_planner is not None and simulation_time is not None:
+                    training_time = time() - start_time - simulation_time
+                    # The overlapped batch was produced while the previous one was optimized, the consumer only waited
+                    if self.overlap_simulation:
+                        simulation_time = self.simulation_manager.prefetch_time
+                    self.resource_planner.record(simulation_time=simulation_time, training_time=training_time)
 
                 # Batch end
                 self.batch_id += 1
@@ -204,7 +312,11 @@ class TrainingPipeline:
                 self.network_manager.reload_normalization()
             if self.stats_manager is not None:
                 self.stats_manager.add_train_epoch_loss(loss, self.epoch_id)
-            self.network_manager.save_network()
+                if self.simulation_manager is not None:
+                    self.stats_manager.add_clients_telemetry(self.simulation_manager.telemetry, self.epoch_id)
+            if self.trace:
+                tracer.report(stats_manager=self.stats_manager, count=self.epoch_id)
+            self.network_manager.save_network(epoch=self.epoch_id, loss=loss)
 
     def __str__(self):
 
@@ -217,4 +329,10 @@ class TrainingPipeline:
         description += f"    Number of samples per epoch: {self.batch_nb * self.batch_size}\n"
         description += f"    Total: Number of batches : {self.batch_nb * self.epoch_nb}\n"
         description += f"           Number of samples : {self.nb_samples}\n"
+        if self.stream_data:
+            description += f"    Streamed samples: True\n"
+        if self.overlap_simulation:
+            description += f"    Overlapped production: max staleness of {self.max_staleness} batches\n"
+        if self.world_size > 1:
+            description += f"    Data parallel processes: {self.world_size}\n"
         return description
@@ -1,32 +1,98 @@
-from os import sep
-from os.path import dirname
-from sys import argv, path
+from typing import Dict, Optional
+from argparse import ArgumentParser
+from sys import argv, modules
+from os import environ
 
-from DeepPhysX.simulation.simulation_controller import Simulation as Simulation
-from DeepPhysX.simulation.multiprocess.tcpip_client import TcpIpClient
+from DeepPhysX.simulation.multiprocess.tcpip_client import TcpIpClient, import_simulation
+from DeepPhysX.utils.tracer import tracer
+
+
+def launch_client(simulation_file: str,
+                  simulation_class: str,
+                  ip_address: str,
+                  port: int,
+                  instance_id: int,
+                  instance_nb: int,
+                  environment: Optional[Dict[str, str]] = None) -> None:
+    """
+    Create, init and run a TcpIpClient. Used as the target of the forked client processes.
+
+    :param simulation_file: Path to the python file that defines the Simulation.
+    :param simulation_class: Name of the Simulation class.
+    :param ip_address: IP address of the server.
+    :param port: Port number of the server.
+    :param instance_id: Index of this instance.
+    :param instance_nb: Number of simultaneously launched instances.
+    :param environment: Environment variables to set in the client process (e.g. thread pools sizes).
+    """
+
+    # Forked processes inherit the environment of the forkserver, thread pools must be limited here
+    if environment is not None:
+        environ.update(environment)
+        if 'torch' in modules and 'OMP_NUM_THREADS' in environment:
+            modules['torch'].set_num_threads(int(environment['OMP_NUM_THREADS']))
+        tracer.enable_from_environment()
+
+    client = TcpIpClient(simulation=import_simulation(file_path=simulation_file, class_name=simulation_class),
+                         ip_address=ip_address,
+                         port=port,
+                         instance_id=instance_id,
+                         instance_nb=instance_nb)
+    client.initialize()
+    client.launch()
+
+    # Client is closed at this point
+    print(f"[launcher] Shutting down client {instance_id}")
+
+
+def launch_remote_client() -> None:
+    """
+    Launch a client on this machine that joins a running TcpIpServer.
+    Usage: python -m DeepPhysX.simulation.multiprocess.launcher --connect <host>:<port> [--simulation <file> <class>]
+    """
+
+    parser = ArgumentParser(prog='python -m DeepPhysX.simulation.multiprocess.launcher',
+                            description='Launch a simulation client that joins a running DeepPhysX server.')
+    parser.add_argument('--connect', required=True, metavar='HOST:PORT',
+                        help='Address of the server.')
+    parser.add_argument('--simulation', nargs=2, metavar=('FILE', 'CLASS'), default=None,
+                        help='Simulation to use instead of the one defined by the server.')
+    args = parser.parse_args()
+
+    # Import the simulation class if specified, otherwise the server will define it
+    simulation = None if args.simulation is None else import_simulation(*args.simulation)
+
+    # Create, init and run Tcp-Ip simulation
+    host, port = args.connect.rsplit(':', 1)
+    client = TcpIpClient(simulation=simulation,
+                         ip_address=host,
+                         port=int(port))
+    client.initialize()
+    client.launch()
+
+    # Client is closed at this point
+    print(f"[launcher] Shutting down client {client.simulation_instance[0]}")
 
 
 if __name__ == '__main__':
 
+    # Remote client case
+    if '--connect' in argv:
+        launch_remote_client()
+        exit(0)
+
     # Check script call
     if len(argv) != 7:
         print(f"Usage: python3 {argv[0]} <file_path> <simulation_class> <ip_address> <port> <instance_id> "
               f"<max_instance_count>")
+        print(f"       python3 -m DeepPhysX.simulation.multiprocess.launcher --connect <host>:<port> "
+              f"[--simulation <file_path> <simulation_class>]")
         exit(1)
 
-    # Import simulation_class
-    path.append(dirname(argv[1]))
-    module_name = argv[1].split(sep)[-1][:-3]
-    exec(f"from {module_name} import {argv[2]} as Simulation")
-
     # Create, init and run Tcp-Ip simulation
-    client = TcpIpClient(simulation=Simulation,
-                         ip_address=argv[3],
-                         port=int(argv[4]),
-                         instance_id=int(argv[5]),
-                         instance_nb=int(argv[6]))
-    client.initialize()
-    client.launch()
-
-    # Client is closed at this point
-    print(f"[launcher] Shutting down client {argv[5]}")
+    launch_client(simulation_file=argv[1],
+                  simulation_class=argv[2],
+                  ip_address=argv[3],
+                  port=int(argv[4]),
+                  instance_id=int(argv[5]),
+                  instance_nb=int(argv[6]))
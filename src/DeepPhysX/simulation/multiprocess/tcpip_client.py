@@ -1,14 +1,32 @@
-from typing import Type
+from typing import Type, Optional
 from socket import socket
+from os.path import dirname, basename
+from sys import path
+from importlib import import_module
+from time import perf_counter
 
 from DeepPhysX.simulation.multiprocess.tcpip_object import TcpIpObject
 from DeepPhysX.simulation.simulation_controller import Simulation, SimulationController
+from DeepPhysX.simulation.multiprocess.telemetry import telemetry_record
+from DeepPhysX.utils.tracer import tracer
+
+
+def import_simulation(file_path: str, class_name: str) -> Type[Simulation]:
+    """
+    Import a Simulation class from its python file.
+
+    :param file_path: Path to the python file that defines the Simulation.
+    :param class_name: Name of the Simulation class.
+    """
+
+    path.append(dirname(file_path))
+    return getattr(import_module(basename(file_path)[:-3]), class_name)
 
 
 class TcpIpClient(TcpIpObject):
 
     def __init__(self,
-                 simulation: Type[Simulation],
+                 simulation: Optional[Type[Simulation]],
                  ip_address: str = 'localhost',
                  port: int = 10000,
                  instance_id: int = 0,
@@ -16,10 +34,10 @@ class TcpIpClient(TcpIpObject):
         """
         TcpIpClient is a TcpIpObject which communicate with a TcpIpServer and manages a Simulation to compute data.
 
-        :param simulation: Simulation class.
+        :param simulation: Simulation class (if None, the Simulation defined by the server is imported).
         :param ip_address: IP address of the TcpIpObject.
         :param port: Port number of the TcpIpObject.
-        :param instance_id: Index of this instance.
+        :param instance_id: Index of this instance (0 to let the server assign one).
         :param instance_nb: Number of simultaneously launched instances.
         """
 
@@ -30,12 +48,24 @@ class TcpIpClient(TcpIpObject):
         self.simulation_instance = (instance_id, instance_nb)
         self.simulation_controller: SimulationController
 
+        # Predictions are always computed by the server process
+        self.can_predict_in_process: bool = False
+
+        # Time spent waiting for the predictions of the current sample (sent with the sample telemetry)
+        self.__prediction_time: float = 0.
+
         # Bind to client address and send ID
         self.sock.connect((ip_address, port))
         self.send_labeled_data(data_to_send=instance_id, label="instance_ID",
                                receiver=self.sock, send_read_command=False)
         self.close_client: bool = False
 
+        # Receive the registration from the server
+        self.simulation_instance = (self.receive_data(sender=self.sock), self.receive_data(sender=self.sock))
+        simulation_file, simulation_class = self.receive_data(sender=self.sock), self.receive_data(sender=self.sock)
+        if self.simulation_class is None:
+            self.simulation_class = import_simulation(file_path=simulation_file, class_name=simulation_class)
+
     ###########################
     # Initializing Simulation #
     ###########################
@@ -74,7 +104,9 @@ class TcpIpClient(TcpIpObject):
         # Synchronize Database
         database_path = (self.receive_data(sender=self.sock), self.receive_data(sender=self.sock))
         normalize_data = self.receive_data(sender=self.sock)
-        self.simulation_controller.connect_to_database(database_path=database_path, normalize_data=normalize_data)
+        stream_data = self.receive_data(sender=self.sock)
+        self.simulation_controller.connect_to_database(database_path=database_path, normalize_data=normalize_data,
+                                                       stream_data=stream_data)
         self.send_data(data_to_send='done', receiver=self.sock)
 
     ##################
@@ -114,6 +146,10 @@ class TcpIpClient(TcpIpObject):
         # Close simulation
         self.simulation_controller.close()
 
+        # Write the timeline of the client before the server closes the pipeline
+        if tracer.enabled:
+            tracer.export()
+
         # Confirm exit command to the server
         self.send_command_exit(receiver=self.sock)
 
@@ -131,8 +167,10 @@ class TcpIpClient(TcpIpObject):
         :return: Prediction of the networks.
         """
 
+        start = perf_counter()
         self.send_command_prediction()
         _ = self.receive_data(sender=self.sock)
+        self.__prediction_time += perf_counter() - start
 
     ##################################
     # Actions to perform on commands #
@@ -182,20 +220,43 @@ class TcpIpClient(TcpIpObject):
         """
 
         # Execute the required number of steps
+        start = perf_counter()
         for step in range(self.simulations_per_step):
             # Compute data only on final step
             self.simulation_controller.compute_training_data = step == self.simulations_per_step - 1
-            self.simulation_controller.simulation.step()
+            with tracer.span('simulation_step'):
+                self.simulation_controller.simulation.step()
 
         # If produced sample is not usable, run again
+        nb_rejected = 0
         while not self.simulation_controller.simulation.check_sample():
+            nb_rejected += 1
             for step in range(self.simulations_per_step):
                 # Compute data only on final step
                 self.simulation_controller.compute_training_data = step == self.simulations_per_step - 1
-                self.simulation_controller.simulation.step()
-
-        # Sent training data to Server
-        line = self.simulation_controller.trigger_send_data()
+                with tracer.span('simulation_step'):
+                    self.simulation_controller.simulation.step()
+        step_time = perf_counter() - start
+
+        # Sent training data to Server (the sample itself in streaming mode)
+        start = perf_counter()
+        if self.simulation_controller.stream_data:
+            sample = self.simulation_controller.trigger_stream_data()
+        else:
+            line = self.simulation_controller.trigger_send_data()
+        db_write_time = perf_counter() - start
         self.simulation_controller.reset_data()
         self.send_command_done(receiver=sender)
-        self.send_data(data_to_send=line, receiver=sender)
+        if self.simulation_controller.stream_data:
+            self.send_unnamed_dict(dict_to_send=sample, receiver=sender)
+        else:
+            self.send_data(data_to_send=line, receiver=sender)
+
+        # Piggyback the telemetry of the sample on the reply
+        self.send_data(data_to_send=telemetry_record(step_time=step_time,
+                                                     nb_steps=(nb_rejected + 1) * self.simulations_per_step,
+                                                     nb_rejected=nb_rejected,
+                                                     db_write_time=db_write_time,
+                                                     prediction_time=self.__prediction_time),
+                       receiver=sender)
+        self.__prediction_time = 0.
@@ -3,6 +3,7 @@ from socket import socket, AF_INET, SOCK_STREAM, SOL_SOCKET, SO_REUSEADDR
 from numpy import ndarray
 
 from DeepPhysX.simulation.multiprocess.bytes_converter import BytesConverter
+from DeepPhysX.utils.tracer import tracer
 
 Convertible = Union[type(None), bytes, str, bool, int, float, List, ndarray]
 
@@ -53,11 +54,13 @@ class TcpIpObject:
 
         receiver = self.sock if receiver is None else receiver
 
-        # Cast data to bytes fields
-        data_as_bytes = self.data_converter.data_to_bytes(data_to_send)
+        with tracer.span('tcp_send'):
 
-        # Send the whole message
-        receiver.sendall(data_as_bytes)
+            # Cast data to bytes fields
+            data_as_bytes = self.data_converter.data_to_bytes(data_to_send)
+
+            # Send the whole message
+            receiver.sendall(data_as_bytes)
 
     def receive_data(self, sender: Optional[socket] = None) -> Convertible:
         """
@@ -69,19 +72,24 @@ class TcpIpObject:
         sender = self.sock if sender is None else sender
         sender.setblocking(True)
 
-        # Receive the number of fields to receive
-        nb_bytes_fields_b = sender.recv(self.data_converter.int_size)
-        nb_bytes_fields = self.data_converter.size_from_bytes(nb_bytes_fields_b)
+        with tracer.span('tcp_recv'):
+
+            # Receive the number of fields to receive
+            nb_bytes_fields_b = sender.recv(self.data_converter.int_size)
+            if len(nb_bytes_fields_b) == 0:
+                raise ConnectionResetError(f"[{self.__class__.__name__}] The connection was closed by the remote "
+                                           f"side.")
+            nb_bytes_fields = self.data_converter.size_from_bytes(nb_bytes_fields_b)
 
-        # Receive the sizes in bytes of all the relevant fields
-        sizes_b = [sender.recv(self.data_converter.int_size) for _ in range(nb_bytes_fields)]
-        sizes = [self.data_converter.size_from_bytes(size_b) for size_b in sizes_b]
+            # Receive the sizes in bytes of all the relevant fields
+            sizes_b = [sender.recv(self.data_converter.int_size) for _ in range(nb_bytes_fields)]
+            sizes = [self.data_converter.size_from_bytes(size_b) for size_b in sizes_b]
 
-        # Receive each byte field
-        bytes_fields = [self.read_data(sender, size) for size in sizes]
+            # Receive each byte field
+            bytes_fields = [self.read_data(sender, size) for size in sizes]
 
-        # Return the data in the expected format
-        return self.data_converter.bytes_to_data(bytes_fields)
+            # Return the data in the expected format
+            return self.data_converter.bytes_to_data(bytes_fields)
 
     def read_data(self,
                   sender: socket,
@@ -111,6 +119,8 @@ class TcpIpObject:
 
             # Try to read at most chunk_size_to_read bytes from the socket
             data_received_as_bytes = sender.recv(chunk_size_to_read)
+            if len(data_received_as_bytes) == 0:
+                raise ConnectionResetError(f"[{self.__class__.__name__}] The connection was closed by the remote side.")
 
             # Accumulate the data
             bytes_field += data_received_as_bytes
@@ -1,9 +1,13 @@
 from typing import Any, Dict, List, Optional, Tuple
 from asyncio import get_event_loop, run as async_run
 from socket import socket
-from threading import Thread
+from select import select
+from time import time
+from threading import Thread, Event, Lock
+from queue import Queue, Full, Empty
 
 from DeepPhysX.simulation.multiprocess.tcpip_object import TcpIpObject
+from DeepPhysX.simulation.multiprocess.telemetry import ClientTelemetry
 from SimRender.core import ViewerBatch
 
 
@@ -15,7 +19,11 @@ class TcpIpServer(TcpIpObject):
                  batch_size: int = 5,
                  manager: Optional[Any] = None,
                  use_viewer: bool = False,
-                 debug: bool = False):
+                 debug: bool = False,
+                 ip_address: str = 'localhost',
+                 port: int = 0,
+                 dynamic_clients: bool = False,
+                 simulation_info: Tuple[str, str] = ('', '')):
         """
         TcpIpServer is used to communicate with clients associated with Environment to produce batches for the
         EnvironmentManager.
@@ -25,13 +33,18 @@ class TcpIpServer(TcpIpObject):
         :param batch_size: Number of samples in a batch.
         :param manager: EnvironmentManager that handles the TcpIpServer.
         :param use_viewer: If True, the viewer will be displayed.
+        :param ip_address: Address to listen on (use '0.0.0.0' to accept clients from other machines).
+        :param port: Port to listen on (0 to let the system choose a free port).
+        :param dynamic_clients: If True, clients can join and leave the server while running.
+        :param simulation_info: Path to the simulation file and name of the simulation class, sent to the clients.
         """
 
         super(TcpIpServer, self).__init__()
         self.debug = debug
 
         # Bind to server address
-        self.sock.bind((self.ip_address, self.port))
+        self.ip_address = ip_address
+        self.sock.bind((self.ip_address, port))
         self.port = self.sock.getsockname()[1]
         if self.debug:
             print(f"[TcpIpServer] Binding to IP '{self.ip_address}' on PORT '{self.port}'")
@@ -41,11 +54,31 @@ class TcpIpServer(TcpIpObject):
         # Expect a defined number of clients
         self.clients: List[List[int, socket]] = []
         self.nb_client: int = min(nb_client, max_client_count)
+        self.max_client_count: int = max_client_count
+        self.dynamic_clients: bool = dynamic_clients
+        self.simulation_info: Tuple[str, str] = simulation_info
+        self.__clients_lock: Lock = Lock()
+        self.__client_joined: Event = Event()
+        self.__acceptor: Optional[Thread] = None
+        self.__closing: bool = False
 
         # Init data to communicate with EnvironmentManager and Clients
         self.batch_size: int = batch_size
         self.batch_from_dataset: Optional[List[int]] = None
         self.data_lines: List[List[int]] = []
+        self.samples_per_client: Dict[int, int] = {}
+        self.initialization_times: Dict[int, float] = {}
+        self.telemetry: ClientTelemetry = ClientTelemetry()
+
+        # Parameters sent to the clients that join later
+        self.__env_kwargs: Dict[str, Any] = {}
+        self.__database: Optional[Tuple[Tuple[str, str], bool]] = None
+        self.stream_data: bool = False
+
+        # Run-ahead production variables
+        self.sample_queue: Optional[Queue] = None
+        self.__producers: List[Thread] = []
+        self.__stop_production: Event = Event()
 
         # Reference to EnvironmentManager
         self.simulation_manager: Optional[Any] = manager
@@ -75,15 +108,127 @@ class TcpIpServer(TcpIpObject):
 
         loop = get_event_loop()
         # Accept clients connections one by one
-        self.clients = [None] * self.nb_client
+        self.clients = []
         for _ in range(self.nb_client):
             # Accept connection
             client, _ = await loop.sock_accept(self.sock)
-            # Get the instance ID
-            label, client_id = self.receive_labeled_data(sender=client)
-            print(f"[TcpIpServer] Client n°{client_id} connected: {client}")
-            self.clients[client_id - 1] = [client_id, client]
-            # self.clients.append([client_id, client])
+            # Register the client
+            client_id = self.__register(client=client)
+            self.clients.append([client_id, client])
+        self.clients.sort(key=lambda c: c[0])
+
+    def __register(self, client: socket) -> int:
+        """
+        Receive the instance ID requested by a client and send back its registration.
+
+        :param client: TcpIpObject client.
+        """
+
+        # Get the requested instance ID (0 if the client was launched externally)
+        label, client_id = self.receive_labeled_data(sender=client)
+
+        # Assign the lowest free ID if the requested one is not available
+        used_ids = [c[0] for c in self.clients]
+        if client_id < 1 or client_id > self.max_client_count or client_id in used_ids:
+            client_id = min(set(range(1, self.max_client_count + 1)) - set(used_ids))
+
+        # Send the registration: instance ID, number of instances and simulation to create
+        self.send_data(data_to_send=client_id, receiver=client)
+        self.send_data(data_to_send=self.max_client_count if self.dynamic_clients else self.nb_client,
+                       receiver=client)
+        self.send_data(data_to_send=self.simulation_info[0], receiver=client)
+        self.send_data(data_to_send=self.simulation_info[1], receiver=client)
+        self.samples_per_client[client_id] = 0
+        print(f"[TcpIpServer] Client n°{client_id} connected: {client.getpeername()}")
+        return client_id
+
+    def __accept_clients(self) -> None:
+        """
+        Accept the clients that join while the server is running.
+        """
+
+        while not self.__closing:
+
+            # Wait for a new connection
+            readable, _, _ = select([self.sock], [], [], 0.5)
+            if len(readable) == 0 or self.__closing:
+                continue
+            client, _ = self.sock.accept()
+            client.setblocking(True)
+
+            # Refuse the client if the server is full
+            with self.__clients_lock:
+                if len(self.clients) >= self.max_client_count:
+                    print(f"[TcpIpServer] Maximum number of clients reached, refusing {client.getpeername()}.")
+                    client.close()
+                    continue
+
+            # Register and initialize the client
+            try:
+                client_id = self.__register(client=client)
+                self.__initialize_client(client_id=client_id, client=client, viewer_key='None')
+                self.__connect_client_to_database(client=client)
+            except (ConnectionError, OSError) as error:
+                print(f"[TcpIpServer] A client failed to join: {error}")
+                client.close()
+                continue
+            self.__add_client(client_id=client_id, client=client)
+
+    def __add_client(self,
+                     client_id: int,
+                     client: socket) -> None:
+        """
+        Add a newly initialized client to the pool of clients.
+
+        :param client_id: Index of the client.
+        :param client: TcpIpObject client.
+        """
+
+        with self.__clients_lock:
+            self.clients.append([client_id, client])
+            self.clients.sort(key=lambda c: c[0])
+
+            # Join the run-ahead production if running
+            if self.sample_queue is not None:
+                producer = Thread(target=self.__produce, args=(client, client_id), daemon=True)
+                self.__producers.append(producer)
+                producer.start()
+
+        self.__client_joined.set()
+        print(f"[TcpIpServer] Client n°{client_id} joined ({len(self.clients)} clients).")
+
+    def remove_client(self, client_id: int) -> None:
+        """
+        Remove a client from the pool of clients (the client left or its connection was lost).
+
+        :param client_id: Index of the client.
+        """
+
+        with self.__clients_lock:
+            for i, (idx, client) in enumerate(self.clients):
+                if idx == client_id:
+                    self.clients.pop(i)
+                    client.close()
+                    self.telemetry.remove(client_id)
+                    print(f"[TcpIpServer] Client n°{client_id} left ({len(self.clients)} clients).")
+                    break
+
+    def retire_client(self, client_id: int) -> None:
+        """
+        Send the exit command to a client between two batches and remove it from the pool of clients.
+
+        :param client_id: Index of the client.
+        """
+
+        with self.__clients_lock:
+            clients = [client for idx, client in self.clients if idx == client_id]
+        if len(clients) == 0:
+            return
+        try:
+            self.__shutdown(client=clients[0], idx=client_id)
+        except (ConnectionError, OSError):
+            print(f"[TcpIpServer] Client n°{client_id} was already disconnected.")
+        self.remove_client(client_id=client_id)
 
     ##########################################################################################
     ##########################################################################################
@@ -99,44 +244,84 @@ class TcpIpServer(TcpIpObject):
         """
 
         print("[TcpIpServer] Initializing clients...")
+        self.__env_kwargs = env_kwargs
 
         # Init ViewerBatch
         viewer_keys = None if self.viewer_batch is None else self.viewer_batch.start(nb_view=self.nb_client)
 
-        # Initialisation process for each client
-        for client_id, client in self.clients:
+        # Initialisation process for each client, clients create their simulation concurrently
+        threads = [Thread(target=self.__initialize_client,
+                          args=(client_id, client, 'None' if viewer_keys is None else f'{viewer_keys[i]}'))
+                   for i, (client_id, client) in enumerate(self.clients)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # Synchronize Clients
+        # for client_id, client in self.clients:
+        #     await self.send_data(data_to_send='sync', loop=loop, receiver=client)
+
+    def __initialize_client(self,
+                            client_id: int,
+                            client: socket,
+                            viewer_key: str) -> None:
+        """
+        Send parameters to a client to create its simulation.
 
-            # Send additional arguments
-            self.send_dict(name='env_kwargs', dict_to_send=env_kwargs, receiver=client)
+        :param client_id: Index of the client.
+        :param client: TcpIpObject client.
+        :param viewer_key: Key of the client in the ViewerBatch ('None' without visualization).
+        """
 
-            # Send prediction request authorization
-            self.send_data(data_to_send=self.simulation_manager.allow_prediction_requests, receiver=client)
+        start_time = time()
 
-            # Send number of sub-steps
-            nb_steps = self.simulation_manager.simulations_per_step if self.simulation_manager else 1
-            self.send_data(data_to_send=nb_steps, receiver=client)
+        # Send additional arguments
+        self.send_dict(name='env_kwargs', dict_to_send=self.__env_kwargs, receiver=client)
 
-            # Send visualization Database
-            visualization = 'None' if viewer_keys is None else f'{viewer_keys[client_id - 1]}'
-            self.send_data(data_to_send=visualization, receiver=client)
+        # Send prediction request authorization
+        self.send_data(data_to_send=self.simulation_manager.allow_prediction_requests, receiver=client)
 
-            # Wait Client init
-            self.receive_data(sender=client)
-            print(f"[TcpIpServer] Client n°{client_id} initialisation done")
+        # Send number of sub-steps
+        nb_steps = self.simulation_manager.simulations_per_step if self.simulation_manager else 1
+        self.send_data(data_to_send=nb_steps, receiver=client)
 
-        # Synchronize Clients
-        # for client_id, client in self.clients:
-        #     await self.send_data(data_to_send='sync', loop=loop, receiver=client)
+        # Send visualization Database
+        self.send_data(data_to_send=viewer_key, receiver=client)
+
+        # Wait Client init
+        self.receive_data(sender=client)
+        self.initialization_times[client_id] = time() - start_time
+        print(f"[TcpIpServer] Client n°{client_id} initialisation done ({self.initialization_times[client_id]:.2f}s)")
 
     def connect_to_database(self,
                             database_path: Tuple[str, str],
-                            normalize_data: bool):
+                            normalize_data: bool,
+                            stream_data: bool = False):
 
+        self.__database = (database_path, normalize_data)
+        self.stream_data = stream_data
         for client_id, client in self.clients:
-            self.send_data(data_to_send=database_path[0], receiver=client)
-            self.send_data(data_to_send=database_path[1], receiver=client)
-            self.send_data(data_to_send=normalize_data, receiver=client)
-            self.receive_data(sender=client)
+            self.__connect_client_to_database(client=client)
+
+        # Clients can join once the Database is available
+        if self.dynamic_clients and self.__acceptor is None:
+            self.__acceptor = Thread(target=self.__accept_clients, daemon=True)
+            self.__acceptor.start()
+
+    def __connect_client_to_database(self, client: socket) -> None:
+        """
+        Send the Database information to a client.
+
+        :param client: TcpIpObject client.
+        """
+
+        database_path, normalize_data = self.__database
+        self.send_data(data_to_send=database_path[0], receiver=client)
+        self.send_data(data_to_send=database_path[1], receiver=client)
+        self.send_data(data_to_send=normalize_data, receiver=client)
+        self.send_data(data_to_send=self.stream_data, receiver=client)
+        self.receive_data(sender=client)
 
     def connect_visualization(self) -> None:
         """
@@ -159,39 +344,182 @@ class TcpIpServer(TcpIpObject):
 
         # Launch the communication protocol while the batch needs to be filled
         while nb_sample < self.batch_size:
-            clients = self.clients[:min(len(self.clients), self.batch_size - nb_sample)]
+            with self.__clients_lock:
+                clients = self.clients[:min(len(self.clients), self.batch_size - nb_sample)]
+
+            # Wait for a client to join if none is available
+            if len(clients) == 0:
+                if not self.dynamic_clients:
+                    raise ConnectionError("[TcpIpServer] No client is connected to produce the batch.")
+                self.__client_joined.clear()
+                self.__client_joined.wait()
+                continue
+
             # Run communicate protocol for each client and wait for the last one to finish
-            threads = [Thread(target=self.communicate, args=(client, client_id, animate)) for client_id, client in clients]
+            done = [False] * len(clients)
+            threads = [Thread(target=self.__communicate_with, args=(done, i, client, client_id, animate))
+                       for i, (client_id, client) in enumerate(clients)]
             for t in threads:
                 t.start()
             for t in threads:
                 t.join()
-            nb_sample += len(clients)
+            nb_sample += sum(done)
 
         return self.data_lines
 
+    def __communicate_with(self,
+                           done: List[bool],
+                           idx: int,
+                           client: socket,
+                           client_id: int,
+                           animate: bool) -> None:
+        """
+        Run the communication protocol with a client and flag its success.
+
+        :param done: Success flags of the clients.
+        :param idx: Index of the client in the success flags.
+        :param client: TcpIpObject client.
+        :param client_id: Index of the client.
+        :param animate: If True, triggers a simulation step.
+        """
+
+        done[idx] = self.communicate(client=client, client_id=client_id, animate=animate)
+
     def communicate(self,
-                         client: Optional[socket] = None,
-                         client_id: Optional[int] = None,
-                         animate: bool = True) -> None:
+                    client: Optional[socket] = None,
+                    client_id: Optional[int] = None,
+                    animate: bool = True) -> bool:
 
+        line = None
+        try:
             # 1. Send a sample to the Client if a batch from the Dataset is given
             if self.batch_from_dataset is not None:
                 # Check if there is remaining samples, otherwise the Client is not used
                 if len(self.batch_from_dataset) == 0:
-                    return
+                    return True
                 # Send the sample to the Client
-                self.send_command_sample(receiver=client)
                 line = self.batch_from_dataset.pop(0)
+                self.send_command_sample(receiver=client)
                 self.send_data(data_to_send=line, receiver=client)
 
             # 2. Execute n steps, the last one send data computation signal
             if animate:
+                self.telemetry.request(client_id=client_id)
                 self.send_command_step(receiver=client)
                 # Receive data
                 self.listen_while_not_done(sender=client, client_id=client_id)
-                line = self.receive_data(sender=client)
-                self.data_lines.append(line)
+                self.data_lines.append(self.__receive_sample(client=client))
+                self.samples_per_client[client_id] += 1
+                self.telemetry.add(client_id=client_id, record=self.receive_data(sender=client))
+            return True
+
+        # The client left: its sample is routed to another client
+        except (ConnectionError, OSError):
+            if line is not None:
+                self.batch_from_dataset.insert(0, line)
+            self.remove_client(client_id=client_id)
+            return False
+
+    def __receive_sample(self, client: socket) -> Any:
+        """
+        Receive a produced sample, either the index of its Database line or the sample itself in streaming mode.
+
+        :param client: TcpIpObject client.
+        """
+
+        if self.stream_data:
+            return self.receive_dict(sender=client)
+        return self.receive_data(sender=client)
+
+    def start_production(self, queue_size: int) -> None:
+        """
+        Launch the run-ahead production: each client continuously produces samples in a bounded queue.
+
+        :param queue_size: Maximum number of produced samples waiting to be consumed.
+        """
+
+        # Production is already running
+        if self.sample_queue is not None:
+            return
+
+        # Launch a producer thread for each client
+        with self.__clients_lock:
+            self.sample_queue = Queue(maxsize=max(queue_size, 1))
+            self.__stop_production.clear()
+            self.__producers = [Thread(target=self.__produce, args=(client, client_id), daemon=True)
+                                for client_id, client in self.clients]
+            for producer in self.__producers:
+                producer.start()
+
+    def stop_production(self) -> None:
+        """
+        Stop the run-ahead production. Samples remaining in the queue are discarded from the batches.
+        """
+
+        # Production is not running
+        if self.sample_queue is None:
+            return
+
+        # Wait for each client to finish its current sample
+        self.__stop_production.set()
+        for producer in self.__producers:
+            producer.join()
+        self.__producers = []
+        self.sample_queue = None
+
+    def __produce(self,
+                  client: socket,
+                  client_id: int) -> None:
+        """
+        Request samples from a client until the production is stopped. Blocks while the queue is full.
+
+        :param client: TcpIpObject client.
+        :param client_id: Index of the client.
+        """
+
+        while not self.__stop_production.is_set():
+
+            # 1. Execute n steps, the last one send data computation signal
+            try:
+                self.telemetry.request(client_id=client_id)
+                self.send_command_step(receiver=client)
+                self.listen_while_not_done(sender=client, client_id=client_id)
+                line = self.__receive_sample(client=client)
+                self.samples_per_client[client_id] += 1
+                self.telemetry.add(client_id=client_id, record=self.receive_data(sender=client))
+            except (ConnectionError, OSError):
+                self.remove_client(client_id=client_id)
+                return
+
+            # 2. Add the produced sample to the queue when a slot is available
+            while not self.__stop_production.is_set():
+                try:
+                    self.sample_queue.put(line, timeout=0.1)
+                    break
+                except Full:
+                    continue
+
+    def get_queued_batch(self, stop_event: Optional[Event] = None) -> List[int]:
+        """
+        Drain a batch of samples from the run-ahead production queue.
+
+        :param stop_event: Event of the consumer to stop waiting for the samples.
+        """
+
+        sample_queue, batch = self.sample_queue, []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(sample_queue.get(timeout=0.1))
+            except Empty:
+                # The production was stopped
+                if self.__stop_production.is_set() or (stop_event is not None and stop_event.is_set()):
+                    raise ConnectionError("[TcpIpServer] The run-ahead production was stopped.")
+                # Every client left (other clients can join later with dynamic clients)
+                with self.__clients_lock:
+                    producing = any(producer.is_alive() for producer in self.__producers)
+                if not producing and not self.dynamic_clients and sample_queue.empty():
+                    raise ConnectionError("[TcpIpServer] No client is connected to produce the batch.")
+        return batch
 
     def set_dataset_batch(self,
                           data_lines: List[int]) -> None:
@@ -217,9 +545,20 @@ class TcpIpServer(TcpIpObject):
 
         print("[TcpIpServer] Closing clients...")
 
+        # Stop accepting new clients
+        self.__closing = True
+        if self.__acceptor is not None:
+            self.__acceptor.join()
+
+        # Stop the run-ahead production
+        self.stop_production()
+
         # Send all exit protocol and wait for the last one to finish
         for client_id, client in self.clients:
-            self.__shutdown(client=client, idx=client_id)
+            try:
+                self.__shutdown(client=client, idx=client_id)
+            except (ConnectionError, OSError):
+                print(f"[TcpIpServer] Client n°{client_id} was already disconnected.")
         # Close socket
         self.sock.close()
 
@@ -258,5 +597,5 @@ class TcpIpServer(TcpIpObject):
         :param sender: TcpIpObject sender.
         """
 
-        self.simulation_manager.get_prediction_from_simulation(client_id)
+        self.simulation_manager.get_prediction(instance_id=client_id)
         self.send_data(data_to_send=True, receiver=sender)
@@ -0,0 +1,151 @@
+from typing import Dict, List, Optional
+from threading import Lock
+from time import time
+from numpy import ndarray, array, zeros, logspace, searchsorted, median
+
+# Fields of the telemetry sent by a client with each sample (times in seconds)
+TELEMETRY_FIELDS = ('step_time', 'nb_steps', 'nb_rejected', 'db_write_time', 'prediction_time')
+
+# Bins of the step time histograms (100us to 100s)
+STEP_TIME_BINS = logspace(-4, 2, 25)
+
+
+def telemetry_record(step_time: float,
+                     nb_steps: int,
+                     nb_rejected: int,
+                     db_write_time: float,
+                     prediction_time: float) -> ndarray:
+    """
+    Pack the telemetry of a produced sample to piggyback it on the reply of a client.
+
+    :param step_time: Time spent in the simulation steps of the sample.
+    :param nb_steps: Number of simulation steps of the sample.
+    :param nb_rejected: Number of samples rejected by 'check_sample' before this one.
+    :param db_write_time: Time spent to write the sample in the Database.
+    :param prediction_time: Time spent waiting for predictions of the network.
+    """
+
+    return array([step_time, nb_steps, nb_rejected, db_write_time, prediction_time], dtype=float)
+
+
+class ClientTelemetry:
+
+    def __init__(self):
+        """
+        ClientTelemetry aggregates the telemetry of the samples produced by each client: counters, sums of the
+        timings, histogram of the step times and time of the pending step request.
+        """
+
+        self.__lock: Lock = Lock()
+        self.__sums: Dict[int, ndarray] = {}
+        self.__max_step_time: Dict[int, float] = {}
+        self.__histograms: Dict[int, ndarray] = {}
+        self.__nb_samples: Dict[int, int] = {}
+        self.__pending: Dict[int, float] = {}
+
+    def request(self, client_id: int) -> None:
+        """
+        Record that a sample was requested to a client (the step command was sent).
+
+        :param client_id: Index of the client.
+        """
+
+        with self.__lock:
+            self.__pending[client_id] = time()
+
+    def add(self,
+            client_id: int,
+            record: ndarray) -> None:
+        """
+        Add the telemetry of a sample produced by a client.
+
+        :param client_id: Index of the client.
+        :param record: Telemetry of the sample (see 'telemetry_record').
+        """
+
+        with self.__lock:
+            if client_id not in self.__sums:
+                self.__sums[client_id] = zeros(len(TELEMETRY_FIELDS))
+                self.__histograms[client_id] = zeros(len(STEP_TIME_BINS) + 1, dtype=int)
+                self.__nb_samples[client_id] = 0
+                self.__max_step_time[client_id] = 0.
+            self.__sums[client_id] += record
+            self.__nb_samples[client_id] += 1
+            self.__max_step_time[client_id] = max(self.__max_step_time[client_id], record[0])
+            self.__histograms[client_id][searchsorted(STEP_TIME_BINS, record[0])] += 1
+            self.__pending.pop(client_id, None)
+
+    def summary(self) -> Dict[int, Dict[str, float]]:
+        """
+        Get the telemetry of each client: number of samples, mean and max step time (s), steps per sample, rejection
+        rate, mean Database write and prediction latencies (s), time since the pending request without reply (s).
+        """
+
+        now = time()
+        with self.__lock:
+            summary = {}
+            for client_id, sums in sorted(self.__sums.items()):
+                nb_samples = self.__nb_samples[client_id]
+                summary[client_id] = {'nb_samples': nb_samples,
+                                      'step_time': sums[0] / nb_samples,
+                                      'max_step_time': self.__max_step_time[client_id],
+                                      'steps_per_sample': sums[1] / nb_samples,
+                                      'rejection_rate': sums[2] / (sums[2] + nb_samples),
+                                      'db_write_time': sums[3] / nb_samples,
+                                      'prediction_time': sums[4] / nb_samples,
+                                      'pending_time': now - self.__pending.get(client_id, now)}
+            return summary
+
+    def histograms(self) -> Dict[int, ndarray]:
+        """
+        Get the histogram of the step times of each client (bins edges are given by STEP_TIME_BINS).
+        """
+
+        with self.__lock:
+            return {client_id: histogram.copy() for client_id, histogram in self.__histograms.items()}
+
+    def stalled_clients(self, timeout: Optional[float] = None) -> List[int]:
+        """
+        Get the clients that did not reply to a sample request for a while. Idle clients, which were not requested a
+        sample (e.g. during the optimization of the network), are never stalled.
+
+        :param timeout: Time (in seconds) without reply to a request of a stalled client. By default, 10 times the
+                        median of the mean step times of the clients.
+        """
+
+        summary = self.summary()
+        if timeout is None:
+            if len(summary) == 0:
+                return []
+            timeout = 10 * median([client['step_time'] for client in summary.values()])
+        now = time()
+        with self.__lock:
+            return sorted(client_id for client_id, request_time in self.__pending.items()
+                          if now - request_time > timeout)
+
+    def remove(self, client_id: int) -> None:
+        """
+        Remove the telemetry of a client.
+
+        :param client_id: Index of the client.
+        """
+
+        with self.__lock:
+            for container in (self.__sums, self.__max_step_time, self.__histograms, self.__nb_samples,
+                              self.__pending):
+                container.pop(client_id, None)
+
+    def __str__(self) -> str:
+
+        summary = self.summary()
+        stalled = self.stalled_clients()
+        description = "\n"
+        description += f"# {self.__class__.__name__}\n"
+        for client_id, client in summary.items():
+            description += f"    Client n°{client_id:<3d} samples {client['nb_samples']:>7d} | " \
+                           f"step {client['step_time'] * 1e3:>9.2f}ms (max {client['max_step_time'] * 1e3:>9.2f}ms) | " \
+                           f"rejected {client['rejection_rate'] * 100:>5.1f}% | " \
+                           f"db write {client['db_write_time'] * 1e3:>7.2f}ms | " \
+                           f"prediction {client['prediction_time'] * 1e3:>7.2f}ms" \
+                           f"{' | STALLED' if client_id in stalled else ''}\n"
+        return description
@@ -3,6 +3,7 @@ from numpy import ndarray
 
 from SimRender.core import Viewer
 from DeepPhysX.database.database_controller import DatabaseController
+from DeepPhysX.utils.tracer import tracer
 
 try:
     import Sofa
@@ -140,6 +141,21 @@ class Simulation:
 
         return self.__controller.get_prediction(**kwargs)
 
+    def submit_prediction(self, **kwargs) -> None:
+        """
+        Request a prediction from networks without waiting for it (computed in a worker thread if the asynchronous
+        predictions are enabled, computed right away otherwise).
+        """
+
+        self.__controller.submit_prediction(**kwargs)
+
+    def get_latest_prediction(self) -> Optional[Dict[str, ndarray]]:
+        """
+        Get the latest completed prediction if it was not returned yet, None otherwise.
+        """
+
+        return self.__controller.get_latest_prediction()
+
 
 class SofaSimulation(Sofa.Core.Controller, Simulation):
 
@@ -198,7 +214,9 @@ class SimulationController:
         self.__data: Dict[str, ndarray] = {}
         self.__required_fields: List[str] = []
         self.__prediction_fields: List[str] = []
+        self.__latest_prediction: Optional[Dict[str, ndarray]] = None
         self.compute_training_data: bool = True
+        self.stream_data: bool = False
 
     @property
     def simulation(self) -> Simulation:
@@ -241,16 +259,20 @@ class SimulationController:
 
     def connect_to_database(self,
                             database_path: Tuple[str, str],
-                            normalize_data: bool) -> None:
+                            normalize_data: bool,
+                            stream_data: bool = False) -> None:
         """
         Connect to the database controller.
 
         :param database_path: Path to the database repository.
         :param normalize_data: If True, data should be normalized.
+        :param stream_data: If True, the samples are returned by 'trigger_stream_data' instead of being written in the
+                            database.
         """
 
         # Initialize the database instance
         self.__database.init(database_path=database_path, normalize_data=normalize_data)
+        self.stream_data = stream_data
 
         # Create user data fields
         self.__simulation.init_database()
@@ -342,6 +364,9 @@ class SimulationController:
                              f"Database (required fields: {set(self.__prediction_fields)}).")
 
         # 3. Get the prediction from the networks
+        # 3.0. The networks lives in the same process: direct prediction without the Database
+        if self.__manager.can_predict_in_process:
+            return {**kwargs, **self.__manager.predict(data=kwargs)}
         # 3.1. Define the training data in the Database
         self.__database.update(exchange=True, data=kwargs, line_id=self.__simulation_id)
         # 3.2. Send a prediction request
@@ -351,6 +376,32 @@ class SimulationController:
         data_prediction.pop('id')
         return {key: value[0] for key, value in data_prediction.items()}
 
+    def submit_prediction(self, **kwargs) -> None:
+        """
+        Request a prediction from the network without waiting for it.
+        """
+
+        # Synchronous predictions: the prediction is computed right away
+        if (async_predictor := getattr(self.__manager, 'async_predictor', None)) is None:
+            self.__latest_prediction = self.get_prediction(**kwargs)
+            return
+
+        # Asynchronous predictions: the inputs are copied since the simulation keeps running
+        if not self.__manager.allow_prediction_requests:
+            raise ValueError("[Simulation] Prediction request is not available in the Data Generation pipeline.")
+        async_predictor.submit({field: value.copy() if isinstance(value, ndarray) else value
+                                for field, value in kwargs.items()})
+
+    def get_latest_prediction(self) -> Optional[Dict[str, ndarray]]:
+        """
+        Get the latest completed prediction if it was not returned yet, None otherwise.
+        """
+
+        if (async_predictor := getattr(self.__manager, 'async_predictor', None)) is None:
+            prediction, self.__latest_prediction = self.__latest_prediction, None
+            return prediction
+        return async_predictor.latest()
+
     def trigger_prediction(self) -> None:
         """
         Request a prediction from networks and apply it to the Simulation.
@@ -367,7 +418,15 @@ class SimulationController:
             if field not in default_fields and field in self.__prediction_fields:
                 data_training[field] = value
 
-        # 2. Apply the prediction of the networks
+        # 2. Asynchronous prediction: submit the inputs and apply the latest completed prediction if any
+        if (async_predictor := getattr(self.__manager, 'async_predictor', None)) is not None:
+            async_predictor.submit({field: value.copy() if isinstance(value, ndarray) else value
+                                    for field, value in data_training.items()})
+            if (data_prediction := async_predictor.latest()) is not None:
+                self.__simulation.apply_prediction(data_prediction)
+            return
+
+        # 3. Apply the prediction of the networks
         data_prediction = self.get_prediction(**data_training)
         self.__simulation.apply_prediction(data_prediction)
 
@@ -376,7 +435,15 @@ class SimulationController:
         Add the training data and the additional data in their respective Databases.
         """
 
-        return self.__database.add_data(data=self.__data)
+        with tracer.span('db_write'):
+            return self.__database.add_data(data=self.__data)
+
+    def trigger_stream_data(self) -> Dict[str, Any]:
+        """
+        Get a copy of the training data and the additional data without writing them in the Database.
+        """
+
+        return {field: value.copy() if isinstance(value, ndarray) else value for field, value in self.__data.items()}
 
     def trigger_update_data(self, line_id: List[int]) -> None:
         """
@@ -384,7 +451,8 @@ class SimulationController:
         """
 
         if len(self.__data) > 0:
-            self.__database.update(data=self.__data, line_id=line_id)
+            with tracer.span('db_write'):
+                self.__database.update(data=self.__data, line_id=line_id)
 
     def trigger_get_data(self, line_id: List[int]) -> None:
         """
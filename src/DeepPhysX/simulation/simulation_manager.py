@@ -1,13 +1,26 @@
 from typing import Optional, List, Tuple, Type, Dict, Any
-from os import cpu_count
-from os.path import join, dirname
-from sys import modules, executable
-from threading import Thread
-from subprocess import run
+from numpy import ndarray
+from os import cpu_count, environ
+from os.path import join, dirname, basename
+from sys import modules, executable, path
+from threading import Thread, Event, Semaphore, Lock, current_thread
+from queue import Queue, Empty
+from subprocess import Popen
+from socket import gethostname
+from multiprocessing import get_context
+from multiprocessing.context import BaseContext
+from multiprocessing.process import BaseProcess
+from time import time, perf_counter
+from math import ceil
 
 from DeepPhysX.simulation.multiprocess.tcpip_server import TcpIpServer
+from DeepPhysX.simulation.multiprocess.launcher import launch_client
+from DeepPhysX.simulation.multiprocess.telemetry import ClientTelemetry, telemetry_record
 from DeepPhysX.networks.network_manager import NetworkManager
+from DeepPhysX.networks.async_predictor import AsyncPredictor
 from DeepPhysX.simulation.simulation_controller import Simulation, SimulationController
+from DeepPhysX.utils.resources import ResourcePlanner
+from DeepPhysX.utils.tracer import tracer, TRACE_VARIABLE
 
 
 
@@ -21,7 +34,18 @@ class SimulationManager:
                  load_samples: bool = False,
                  only_first_epoch: bool = True,
                  always_produce: bool = False,
-                 use_viewer: bool = False):
+                 use_viewer: bool = False,
+                 run_ahead: bool = False,
+                 queue_size: int = 0,
+                 spawn_clients: bool = True,
+                 server_address: str = 'localhost',
+                 server_port: int = 0,
+                 max_parallel_env: int = 0,
+                 client_start_method: str = 'subprocess',
+                 in_process_prediction: bool = True,
+                 autoscale: bool = False,
+                 autoscale_every: int = 10,
+                 autoscale_tolerance: float = 0.2):
         """
         SimulationManager handles the numerical simulation(s) to produce synthetic data and communicate with the neural
         network.
@@ -34,6 +58,24 @@ class SimulationManager:
         :param only_first_epoch: If True, the simulation produces samples only during the first epoch of the online training pipeline.
         :param always_produce: If True, the simulation produces samples during the whole training pipeline.
         :param use_viewer: If True, the viewer will be displayed.
+        :param run_ahead: If True, the simulations continuously produce samples in a queue drained by each batch.
+        :param queue_size: Maximum number of samples waiting in the run-ahead queue (default is twice the batch size).
+        :param spawn_clients: If False, the simulations are not launched locally: the server waits for nb_parallel_env
+                              externally launched clients and other clients can join or leave while running.
+        :param server_address: Address the server listens on (use '0.0.0.0' to accept clients from other machines).
+        :param server_port: Port the server listens on (0 to let the system choose a free port).
+        :param max_parallel_env: Maximum number of clients that can join the server (external clients only).
+        :param client_start_method: How to launch the local clients, either 'subprocess' (a new interpreter per
+                                    client) or 'forkserver' (clients are forked from a server that imported the heavy
+                                    modules once).
+        :param in_process_prediction: If True, a single simulation in the same process as the network gets its
+                                      predictions directly in memory instead of through the exchange database.
+        :param autoscale: If True, local clients are spawned or retired between batches so that the production rate of
+                          the simulations matches the consumption rate of the training (nb_parallel_env is the initial
+                          number of clients, max_parallel_env the maximum one).
+        :param autoscale_every: Number of measured batches between two scaling decisions.
+        :param autoscale_tolerance: Relative difference between the production and consumption times under which the
+                                    number of clients is not changed.
         """
 
         # Simulation variables
@@ -45,10 +87,14 @@ class SimulationManager:
         self.simulation_controller: Optional[SimulationController] = None
         self.get_data = self.__get_data_from_simulation
         self.dispatch_batch = self.__dispatch_batch_to_simulation
+        self.__telemetry: ClientTelemetry = ClientTelemetry()
 
         # Multi Simulations controller variables
         self.__server: Optional[TcpIpServer] = None
-        self.__server_is_ready = False
+        self.__server_ready: Event = Event()
+        self.__client_processes: List[BaseProcess] = []
+        self.__forkserver_context: Optional[BaseContext] = None
+        self.startup_times: Dict[str, float] = {}
 
         # Data production variables
         self.batch_size: int = 1
@@ -58,43 +104,91 @@ class SimulationManager:
         self.simulations_per_step: int = simulations_per_step
         self.dataset_batch: Optional[List[List[int]]] = None
         self.use_viewer: bool = use_viewer
-        self.nb_parallel_env = min(max(nb_parallel_env, 1), cpu_count())
+        self.spawn_clients: bool = spawn_clients
+        self.nb_parallel_env = max(nb_parallel_env, 1)
+        self.nb_parallel_env = min(self.nb_parallel_env, cpu_count()) if spawn_clients else self.nb_parallel_env
+        if autoscale:
+            max_parallel_env = min(max_parallel_env, cpu_count()) if max_parallel_env > 0 else cpu_count()
+        self.max_parallel_env: int = max(max_parallel_env, self.nb_parallel_env)
+        self.server_address: Tuple[str, int] = (server_address, server_port)
+        if client_start_method not in ('subprocess', 'forkserver'):
+            raise ValueError(f"[SimulationManager] Unknown client start method '{client_start_method}', "
+                             f"available methods are 'subprocess' and 'forkserver'.")
+        self.client_start_method: str = client_start_method
         self.allow_prediction_requests: bool = True
+        self.run_ahead: bool = run_ahead
+        self.queue_size: int = queue_size
+        self.in_process_prediction: bool = in_process_prediction
+
+        # Autoscaling variables
+        if autoscale and (run_ahead or not spawn_clients):
+            raise ValueError("[SimulationManager] The autoscaling of the clients is only available with locally "
+                             "spawned clients without run-ahead production.")
+        self.autoscale: bool = autoscale
+        self.autoscale_every: int = autoscale_every
+        self.autoscale_tolerance: float = autoscale_tolerance
+        self.__client_launchers: Dict[int, Any] = {}
+        self.__autoscale_lock: Lock = Lock()
+        self.__production_times: List[float] = []
+        self.__consumption_times: List[float] = []
+        self.__batch_end: Optional[float] = None
+
+        # Overlapped production variables
+        self.__prefetcher: Optional[Thread] = None
+        self.__prefetched: Optional[Queue] = None
+        self.__prefetch_slots: Optional[Semaphore] = None
+        self.__stop_prefetch: Event = Event()
+        self.__nb_consumed: int = 0
+        self.prefetch_time: Optional[float] = None
+
+        # Asynchronous prediction variables
+        self.__async_predictor: Optional[AsyncPredictor] = None
 
         # Manager variables
         self.__network_manager: Optional[NetworkManager] = None
+        self.resource_planner: Optional[ResourcePlanner] = None
 
     ################
     # Init methods #
     ################
 
-    def init_data_pipeline(self, batch_size: int) -> None:
+    def init_data_pipeline(self,
+                           batch_size: int,
+                           resource_planner: Optional[ResourcePlanner] = None) -> None:
         """
         Init the SimulationManager for the data generation pipeline.
 
         :param batch_size: Number of sample to produce per batch.
+        :param resource_planner: Partition of the CPU cores between the processes.
         """
 
         self.allow_prediction_requests = False
-        self.init_training_pipeline(batch_size=batch_size)
+        self.init_training_pipeline(batch_size=batch_size, resource_planner=resource_planner)
 
-    def init_training_pipeline(self, batch_size: int) -> None:
+    def init_training_pipeline(self,
+                               batch_size: int,
+                               resource_planner: Optional[ResourcePlanner] = None) -> None:
         """
         Init the SimulationManager for the training pipeline.
 
         :param batch_size: Number of sample to produce per batch.
+        :param resource_planner: Partition of the CPU cores between the processes.
         """
 
         self.batch_size = batch_size
+        self.resource_planner = resource_planner
+        self.queue_size = self.queue_size if self.queue_size > 0 else 2 * batch_size
 
-        # Create Server
-        if self.nb_parallel_env > 1:
+        # Create Server (the run-ahead production and the external clients always run in separate processes)
+        if self.nb_parallel_env > 1 or self.run_ahead or not self.spawn_clients or self.autoscale:
             self.__create_server(batch_size=batch_size)
-            self.get_data = self.__get_data_from_server
+            self.get_data = self.__get_data_from_queue if self.run_ahead else self.__get_data_from_server
             self.dispatch_batch = self.__dispatch_batch_to_server
 
         # Create Environment
         else:
+            if self.resource_planner is not None:
+                self.resource_planner.plan(nb_clients=0)
             self.__create_simulation()
 
     def init_prediction_pipeline(self) -> None:
@@ -141,33 +235,123 @@ class SimulationManager:
         """
 
         # Create server
+        start_time = time()
         self.__server = TcpIpServer(nb_client=self.nb_parallel_env,
+                                    max_client_count=self.max_parallel_env,
                                     batch_size=batch_size,
                                     manager=self,
-                                    use_viewer=self.use_viewer)
+                                    use_viewer=self.use_viewer and self.spawn_clients,
+                                    ip_address=self.server_address[0],
+                                    port=self.server_address[1],
+                                    dynamic_clients=not self.spawn_clients or self.autoscale,
+                                    simulation_info=(self.__simulation_file, self.__simulation_class.__name__))
         server_thread = Thread(target=self.__start_server)
         server_thread.start()
 
+        # External clients: wait for the users to launch them (they do not share the local cores)
+        if not self.spawn_clients:
+            if self.resource_planner is not None:
+                self.resource_planner.plan(nb_clients=0)
+            host = gethostname() if self.__server.ip_address in ('', '0.0.0.0') else self.__server.ip_address
+            print(f"[SimulationManager] Waiting for {self.nb_parallel_env} client(s), launch them with:\n"
+                  f"    python -m DeepPhysX.simulation.multiprocess.launcher --connect {host}:{self.__server.port}")
+            self.__server_ready.wait()
+            return
+
         # Create clients
-        client_threads = []
+        if self.resource_planner is not None:
+            self.resource_planner.plan(nb_clients=self.nb_parallel_env)
         for i in range(self.nb_parallel_env):
-            client_thread = Thread(target=self.__start_client, args=(i + 1,))
-            client_threads.append(client_thread)
-        for client in client_threads:
-            client.start()
+            self.__launch_client(idx=i + 1)
+        self.startup_times['launch'] = time() - start_time
 
         # Return server to manager when it is ready
-        while not self.__server_is_ready:
-            pass
+        self.__server_ready.wait()
+        self.startup_times['total'] = time() - start_time
+        self.__print_startup_times()
 
     def __start_server(self) -> None:
         """
         Start TcpIpServer.
         """
 
+        start_time = time()
         self.__server.connect()
+        self.startup_times['connection'] = time() - start_time
         self.__server.initialize(env_kwargs=self.__simulation_kwargs)
-        self.__server_is_ready = True
+        self.startup_times['initialization'] = time() - start_time - self.startup_times['connection']
+        self.__server_ready.set()
+
+    def __print_startup_times(self) -> None:
+        """
+        Report the time spent in each step of the clients startup.
+        """
+
+        slowest = max(self.__server.initialization_times.items(), key=lambda t: t[1], default=(0, 0.))
+        print(f"[SimulationManager] Clients startup ({self.client_start_method}) in {self.startup_times['total']:.2f}s:"
+              f"\n    launch: {self.startup_times['launch']:.2f}s"
+              f"\n    connection: {self.startup_times['connection']:.2f}s"
+              f"\n    initialization: {self.startup_times['initialization']:.2f}s "
+              f"(slowest client n°{slowest[0]}: {slowest[1]:.2f}s)")
+
+    def __launch_client(self, idx: int) -> None:
+        """
+        Launch a local client with the selected start method.
+
+        :param idx: Index of client.
+        """
+
+        if self.client_start_method == 'forkserver':
+            if self.__forkserver_context is None:
+                self.__forkserver_context = self.__get_forkserver_context()
+            launcher = self.__fork_client(context=self.__forkserver_context, idx=idx)
+            self.__client_processes.append(launcher)
+        else:
+            launcher = Thread(target=self.__start_client, args=(idx,))
+            launcher.start()
+        self.__client_launchers[idx] = launcher
+
+    def __get_forkserver_context(self) -> BaseContext:
+        """
+        Get the forkserver context that imports the heavy modules once before forking the clients.
+        """
+
+        # The simulation module must be importable from the forkserver process
+        simulation_dir = dirname(self.__simulation_file)
+        if simulation_dir not in path:
+            path.append(simulation_dir)
+
+        # Modules that could not be imported are silently ignored by the forkserver
+        context = get_context('forkserver')
+        context.set_forkserver_preload(['torch', 'numpy', 'vedo', 'SimRender.core',
+                                        'DeepPhysX.simulation.multiprocess.launcher',
+                                        basename(self.__simulation_file)[:-3]])
+        return context
+
+    def __fork_client(self,
+                      context: BaseContext,
+                      idx: int) -> BaseProcess:
+        """
+        Fork a new process from the forkserver to start a TcpIpClient.
+
+        :param context: The forkserver context.
+        :param idx: Index of client.
+        """
+
+        environment = {} if self.resource_planner is None else self.resource_planner.client_environment(idx)
+        # Forked processes do not inherit the environment of this process
+        if tracer.enabled and TRACE_VARIABLE in environ:
+            environment[TRACE_VARIABLE] = environ[TRACE_VARIABLE]
+        environment = environment if len(environment) > 0 else None
+        process = context.Process(target=launch_client,
+                                  args=(self.__simulation_file, self.__simulation_class.__name__,
+                                        self.__server.ip_address, self.__server.port, idx, self.nb_parallel_env,
+                                        environment),
+                                  daemon=False)
+        process.start()
+        if self.resource_planner is not None:
+            self.resource_planner.apply_client(idx=idx, pid=process.pid)
+        return process
 
     def __start_client(self, idx: int) -> None:
         """
@@ -179,9 +363,18 @@ class SimulationManager:
         # Get the launcher python script
         script = join(dirname(modules[Simulation.__module__].__file__), 'multiprocess', 'launcher.py')
 
+        # Limit the thread pools of the client
+        environment = None
+        if self.resource_planner is not None:
+            environment = {**environ, **self.resource_planner.client_environment(idx)}
+
         # Run a new python process to launch the client
-        run([executable, script, self.__simulation_file, self.__simulation_class.__name__,
-             self.__server.ip_address, str(self.__server.port), str(idx), str(self.nb_parallel_env)])
+        process = Popen([executable, script, self.__simulation_file, self.__simulation_class.__name__,
+                         self.__server.ip_address, str(self.__server.port), str(idx), str(self.nb_parallel_env)],
+                        env=environment)
+        if self.resource_planner is not None:
+            self.resource_planner.apply_client(idx=idx, pid=process.pid)
+        process.wait()
 
     ##############################
     # Database access management #
@@ -189,18 +382,22 @@ class SimulationManager:
 
     def connect_to_database(self,
                             database_path: Tuple[str, str],
-                            normalize_data: bool) -> None:
+                            normalize_data: bool,
+                            stream_data: bool = False) -> None:
         """
         Connect the SimulationManager to the Database.
 
         :param database_path: Path of the Database to connect to.
         :param normalize_data: If True, data should be normalized.
+        :param stream_data: If True, the produced batches are lists of samples instead of indices of Database lines.
         """
 
         if self.simulation_controller is not None:
-            self.simulation_controller.connect_to_database(database_path=database_path, normalize_data=normalize_data)
+            self.simulation_controller.connect_to_database(database_path=database_path, normalize_data=normalize_data,
+                                                           stream_data=stream_data)
         elif self.__server is not None:
-            self.__server.connect_to_database(database_path=database_path, normalize_data=normalize_data)
+            self.__server.connect_to_database(database_path=database_path, normalize_data=normalize_data,
+                                              stream_data=stream_data)
 
     def connect_to_network_manager(self, network_manager: NetworkManager) -> None:
         """
@@ -210,7 +407,32 @@ class SimulationManager:
         """
 
         self.__network_manager = network_manager
-        self.__network_manager.link_clients(self.nb_parallel_env)
+        self.__network_manager.link_clients(self.nb_parallel_env if self.spawn_clients and not self.autoscale
+                                            else self.max_parallel_env)
+
+    @property
+    def can_predict_in_process(self) -> bool:
+        """
+        Check if the predictions can be computed in memory, without the exchange database.
+        """
+
+        return self.in_process_prediction and self.__network_manager is not None and self.__server is None
+
+    @property
+    def nb_clients(self) -> int:
+        """
+        Get the number of simulation clients currently connected.
+        """
+
+        return 1 if self.__server is None else len(self.__server.clients)
+
+    @property
+    def telemetry(self) -> ClientTelemetry:
+        """
+        Get the telemetry of the samples produced by each simulation client (the in-process simulation is client 1).
+        """
+
+        return self.__telemetry if self.__server is None else self.__server.telemetry
 
     #########################
     # Simulation management #
@@ -224,7 +446,30 @@ class SimulationManager:
         :param animate: If True, triggers a simulation step.
         """
 
-        return self.__server.get_batch(animate)
+        # The batches produced in the background are consumed through 'get_prefetched_data'
+        prefetched = self.__prefetcher is not None and current_thread() is self.__prefetcher
+        if self.autoscale and not prefetched:
+            self.__record_consumption()
+
+        start = perf_counter()
+        data_lines = self.__server.get_batch(animate)
+        if self.autoscale:
+            self.__record_production(production_time=perf_counter() - start)
+            if not prefetched:
+                self.__batch_end = perf_counter()
+        return data_lines
+
+    @__check_init
+    def __get_data_from_queue(self, animate: bool = True) -> List[int]:
+        """
+        Drain a batch of data from the run-ahead production queue of the TcpIpServer.
+
+        :param animate: Unused, the simulations are always running in the run-ahead mode.
+        """
+
+        self.__server.start_production(queue_size=self.queue_size)
+        prefetched = self.__prefetcher is not None and current_thread() is self.__prefetcher
+        return self.__server.get_queued_batch(stop_event=self.__stop_prefetch if prefetched else None)
 
     @__check_init
     def __get_data_from_simulation(self,
@@ -242,6 +487,7 @@ class SimulationManager:
         # Produce batch while batch size is not complete
         nb_sample = 0
         dataset_lines = []
+        nb_rejected, start = 0, perf_counter()
         while nb_sample < self.batch_size:
 
             # 1. Send a sample from the Database if one is given
@@ -255,26 +501,45 @@ class SimulationManager:
                 for current_step in range(self.simulations_per_step):
                     # Sub-steps do not produce data
                     self.simulation_controller.compute_training_data = current_step == self.simulations_per_step - 1
-                    self.simulation_controller.simulation.step()
+                    with tracer.span('simulation_step'):
+                        self.simulation_controller.simulation.step()
 
             # 3. Add the produced sample index to the batch if the sample is validated
             if self.simulation_controller.simulation.check_sample():
                 nb_sample += 1
+                step_time = perf_counter() - start
                 # 3.1. The prediction Pipeline triggers a prediction request
+                prediction_time = perf_counter()
                 if request_prediction:
                     self.simulation_controller.trigger_prediction()
+                prediction_time = perf_counter() - prediction_time
                 # 3.2. Add the data to the Database
+                db_write_time = perf_counter()
                 if save_data:
                     # Update the line if the sample was given by the database
-                    if update_line is None:
+                    if update_line is None and self.simulation_controller.stream_data:
+                        dataset_lines.append(self.simulation_controller.trigger_stream_data())
+                    elif update_line is None:
                         new_line = self.simulation_controller.trigger_send_data()
                         dataset_lines.append(new_line)
                     # Create a new line otherwise
                     else:
                         self.simulation_controller.trigger_update_data(line_id=update_line)
                         dataset_lines.append(update_line)
+                db_write_time = perf_counter() - db_write_time
                 # 3.3. Rest the data variables
                 self.simulation_controller.reset_data()
+                # 3.4. Record the telemetry of the sample
+                if animate:
+                    self.__telemetry.add(client_id=1,
+                                         record=telemetry_record(step_time=step_time,
+                                                                 nb_steps=(nb_rejected + 1) * self.simulations_per_step,
+                                                                 nb_rejected=nb_rejected,
+                                                                 db_write_time=db_write_time,
+                                                                 prediction_time=prediction_time))
+                nb_rejected, start = 0, perf_counter()
+            else:
+                nb_rejected += 1
 
         return dataset_lines
 
@@ -289,6 +554,9 @@ class SimulationManager:
         :param animate: If True, triggers a simulation step.
         """
 
+        # The simulations can not produce and receive samples at the same time
+        self.__server.stop_production()
+
         # Define the batch to dispatch
         self.__server.set_dataset_batch(data_lines)
         # Get data
@@ -324,6 +592,45 @@ class SimulationManager:
 
         self.__network_manager.get_prediction_from_simulation(instance_id=instance_id)
 
+    @__check_init
+    def predict(self, data: Dict[str, ndarray]) -> Dict[str, ndarray]:
+        """
+        Direct in-memory prediction request from the SimulationManager to the NetworkManager.
+
+        :param data: Forward data fields of the sample.
+        """
+
+        return self.__network_manager.get_prediction_from_arrays(data=data)
+
+    def start_async_prediction(self) -> None:
+        """
+        Compute the predictions in a worker thread: the simulation submits its inputs and keeps running, the latest
+        completed prediction is applied at each step.
+        """
+
+        if not self.can_predict_in_process:
+            raise ValueError("[SimulationManager] Asynchronous predictions require the simulation and the network in "
+                             "the same process (in_process_prediction=True, nb_parallel_env=1).")
+        if self.__async_predictor is None:
+            self.__async_predictor = AsyncPredictor(predict_fnc=self.__predict_async)
+
+    def __predict_async(self, data: Dict[str, ndarray]) -> Dict[str, ndarray]:
+        """
+        Prediction request of the asynchronous predictor.
+
+        :param data: Forward data fields of the sample.
+        """
+
+        return {**data, **self.predict(data=data)}
+
+    @property
+    def async_predictor(self) -> Optional[AsyncPredictor]:
+        """
+        Get the asynchronous predictor if the asynchronous predictions are enabled.
+        """
+
+        return self.__async_predictor
+
     @__check_init
     def is_viewer_open(self) -> bool:
         """
@@ -334,6 +641,167 @@ class SimulationManager:
             return False
         return self.simulation_controller.simulation.viewer.is_open
 
+    ##########################
+    # Overlapped production #
+    ##########################
+
+    def start_prefetch(self,
+                       nb_batches: int,
+                       max_staleness: int = 1) -> None:
+        """
+        Launch the production of the next batches in a background thread, so that the simulations produce a batch
+        while the previous one is consumed.
+
+        :param nb_batches: Number of batches to produce.
+        :param max_staleness: Maximum number of batches produced ahead of the consumed batch (0 to produce each batch
+                              only when the previous one was consumed).
+        """
+
+        # Production is already running
+        if self.__prefetcher is not None:
+            return
+
+        self.__prefetched = Queue()
+        self.__prefetch_slots = Semaphore(max(max_staleness, 0) + 1)
+        self.__stop_prefetch.clear()
+        self.__nb_consumed = 0
+        self.__prefetcher = Thread(target=self.__prefetch, args=(nb_batches,), daemon=True)
+        self.__prefetcher.start()
+
+    def __prefetch(self, nb_batches: int) -> None:
+        """
+        Produce the batches while the production is not stopped.
+
+        :param nb_batches: Number of batches to produce.
+        """
+
+        for _ in range(nb_batches):
+
+            # Wait for a batch to be consumed if the producer is too far ahead
+            while not self.__prefetch_slots.acquire(timeout=0.1):
+                if self.__stop_prefetch.is_set():
+                    return
+            if self.__stop_prefetch.is_set():
+                return
+
+            # Errors are forwarded to the consumer, the batches are forwarded with their production time
+            try:
+                start = perf_counter()
+                data_lines = self.get_data(animate=True)
+                self.__prefetched.put((data_lines, perf_counter() - start))
+            except Exception as exception:
+                self.__prefetched.put(exception)
+                return
+
+    def get_prefetched_data(self) -> List[int]:
+        """
+        Get the next batch produced in the background. Getting a batch means that the previous one was consumed.
+        The time spent to produce the batch is available in 'prefetch_time'.
+        """
+
+        # The previous batch is consumed, the producer can start a new one
+        if self.__nb_consumed > 0:
+            self.__prefetch_slots.release()
+        self.__nb_consumed += 1
+        if self.autoscale:
+            self.__record_consumption()
+
+        while True:
+            try:
+                prefetched = self.__prefetched.get(timeout=0.1)
+                break
+            except Empty:
+                if not self.__prefetcher.is_alive() and self.__prefetched.empty():
+                    raise ValueError("[SimulationManager] No more batches are produced in the background.")
+        if isinstance(prefetched, Exception):
+            raise prefetched
+        data_lines, self.prefetch_time = prefetched
+        self.__batch_end = perf_counter()
+        return data_lines
+
+    def stop_prefetch(self) -> None:
+        """
+        Stop the production of batches in the background. Produced batches that were not consumed are discarded.
+        """
+
+        # Production is not running
+        if self.__prefetcher is None:
+            return
+
+        # Wait for the current batch to be finished
+        self.__stop_prefetch.set()
+        self.__prefetcher.join()
+        self.__prefetcher = None
+        self.__prefetched = None
+        self.__batch_end = None
+
+    ###############
+    # Autoscaling #
+    ###############
+
+    def __record_consumption(self) -> None:
+        """
+        Record the time spent by the consumer since it got the previous batch (called on the consumer side).
+        """
+
+        if self.__batch_end is not None:
+            with self.__autoscale_lock:
+                self.__consumption_times.append(perf_counter() - self.__batch_end)
+
+    def __record_production(self, production_time: float) -> None:
+        """
+        Record the time spent by the clients to produce a batch. Scale the number of clients periodically, between two
+        batches (called on the producer side, the clients are idle).
+
+        :param production_time: Time spent by the clients to produce the batch.
+        """
+
+        with self.__autoscale_lock:
+            self.__production_times.append(production_time)
+            if len(self.__production_times) < self.autoscale_every or len(self.__consumption_times) == 0:
+                return
+            production_time = sum(self.__production_times) / len(self.__production_times)
+            consumption_time = sum(self.__consumption_times) / len(self.__consumption_times)
+            self.__production_times, self.__consumption_times = [], []
+
+        # Wait for the spawned clients to join before a new decision
+        connected = [client_id for client_id, _ in self.__server.clients]
+        if any(launcher.is_alive() and idx not in connected for idx, launcher in self.__client_launchers.items()):
+            return
+
+        # Compare the rates and compute the number of clients that matches them
+        nb_clients = len(connected)
+        if abs(production_time - consumption_time) <= self.autoscale_tolerance * max(production_time,
+                                                                                      consumption_time):
+            return
+        max_clients = max(min(self.max_parallel_env, self.batch_size,
+                              cpu_count() - 1 if self.resource_planner is None
+                              else len(self.resource_planner.cores) - 1), 1)
+        nb_target = ceil(nb_clients * production_time / max(consumption_time, 1e-9))
+        nb_target = min(max(nb_target, 1), max_clients)
+        if nb_target == nb_clients:
+            return
+        print(f"[SimulationManager] Production {production_time * 1e3:.1f}ms vs consumption "
+              f"{consumption_time * 1e3:.1f}ms per batch: "
+              f"{'spawning' if nb_target > nb_clients else 'retiring'} {abs(nb_target - nb_clients)} client(s) "
+              f"({nb_clients} -> {nb_target} clients).")
+
+        # Retire the clients with the highest indices
+        retired = sorted(connected)[nb_target:]
+        for idx in retired:
+            self.__server.retire_client(client_id=idx)
+            self.__client_launchers.pop(idx, None)
+
+        # Re-plan the cores for the new number of clients
+        if self.resource_planner is not None:
+            self.resource_planner.replan(nb_clients=nb_target, removed_clients=retired)
+
+        # Spawn the missing clients with the lowest free indices, they join the pool when ready
+        free_ids = sorted(set(range(1, self.max_parallel_env + 1)) - set(connected))
+        for idx in free_ids[:max(nb_target - nb_clients, 0)]:
+            self.__launch_client(idx=idx)
+        self.nb_parallel_env = nb_target
+
     ###################
     # Manager methods #
     ###################
@@ -343,9 +811,21 @@ class SimulationManager:
         Launch the closing procedure of the EnvironmentManager.
         """
 
+        # Stop the overlapped production
+        self.stop_prefetch()
+
+        # Stop the asynchronous predictions
+        if self.__async_predictor is not None:
+            self.__async_predictor.close()
+            print(self.__async_predictor)
+
         # Server case
         if self.__server is not None:
+            if len(self.__server.telemetry.summary()) > 0:
+                print(self.__server.telemetry)
             self.__server.close()
+            for process in self.__client_processes:
+                process.join()
 
         # Environment case
         if self.simulation_controller is not None:
@@ -357,4 +837,13 @@ class SimulationManager:
         desc += f"# SIMULATION MANAGER\n"
         desc += f"    Always create data: {self.only_first_epoch}\n"
         desc += f"    Number of threads: {self.nb_parallel_env}\n"
+        if not self.spawn_clients:
+            desc += f"    External clients: {self.server_address[0]}:{self.server_address[1]} " \
+                    f"(max {self.max_parallel_env})\n"
+        desc += f"    Run-ahead production: {self.run_ahead}\n"
+        if self.autoscale:
+            desc += f"    Autoscaling: up to {self.max_parallel_env} clients (decision every {self.autoscale_every} " \
+                    f"batches)\n"
+        if self.run_ahead:
+            desc += f"    Run-ahead queue size: {self.queue_size}\n"
         return desc
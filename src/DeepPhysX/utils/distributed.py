@@ -0,0 +1,136 @@
+from typing import Any, List, Optional
+from argparse import ArgumentParser, REMAINDER
+from os import environ, cpu_count
+from sys import executable
+from subprocess import Popen
+
+from torch import distributed
+
+
+def init_distributed(backend: str = 'gloo') -> None:
+    """
+    Join the process group described by the environment variables (RANK, WORLD_SIZE, MASTER_ADDR, MASTER_PORT), as
+    set by the DeepPhysX launcher or by torchrun. Nothing is done if the process was not launched in a group.
+
+    :param backend: Backend of the process group.
+    """
+
+    if distributed.is_available() and not distributed.is_initialized() and 'WORLD_SIZE' in environ:
+        distributed.init_process_group(backend=backend)
+        print(f"[distributed] Process {get_rank()} joined the group of {get_world_size()} processes.")
+
+
+def close_distributed() -> None:
+    """
+    Leave the process group.
+    """
+
+    if is_distributed():
+        distributed.destroy_process_group()
+
+
+def is_distributed() -> bool:
+    """
+    Check if the current process belongs to a process group.
+    """
+
+    return distributed.is_available() and distributed.is_initialized()
+
+
+def get_rank() -> int:
+    """
+    Get the rank of the current process in the group (0 if not distributed).
+    """
+
+    return distributed.get_rank() if is_distributed() else 0
+
+
+def get_world_size() -> int:
+    """
+    Get the number of processes in the group (1 if not distributed).
+    """
+
+    return distributed.get_world_size() if is_distributed() else 1
+
+
+def is_main_process() -> bool:
+    """
+    Check if the current process is the main process of the group.
+    """
+
+    return get_rank() == 0
+
+
+def barrier() -> None:
+    """
+    Wait for every process of the group.
+    """
+
+    if is_distributed():
+        distributed.barrier()
+
+
+def broadcast_object(obj: Any) -> Any:
+    """
+    Share a picklable object of the main process with every process of the group.
+
+    :param obj: Object to share (only the object of the main process is used).
+    :return: The object of the main process.
+    """
+
+    if not is_distributed():
+        return obj
+    objects = [obj]
+    distributed.broadcast_object_list(objects, src=0)
+    return objects[0]
+
+
+def launch(script: str,
+           nb_processes: int,
+           script_args: Optional[List[str]] = None,
+           master_address: str = 'localhost',
+           master_port: int = 29500) -> int:
+    """
+    Launch a training script in several processes of a group on this machine.
+
+    :param script: Path to the python script to launch.
+    :param nb_processes: Number of processes in the group.
+    :param script_args: Command line arguments of the script.
+    :param master_address: Address of the main process.
+    :param master_port: Port of the main process.
+    :return: The highest return code of the processes.
+    """
+
+    # Share the cores between the processes
+    nb_threads = str(max(1, cpu_count() // nb_processes))
+
+    processes = []
+    for rank in range(nb_processes):
+        environment = {**environ,
+                       'RANK': str(rank),
+                       'LOCAL_RANK': str(rank),
+                       'WORLD_SIZE': str(nb_processes),
+                       'MASTER_ADDR': master_address,
+                       'MASTER_PORT': str(master_port),
+                       'OMP_NUM_THREADS': nb_threads}
+        processes.append(Popen([executable, script, *([] if script_args is None else script_args)],
+                               env=environment))
+    return max(process.wait() for process in processes)
+
+
+if __name__ == '__main__':
+
+    parser = ArgumentParser(prog='python -m DeepPhysX.utils.distributed',
+                            description='Launch a training script in several processes with data parallelism.')
+    parser.add_argument('-n', '--nb-processes', type=int, required=True, help='Number of processes.')
+    parser.add_argument('--master-address', default='localhost', help='Address of the main process.')
+    parser.add_argument('--master-port', type=int, default=29500, help='Port of the main process.')
+    parser.add_argument('script', help='Training script to launch.')
+    parser.add_argument('script_args', nargs=REMAINDER, help='Arguments of the training script.')
+    args = parser.parse_args()
+
+    exit(launch(script=args.script,
+                nb_processes=args.nb_processes,
+                script_args=args.script_args,
+                master_address=args.master_address,
+                master_port=args.master_port))
@@ -0,0 +1,208 @@
+from typing import Dict, List, Optional
+from os import cpu_count, listdir
+from os.path import isdir
+from threading import RLock
+import os
+
+from torch import set_num_threads, set_num_interop_threads
+
+
+class ResourcePlanner:
+
+    def __init__(self,
+                 trainer_cores: int = 0,
+                 threads_per_client: int = 1,
+                 cores: Optional[List[int]] = None,
+                 auto_balance: bool = False,
+                 balance_every: int = 20,
+                 balance_tolerance: float = 0.2):
+        """
+        ResourcePlanner partitions the CPU cores between the training process and the simulation processes to avoid
+        the oversubscription of the cores by the torch, OpenMP and BLAS thread pools.
+
+        :param trainer_cores: Number of cores for the training process (0 to give it the cores left by the clients).
+        :param threads_per_client: Number of threads (and cores) for each simulation client.
+        :param cores: Indices of the usable cores (default is the current affinity of the process).
+        :param auto_balance: If True, the cores are moved between the trainer and the clients depending on the measured
+                             simulation and training throughputs.
+        :param balance_every: Number of measured batches between two balancing decisions.
+        :param balance_tolerance: Relative throughput difference under which the partition is not changed.
+        """
+
+        # Usable cores
+        if cores is None:
+            cores = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else list(range(cpu_count()))
+        self.cores: List[int] = cores
+        self.trainer_cores: List[int] = []
+        self.client_cores: Dict[int, List[int]] = {}
+        self.__nb_trainer_cores: int = trainer_cores
+        self.threads_per_client: int = max(threads_per_client, 1)
+
+        # Clients processes (the clients can be spawned, retired and pinned from several threads)
+        self.client_pids: Dict[int, int] = {}
+        self.__lock: RLock = RLock()
+
+        # Automatic balancing variables
+        self.auto_balance: bool = auto_balance
+        self.balance_every: int = balance_every
+        self.balance_tolerance: float = balance_tolerance
+        self.__simulation_time: float = 0.
+        self.__training_time: float = 0.
+        self.__nb_records: int = 0
+
+    ############
+    # Planning #
+    ############
+
+    def plan(self, nb_clients: int) -> None:
+        """
+        Compute the partition of the cores between the trainer and the clients.
+
+        :param nb_clients: Number of simulation clients.
+        """
+
+        nb_cores = len(self.cores)
+        nb_clients = max(nb_clients, 0)
+
+        # The trainer gets the cores left by the clients if not specified, at least one in any case
+        if self.__nb_trainer_cores > 0:
+            nb_trainer = min(self.__nb_trainer_cores, nb_cores)
+        else:
+            nb_trainer = nb_cores - nb_clients * self.threads_per_client
+        nb_trainer = max(1, min(nb_trainer, nb_cores - 1 if nb_clients > 0 and nb_cores > 1 else nb_cores))
+        self.trainer_cores = self.cores[:nb_trainer]
+
+        # The clients share the remaining cores (cycling on them if there are not enough)
+        remaining = self.cores[nb_trainer:] if nb_trainer < nb_cores else self.cores
+        self.client_cores = {}
+        for i in range(nb_clients):
+            self.client_cores[i + 1] = [remaining[(i * self.threads_per_client + j) % len(remaining)]
+                                        for j in range(self.threads_per_client)]
+
+    def client_environment(self, idx: int) -> Dict[str, str]:
+        """
+        Get the environment variables that limit the thread pools of a client.
+
+        :param idx: Index of the client.
+        """
+
+        nb_threads = str(len(set(self.client_cores.get(idx, [0] * self.threads_per_client))))
+        return {'OMP_NUM_THREADS': nb_threads,
+                'MKL_NUM_THREADS': nb_threads,
+                'OPENBLAS_NUM_THREADS': nb_threads}
+
+    ###############
+    # Application #
+    ###############
+
+    def apply_trainer(self) -> None:
+        """
+        Pin the current process to the trainer cores and set the torch thread pools accordingly.
+        """
+
+        self.__set_affinity(pid=None, cores=self.trainer_cores)
+        set_num_threads(len(self.trainer_cores))
+        try:
+            set_num_interop_threads(1)
+        except RuntimeError:
+            # The inter-op thread pool can only be set before any parallel work started
+            pass
+
+    def apply_client(self, idx: int, pid: int) -> None:
+        """
+        Pin a client process to its cores.
+
+        :param idx: Index of the client.
+        :param pid: Process ID of the client.
+        """
+
+        with self.__lock:
+            self.client_pids[idx] = pid
+            if idx in self.client_cores:
+                self.__set_affinity(pid=pid, cores=self.client_cores[idx])
+
+    def replan(self,
+               nb_clients: int,
+               removed_clients: Optional[List[int]] = None) -> None:
+        """
+        Compute a new partition of the cores for a new number of clients and pin the running processes.
+
+        :param nb_clients: Number of simulation clients.
+        :param removed_clients: Indices of the clients that were retired.
+        """
+
+        with self.__lock:
+            for idx in [] if removed_clients is None else removed_clients:
+                self.client_pids.pop(idx, None)
+            self.plan(nb_clients=nb_clients)
+            self.apply_trainer()
+            for idx, pid in self.client_pids.items():
+                self.apply_client(idx=idx, pid=pid)
+
+    @staticmethod
+    def __set_affinity(pid: Optional[int], cores: List[int]) -> None:
+        """
+        Set the affinity of every thread of a process.
+
+        :param pid: Process ID (None for the current process).
+        :param cores: Indices of the cores.
+        """
+
+        if not hasattr(os, 'sched_setaffinity') or len(cores) == 0:
+            return
+
+        # Each thread has its own affinity on Linux
+        tasks_dir = f'/proc/{"self" if pid is None else pid}/task'
+        tasks = [int(task) for task in listdir(tasks_dir)] if isdir(tasks_dir) else [0 if pid is None else pid]
+        for task in tasks:
+            try:
+                os.sched_setaffinity(task, cores)
+            except (ProcessLookupError, PermissionError):
+                pass
+
+    #####################
+    # Automatic balance #
+    #####################
+
+    def record(self,
+               simulation_time: float,
+               training_time: float) -> bool:
+        """
+        Record the time spent to produce and to train on a batch. Re-balance the cores periodically in auto mode.
+
+        :param simulation_time: Time spent by the simulations to produce the batch.
+        :param training_time: Time spent by the network to train on the batch.
+        :return: True if the cores were re-balanced.
+        """
+
+        if not self.auto_balance:
+            return False
+        self.__simulation_time += simulation_time
+        self.__training_time += training_time
+        self.__nb_records += 1
+        if self.__nb_records < self.balance_every:
+            return False
+
+        # Compare the throughputs and move a core from the fastest side to the slowest one
+        simulation_time, training_time = self.__simulation_time, self.__training_time
+        self.__simulation_time, self.__training_time, self.__nb_records = 0., 0., 0
+        if abs(simulation_time - training_time) <= self.balance_tolerance * max(simulation_time, training_time):
+            return False
+        nb_trainer = len(self.trainer_cores) + (1 if training_time > simulation_time else -1)
+        if nb_trainer < 1 or nb_trainer >= len(self.cores):
+            return False
+        print(f"[ResourcePlanner] Simulation {simulation_time:.2f}s vs training {training_time:.2f}s: "
+              f"{'adding' if nb_trainer > len(self.trainer_cores) else 'removing'} a trainer core "
+              f"({nb_trainer} trainer cores).")
+        self.__nb_trainer_cores = nb_trainer
+        self.replan(nb_clients=len(self.client_cores))
+        return True
+
+    def __str__(self) -> str:
+
+        desc = "\n"
+        desc += f"# RESOURCE PLANNER\n"
+        desc += f"    Trainer cores: {self.trainer_cores}\n"
+        desc += f"    Client cores: {self.client_cores}\n"
+        desc += f"    Automatic balance: {self.auto_balance}\n"
+        return desc
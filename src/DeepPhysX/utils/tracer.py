@@ -0,0 +1,218 @@
+from typing import Any, Dict, List, Optional
+from os import environ, getpid, remove
+from glob import glob
+from collections import deque
+from threading import get_ident
+from time import perf_counter
+from numpy import array, percentile
+import json
+
+# Environment variable enabling the tracer in the processes launched by a traced pipeline (simulation clients)
+TRACE_VARIABLE = 'DEEPPHYSX_TRACE'
+
+
+class _NullSpan:
+
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc: Any) -> None:
+        pass
+
+
+class _Span:
+
+    __slots__ = ('tracer', 'name', 'start')
+
+    def __init__(self, tracer: 'Tracer', name: str):
+        self.tracer = tracer
+        self.name = name
+        self.start = 0.
+
+    def __enter__(self) -> None:
+        self.start = perf_counter()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.tracer.record(name=self.name, start=self.start, end=perf_counter())
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+
+    def __init__(self):
+        """
+        Tracer measures the time spent in the named stages of the pipelines. The spans are aggregated per stage and
+        can be exported as a Chrome trace (chrome://tracing or https://ui.perfetto.dev).
+        A disabled Tracer returns a shared no-op span.
+        """
+
+        self.enabled: bool = False
+        self.trace_file: Optional[str] = None
+
+        # Recorded spans: durations per stage since the last report, totals per stage, timeline events
+        self.__durations: Dict[str, List[float]] = {}
+        self.__totals: Dict[str, List[float]] = {}
+        self.__events: deque = deque(maxlen=1_000_000)
+
+        # Processes launched by a traced pipeline are traced too
+        self.enable_from_environment()
+
+    def enable(self,
+               trace_file: Optional[str] = None,
+               max_events: int = 1_000_000,
+               propagate: bool = True) -> None:
+        """
+        Start recording the spans.
+
+        :param trace_file: If set, file of the Chrome trace written by 'export'.
+        :param max_events: Maximum number of events in the timeline (the oldest events are dropped).
+        :param propagate: If True, the processes launched afterward are traced too.
+        """
+
+        self.enabled = True
+        self.trace_file = trace_file
+        self.__events = deque(self.__events, maxlen=max_events)
+        if propagate and trace_file is not None:
+            environ[TRACE_VARIABLE] = trace_file
+
+    def enable_from_environment(self) -> None:
+        """
+        Start recording the spans if the process was launched by a traced process. The timeline of this process is
+        written next to the trace of the parent process, which merges it in its own trace.
+        """
+
+        if TRACE_VARIABLE in environ and not self.enabled:
+            self.enable(trace_file=f'{environ[TRACE_VARIABLE]}.{getpid()}', propagate=False)
+
+    def disable(self) -> None:
+        """
+        Stop recording the spans.
+        """
+
+        self.enabled = False
+        environ.pop(TRACE_VARIABLE, None)
+
+    def close(self) -> None:
+        """
+        Print the statistics of the stages, write the Chrome trace and stop recording the spans.
+        """
+
+        if not self.enabled:
+            return
+        print(self)
+        if (trace_file := self.export()) is not None:
+            print(f"[{self.__class__.__name__}] Chrome trace written at {trace_file}.")
+        self.disable()
+
+    def span(self, name: str):
+        """
+        Get a context measuring the time spent in a stage.
+
+        :param name: Name of the stage.
+        """
+
+        return _Span(self, name) if self.enabled else _NULL_SPAN
+
+    def record(self,
+               name: str,
+               start: float,
+               end: float) -> None:
+        """
+        Record a span.
+
+        :param name: Name of the stage.
+        :param start: Start time of the span (perf_counter).
+        :param end: End time of the span (perf_counter).
+        """
+
+        if (durations := self.__durations.get(name)) is None:
+            durations = self.__durations.setdefault(name, [])
+        durations.append(end - start)
+        self.__events.append((name, start, end, get_ident()))
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get the statistics (in milliseconds) of each stage since the tracer was enabled.
+        """
+
+        summary = {}
+        for name in sorted(set(self.__totals) | set(self.__durations)):
+            count, total = self.__totals.get(name, [0, 0.])
+            durations = array(self.__durations.get(name, [])) * 1e3
+            count, total = count + len(durations), total + durations.sum()
+            summary[name] = {'count': count, 'total': total, 'mean': total / max(count, 1)}
+            if len(durations) > 0:
+                summary[name].update({'p50': percentile(durations, 50), 'p99': percentile(durations, 99)})
+        return summary
+
+    def report(self,
+               stats_manager: Any,
+               count: int) -> None:
+        """
+        Report the histograms of the durations (in milliseconds) of each stage since the last report.
+
+        :param stats_manager: StatsManager receiving the histograms.
+        :param count: ID of the report.
+        """
+
+        for name in list(self.__durations):
+            durations, self.__durations[name] = self.__durations[name], []
+            if len(durations) == 0:
+                continue
+            totals = self.__totals.setdefault(name, [0, 0.])
+            durations = array(durations) * 1e3
+            totals[0], totals[1] = totals[0] + len(durations), totals[1] + durations.sum()
+            if stats_manager is not None:
+                stats_manager.add_custom_histogram(f'Stages/{name}', durations, count)
+                stats_manager.add_custom_scalar(f'Stages/{name}/Mean', durations.mean(), count)
+
+    def export(self, trace_file: Optional[str] = None) -> Optional[str]:
+        """
+        Write the timeline as a Chrome trace, merged with the traces of the processes launched by this process.
+
+        :param trace_file: File of the Chrome trace (the file given to 'enable' by default).
+        :return: The written file.
+        """
+
+        trace_file = self.trace_file if trace_file is None else trace_file
+        if trace_file is None:
+            return None
+
+        # Timeline of the current process
+        events = self.chrome_events()
+
+        # Timelines of the other processes
+        for process_file in glob(f'{trace_file}.*'):
+            with open(process_file) as file:
+                events += json.load(file)['traceEvents']
+            remove(process_file)
+
+        with open(trace_file, 'w') as file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
+        return trace_file
+
+    def chrome_events(self) -> List[Dict[str, Any]]:
+        """
+        Get the timeline of the current process as Chrome trace events.
+        """
+
+        pid = getpid()
+        return [{'name': name, 'cat': 'DeepPhysX', 'ph': 'X', 'ts': start * 1e6, 'dur': (end - start) * 1e6,
+                 'pid': pid, 'tid': tid} for name, start, end, tid in list(self.__events)]
+
+    def __str__(self) -> str:
+
+        description = "\n"
+        description += f"# {self.__class__.__name__}\n"
+        for name, stats in self.summary().items():
+            description += f"    {name:<20} count {stats['count']:>8d} | total {stats['total']:>10.1f}ms | " \
+                           f"mean {stats['mean']:>8.3f}ms\n"
+        return description
+
+
+# Tracer shared by the components of the current process
+tracer = Tracer()